@@ -0,0 +1,85 @@
+"""
+Chat benchmark against a local mock Messages API
+
+Runs concurrent TaskPlannerAgent.chat calls (or chat_stream with --stream)
+and reports throughput, time to first token, event loop lag (how long
+other coroutines on the loop were stalled) and prompt cache savings. Every
+call asks the same question, so --memo shows the local reply memo at work.
+
+Usage:
+    python -m agents.benchmarks.chat_benchmark [--calls 64] [--latency 0.2] [--stream] [--memo]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import time
+from typing import AsyncIterator
+
+from anthropic import AsyncAnthropic
+
+from agents.benchmarks.mock_anthropic import MockAnthropicServer
+from agents.planner.planner_agent import TaskPlannerAgent
+from agents.planner.response_memo import ResponseMemo
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Worst observed delay of a periodic timer on the event loop"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+async def collect(chunks: AsyncIterator[str]) -> str:
+    return "".join([chunk async for chunk in chunks])
+
+async def run(url: str, calls: int, concurrency: int, stream: bool, memo: bool) -> None:
+    client = AsyncAnthropic(base_url=url, api_key="test", max_retries=0)
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_lag(stop))
+    
+    start = time.perf_counter()
+    agent = TaskPlannerAgent(
+        client=client,
+        max_concurrency=concurrency,
+        response_memo=ResponseMemo() if memo else ResponseMemo(max_entries=0)
+    )
+    chat = (lambda *args, **kwargs: collect(agent.chat_stream(*args, **kwargs))) if stream else agent.chat
+    replies = await asyncio.gather(*(
+        chat("List my high priority tasks", session_id=f"session-{i}")
+        for i in range(calls)
+    ))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    
+    failed = sum(1 for reply in replies if reply.startswith("Sorry"))
+    print(
+        f"  concurrency={concurrency:<4} {elapsed:6.2f}s  {calls / elapsed:7.1f} calls/s  "
+        f"failed={failed}  ttft p50 {agent.chat_metrics.stats()['time_to_first_token']['p50_ms']} ms  "
+        f"max loop lag {await lag * 1000:6.1f} ms"
+    )
+    stats = agent.chat_metrics.stats()
+    print(
+        f"{'':20}prompt cache read {stats['prompt_cache']['read_ratio']:.0%} of input, "
+        f"input cost saved {stats['prompt_cache']['input_cost_saved']:.0%}, memo hits {stats['memo_hits']}"
+    )
+    await client.close()
+
+def main(calls: int, latency: float, error_rate: float, stream: bool, memo: bool) -> None:
+    reply = "Here are your high priority tasks: " + " ".join(f"task-{i}" for i in range(20))
+    with MockAnthropicServer(latency=latency, error_rate=error_rate, reply=reply, token_interval=0.01) as server:
+        mode = "streamed" if stream else "non-streamed"
+        print(f"{calls} {mode} chat calls, {latency * 1000:.0f} ms mock latency, error rate {error_rate:.0%}")
+        for concurrency in (1, 8, 32):
+            asyncio.run(run(server.url, calls, concurrency, stream, memo))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--memo", action="store_true")
+    args = parser.parse_args()
+    main(args.calls, args.latency, args.error_rate, args.stream, args.memo)
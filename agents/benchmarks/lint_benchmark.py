@@ -0,0 +1,40 @@
+"""
+Lint benchmark: CursorRulesEngine.check_tree scaling with worker processes
+
+Usage:
+    python -m agents.benchmarks.lint_benchmark [ROOT] [--copies 1]
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import sysconfig
+import time
+
+from agents.cursor.rules import CursorRulesEngine, iter_tree
+
+def main(root: str, copies: int) -> None:
+    engine = CursorRulesEngine()
+    paths = list(iter_tree(root)) * copies
+    total_bytes = sum(os.path.getsize(p) for p in paths)
+    print(f"{len(paths)} files, {total_bytes / 1e6:.1f} MB under {root}")
+    
+    cpus = os.cpu_count() or 1
+    workers = sorted({1, *(w for w in (2, 4, 8, 16, 32) if w <= cpus), cpus})
+    baseline = None
+    for count in workers:
+        start = time.perf_counter()
+        checked = sum(1 for _ in engine.check_paths(paths, workers=count))
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(
+            f"  workers={count:<3} {elapsed:7.2f}s  "
+            f"{checked / elapsed:10,.0f} files/s  speedup {baseline / elapsed:4.1f}x"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("root", nargs="?", default=sysconfig.get_paths()["stdlib"])
+    parser.add_argument("--copies", type=int, default=1, help="repeat the file list to enlarge the corpus")
+    args = parser.parse_args()
+    main(args.root, args.copies)
@@ -0,0 +1,200 @@
+"""
+Local mock of the Anthropic Messages API for tests and benchmarks
+    
+    with MockAnthropicServer(latency=0.2) as server:
+        client = AsyncAnthropic(base_url=server.url, api_key="test", max_retries=0)
+"""
+
+from __future__ import annotations
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+class MockAnthropicServer:
+    """Threaded HTTP server answering POST /v1/messages after a fixed latency
+    
+    Streamed requests ("stream": true) get the reply word by word as
+    server-sent events, token_interval seconds apart; others get it in one
+    piece after the same total time. Prompt caching is simulated: prefixes
+    ending at a cache_control block are remembered, and later requests that
+    repeat one report it as cache_read_input_tokens. With tool_calls
+    ({"name", "input"} dicts), requests offering tools get those tool calls
+    back, then the text reply once the request carries their results.
+    """
+    
+    def __init__(
+        self,
+        latency: float = 0.1,
+        error_rate: float = 0.0,
+        reply: str = "Mock reply",
+        token_interval: float = 0.0,
+        tool_calls: list[dict] | None = None
+    ):
+        self.latency = latency
+        self.token_interval = token_interval
+        self.tool_calls = tool_calls or []
+        self.error_rate = error_rate
+        self.reply = reply
+        self.requests: list[dict] = []
+        self.inflight = 0
+        self.max_inflight = 0  # most requests handled at once
+        self._cached_prefixes: set[str] = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def __enter__(self) -> MockAnthropicServer:
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def usage(self, body: dict) -> dict:
+        """Token usage of a request (about 4 characters per token)"""
+        system = body.get("system") or []
+        blocks = [{"type": "text", "text": system}] if isinstance(system, str) else list(system)
+        for message in body.get("messages", []):
+            content = message["content"]
+            blocks.extend([{"type": "text", "text": content}] if isinstance(content, str) else content)
+        
+        prefixes = [json.dumps(blocks[:i + 1]) for i, block in enumerate(blocks) if block.get("cache_control")]
+        with self._lock:
+            read = max((len(prefix) for prefix in prefixes if prefix in self._cached_prefixes), default=0)
+            self._cached_prefixes.update(prefixes)
+        cacheable = len(prefixes[-1]) if prefixes else 0
+        return {
+            "input_tokens": (len(json.dumps(blocks)) - cacheable) // 4,
+            "cache_creation_input_tokens": (cacheable - read) // 4,
+            "cache_read_input_tokens": read // 4,
+            "output_tokens": len(self.reply) // 4
+        }
+    
+    def _wants_tools(self, body: dict) -> bool:
+        if not (self.tool_calls and body.get("tools")) or body.get("tool_choice", {}).get("type") == "none":
+            return False
+        content = body["messages"][-1]["content"]
+        return isinstance(content, str) or all(block.get("type") != "tool_result" for block in content)
+    
+    def respond(self, body: dict) -> dict:
+        """Messages API response for a request body"""
+        if self._wants_tools(body):
+            content = [
+                {"type": "tool_use", "id": f"toolu_mock_{i}", "name": call["name"], "input": call["input"]}
+                for i, call in enumerate(self.tool_calls)
+            ]
+            stop_reason = "tool_use"
+        else:
+            content = [{"type": "text", "text": self.reply}]
+            stop_reason = "end_turn"
+        return {
+            "id": f"msg_mock_{len(self.requests)}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "mock"),
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": self.usage(body)
+        }
+    
+    def stream_events(self, body: dict) -> Iterator[tuple[str, dict]]:
+        """Server-sent events of a streamed Messages API response"""
+        message = self.respond(body)
+        usage = message["usage"]
+        yield "message_start", {
+            "type": "message_start",
+            "message": {**message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 0}}
+        }
+        yield "content_block_start", {
+            "type": "content_block_start",
+            "index": 0,
+            "content_block": {"type": "text", "text": ""}
+        }
+        for word in re.findall(r"\S+\s*", self.reply):
+            yield "content_block_delta", {
+                "type": "content_block_delta",
+                "index": 0,
+                "delta": {"type": "text_delta", "text": word}
+            }
+        yield "content_block_stop", {"type": "content_block_stop", "index": 0}
+        yield "message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": usage["output_tokens"]}
+        }
+        yield "message_stop", {"type": "message_stop"}
+    
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        mock = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, *args) -> None:
+                pass
+            
+            def _send_json(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with mock._lock:
+                    mock.requests.append(body)
+                    mock.inflight += 1
+                    mock.max_inflight = max(mock.max_inflight, mock.inflight)
+                try:
+                    self._respond(body)
+                finally:
+                    with mock._lock:
+                        mock.inflight -= 1
+            
+            def _respond(self, body: dict) -> None:
+                time.sleep(mock.latency)
+                
+                if random.random() < mock.error_rate:
+                    self._send_json(529, {
+                        "type": "error",
+                        "error": {"type": "overloaded_error", "message": "Overloaded"}
+                    })
+                    return
+                if body.get("stream"):
+                    self._send_stream(body)
+                    return
+                # Non-streamed replies arrive after the whole reply is generated
+                time.sleep(mock.token_interval * len(mock.reply.split()))
+                self._send_json(200, mock.respond(body))
+            
+            def _send_stream(self, body: dict) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    for event, data in mock.stream_events(body):
+                        if event == "content_block_delta" and mock.token_interval:
+                            time.sleep(mock.token_interval)
+                        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client stopped reading the stream
+        
+        return Handler
@@ -0,0 +1,120 @@
+"""
+Serialization benchmark: TaskPlan encoding and decoding per back end
+
+Compares the asdict-based to_dict/from_dict this module replaced with the
+generated encoders in agents.planner.serialization, on one plan whose tasks
+carry subtasks, tags and metadata.
+
+Usage:
+    python -m agents.benchmarks.serialization_benchmark [--tasks 10000]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import random
+import time
+from dataclasses import asdict
+
+from agents.planner import serialization
+from agents.planner.planner_agent import Task, TaskPlan, TaskPriority, TaskStatus
+
+def make_plan(count: int) -> TaskPlan:
+    """Build a deterministic plan; every fourth task has two subtasks"""
+    rng = random.Random(42)
+    
+    def task(task_id: str) -> Task:
+        return Task(
+            id=task_id,
+            title=f"Task {task_id}",
+            description="Benchmark task " * 4,
+            status=rng.choice(list(TaskStatus)),
+            priority=rng.choice(list(TaskPriority)),
+            tags=rng.sample(["backend", "frontend", "security", "infra"], k=2),
+            estimated_hours=rng.choice([None, 1.0, 4.0]),
+            metadata={"source": "benchmark", "points": rng.randint(1, 8)}
+        )
+    
+    tasks = []
+    for i in range(count):
+        parent = task(f"task-{i}")
+        if i % 4 == 0:
+            parent.subtasks = [task(f"task-{i}-{n}") for n in range(2)]
+        tasks.append(parent)
+    return TaskPlan(id="plan-bench", name="Benchmark", description="Serialization benchmark", tasks=tasks)
+
+# Previous implementations, kept for comparison
+def legacy_task_to_dict(task: Task) -> dict:
+    data = asdict(task)
+    data['status'] = task.status.value
+    data['priority'] = task.priority.value
+    data['subtasks'] = [legacy_task_to_dict(st) for st in task.subtasks]
+    return data
+
+def legacy_plan_to_dict(plan: TaskPlan) -> dict:
+    data = asdict(plan)
+    data['tasks'] = [legacy_task_to_dict(t) for t in plan.tasks]
+    data['status'] = plan.status.value
+    return data
+
+def legacy_task_from_dict(data: dict) -> Task:
+    data['status'] = TaskStatus(data.get('status', 'pending'))
+    data['priority'] = TaskPriority(data.get('priority', 'medium'))
+    data['subtasks'] = [legacy_task_from_dict(st) for st in data.get('subtasks', [])]
+    return Task(**data)
+
+def legacy_plan_from_dict(data: dict) -> TaskPlan:
+    data['status'] = TaskStatus(data.get('status', 'pending'))
+    data['tasks'] = [legacy_task_from_dict(t) for t in data['tasks']]
+    return TaskPlan(**data)
+
+def timed(fn, repeat: int) -> float:
+    """Best of repeat runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main(count: int, repeat: int) -> None:
+    plan = make_plan(count)
+    results: dict[str, dict[str, float]] = {}
+    
+    encoded = json.dumps(legacy_plan_to_dict(plan)).encode()
+    results["legacy (asdict + json)"] = {
+        "to_dict ms": timed(lambda: legacy_plan_to_dict(plan), repeat),
+        "dumps ms": timed(lambda: json.dumps(legacy_plan_to_dict(plan)).encode(), repeat),
+        # The legacy decoder mutates its input, so each run parses a fresh copy
+        "loads ms": timed(lambda: legacy_plan_from_dict(json.loads(encoded)), repeat),
+        "size KB": len(encoded) / 1024,
+    }
+    
+    formats = ["json"]
+    if serialization.orjson is not None:
+        formats.append("orjson")
+    if serialization.msgpack is not None:
+        formats.append("msgpack")
+    for format in formats:
+        encoded = serialization.dumps(plan, format)
+        assert serialization.loads(encoded, TaskPlan, format) == plan
+        results[format] = {
+            "to_dict ms": timed(lambda: serialization.to_dict(plan), repeat),
+            "dumps ms": timed(lambda: serialization.dumps(plan, format), repeat),
+            "loads ms": timed(lambda: serialization.loads(encoded, TaskPlan, format), repeat),
+            "size KB": len(encoded) / 1024,
+        }
+    
+    subtasks = sum(len(t.subtasks) for t in plan.tasks)
+    print(f"Plan with {count} tasks ({subtasks} subtasks), best of {repeat}")
+    for name, metrics in results.items():
+        print(f"  {name}:")
+        for metric, value in metrics.items():
+            print(f"    {metric:<24} {value:>12,.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.tasks, args.repeat)
@@ -0,0 +1,75 @@
+"""
+Storage benchmark: in-memory TaskStorage vs SqliteTaskStorage
+
+Usage:
+    python -m agents.benchmarks.storage_benchmark [--tasks 10000]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from agents.planner.planner_agent import Task, TaskPriority, TaskStatus, TaskStorage
+from agents.planner.sqlite_storage import SqliteTaskStorage
+
+def make_tasks(count: int) -> list[Task]:
+    """Build a deterministic set of tasks"""
+    rng = random.Random(42)
+    return [
+        Task(
+            id=f"task-{i}",
+            title=f"Task {i}",
+            description="Benchmark task " * 4,
+            status=rng.choice(list(TaskStatus)),
+            priority=rng.choice(list(TaskPriority)),
+            tags=rng.sample(["backend", "frontend", "security", "infra"], k=2)
+        )
+        for i in range(count)
+    ]
+
+async def run(storage, tasks: list[Task]) -> dict[str, float]:
+    """Time concurrent writes, point reads and filtered listings"""
+    start = time.perf_counter()
+    await asyncio.gather(*(storage.save_task(t) for t in tasks))
+    write = time.perf_counter() - start
+    
+    ids = [t.id for t in tasks]
+    random.Random(7).shuffle(ids)
+    start = time.perf_counter()
+    for task_id in ids[:1000]:
+        await storage.get_task(task_id)
+    read = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for status in TaskStatus:
+        await storage.list_tasks(status=status)
+    listing = time.perf_counter() - start
+    
+    return {
+        "writes/s": len(tasks) / write,
+        "reads/s": min(len(ids), 1000) / read,
+        "list (all statuses) ms": listing * 1000,
+    }
+
+async def main(count: int) -> None:
+    tasks = make_tasks(count)
+    results = {"memory": await run(TaskStorage(), tasks)}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        async with SqliteTaskStorage(Path(tmp) / "bench.db") as storage:
+            results["sqlite"] = await run(storage, tasks)
+    
+    print(f"{count} tasks")
+    for name, metrics in results.items():
+        print(f"  {name}:")
+        for metric, value in metrics.items():
+            print(f"    {metric:<24} {value:>12,.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10_000)
+    asyncio.run(main(parser.parse_args().tasks))
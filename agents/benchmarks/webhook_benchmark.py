@@ -0,0 +1,94 @@
+"""
+Webhook benchmark: per-request overhead of the webhook routes
+
+Drives the blueprint through Flask's test client, once with the agent's
+process_webhook as callback and once with a no-op callback that isolates
+parsing, dispatch and response encoding.
+
+Usage:
+    python -m agents.benchmarks.webhook_benchmark [--requests 2000]
+"""
+
+from __future__ import annotations
+import argparse
+import logging
+import time
+from functools import partial
+
+from flask import Flask
+
+from agents.planner.planner_agent import Task, TaskPlannerAgent
+from agents.webhooks import webhook_handler
+
+EVENTS = {
+    'task.create': '/webhooks/task/create',
+    'task.status': '/webhooks/task/status',
+    'task.complete': '/webhooks/task/complete',
+    'task.error': '/webhooks/task/error',
+}
+
+def payload(event_type: str, i: int, task_ids: list[str]) -> dict:
+    """Distinct payload per request (identical payloads would be replayed)"""
+    if event_type == 'task.create':
+        return {
+            'title': f"Benchmark task {i}",
+            'description': "Created by the webhook benchmark " * 4,
+            'priority': 'high',
+            'tags': ['bench', 'webhook'],
+            'estimated_hours': 2
+        }
+    task_id = task_ids[i % len(task_ids)]
+    if event_type == 'task.status':
+        return {'task_id': task_id, 'status': 'in_progress' if i % 2 else 'pending', 'n': i}
+    if event_type == 'task.complete':
+        return {'task_id': task_id, 'actual_hours': 1 + i % 5}
+    return {'task_id': task_id, 'error_message': f"Failure {i}"}
+
+def run(client, requests: int, task_ids: list[str]) -> dict[str, float]:
+    """Microseconds per request for each event"""
+    results = {}
+    for event_type, path in EVENTS.items():
+        payloads = [payload(event_type, i, task_ids) for i in range(requests)]
+        start = time.perf_counter()
+        for body in payloads:
+            response = client.post(path, json=body)
+            assert response.status_code < 300, response.get_data(as_text=True)
+        results[event_type] = (time.perf_counter() - start) / requests * 1e6
+    return results
+
+def main(requests: int) -> None:
+    logging.disable(logging.ERROR)  # task.error requests log every failure
+    app = Flask(__name__)
+    app.register_blueprint(webhook_handler.webhook_bp)
+    client = app.test_client()
+    
+    agent = TaskPlannerAgent(client=object())
+    for event_type in EVENTS:
+        webhook_handler.register_callback(event_type, partial(agent.process_webhook, event_type))
+    # Tasks with subtasks, so responses carry nested objects
+    for i in range(100):
+        client.post('/webhooks/task/create', json={'title': f"Seed {i}", 'description': "seed"})
+    task_ids = list(agent.storage.tasks)
+    for task_id in task_ids:
+        agent.storage.tasks[task_id].subtasks = [
+            Task(id=f"{task_id}-{n}", title=f"Step {n}", description="subtask", tags=['bench'])
+            for n in range(3)
+        ]
+    results = {"agent": run(client, requests, task_ids)}
+    
+    async def noop(body: dict) -> dict:
+        return {'ok': True}
+    for event_type in EVENTS:
+        webhook_handler.register_callback(event_type, noop)
+    results["no-op callback"] = run(client, requests, task_ids)
+    
+    print(f"{requests} requests per event")
+    for name, metrics in results.items():
+        print(f"  {name}:")
+        for event_type, micros in metrics.items():
+            print(f"    {event_type:<24} {micros:>10,.1f} us/request")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    main(parser.parse_args().requests)
@@ -0,0 +1,129 @@
+"""Content-hash result cache for rule checks and skill executions"""
+
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_last_used ON results(last_used);
+"""
+
+_SELECT = "SELECT value FROM results WHERE key = ?"
+_TOUCH = "UPDATE results SET last_used = ? WHERE key = ?"
+_INSERT = "INSERT OR IGNORE INTO results (key, value, last_used) VALUES (?, ?, ?)"
+_UPDATE = "UPDATE results SET value = ?, last_used = ? WHERE key = ?"
+_EVICT = "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)"
+
+def content_hash(content: str | bytes) -> str:
+    """SHA-256 of file content"""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+def fingerprint(*parts: Any) -> str:
+    """Stable short hash of JSON-serializable configuration (rule sets, skill versions, options)"""
+    data = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+class ResultCache:
+    """Persistent LRU cache of JSON results keyed by fingerprint + content hash
+    
+    Backed by SQLite in WAL mode, so several lint worker processes can share
+    one cache file. Once it holds more than max_entries results, the least
+    recently used tenth is evicted.
+    """
+    
+    def __init__(self, path: str | Path = ".cursor-cache.db", max_entries: int = 100_000):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._size = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def key(fingerprint: str, content: str | bytes) -> str:
+        """Cache key for content under a configuration fingerprint"""
+        return f"{fingerprint}:{content_hash(content)}"
+    
+    def get(self, key: str) -> Any | None:
+        """Cached result, or None on a miss"""
+        with self._lock:
+            row = self._conn.execute(_SELECT, (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(_TOUCH, (time.time_ns(), key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+    
+    def put(self, key: str, value: Any) -> None:
+        """Store result, evicting least recently used entries past the size bound"""
+        data = json.dumps(value, default=str)
+        now = time.time_ns()
+        with self._lock:
+            # Only new keys grow the cache; overwrites keep its size
+            if self._conn.execute(_INSERT, (key, data, now)).rowcount:
+                self._size += 1
+            else:
+                self._conn.execute(_UPDATE, (data, now, key))
+            if self._size > self.max_entries:
+                # Other processes may share the file, so recount before evicting
+                self._size = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+                excess = self._size - self.max_entries
+                if excess > 0:
+                    batch = excess + self.max_entries // 10
+                    deleted = self._conn.execute(_EVICT, (batch,)).rowcount
+                    self._size -= deleted
+                    self.evictions += deleted
+            self._conn.commit()
+    
+    def record(self, hit: bool) -> None:
+        """Count a lookup made through another connection (e.g. a check_paths worker)"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def stats(self) -> dict:
+        """Hit/miss counters for this process, including lookups recorded from workers
+        
+        Evictions made by other processes are not counted.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+    
+    def clear(self) -> None:
+        """Drop every cached result"""
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._size = 0
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
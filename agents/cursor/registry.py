@@ -0,0 +1,128 @@
+"""Cursor skill registry with lazy loading"""
+
+from __future__ import annotations
+import asyncio
+import importlib
+import logging
+from collections import deque
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Iterable
+
+if TYPE_CHECKING:
+    from agents.cursor.cache import ResultCache
+    from agents.cursor.skills import CursorSkill
+
+logger = logging.getLogger(__name__)
+
+# Third-party packages register skills under this entry point group, e.g.
+# [project.entry-points."agents.cursor.skills"] lint = "my_pkg.skills:LintSkill"
+ENTRY_POINT_GROUP = "agents.cursor.skills"
+
+BUILTIN_SKILLS: dict[str, str] = {
+    "generate": "agents.cursor.skills:GenerateSkill",
+    "edit": "agents.cursor.skills:EditSkill",
+    "refactor": "agents.cursor.skills:RefactorSkill",
+    "document": "agents.cursor.skills:DocumentSkill",
+    "test": "agents.cursor.skills:TestSkill",
+}
+
+class SkillRegistry:
+    """Skills by name, imported and instantiated on first use
+    
+    Entry points are scanned on the first lookup rather than at
+    construction, so importing the registry stays cheap.
+    """
+    
+    def __init__(self, discover: bool = True):
+        self._targets: dict[str, str | type[CursorSkill]] = dict(BUILTIN_SKILLS)
+        self._instances: dict[str, CursorSkill] = {}
+        self._registered: set[str] = set()  # explicit registrations win over entry points
+        self._discover_pending = discover
+    
+    def discover(self) -> None:
+        """Register skills advertised through entry points (without importing them)"""
+        self._discover_pending = False
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            if ep.name not in self._registered:
+                self._targets[ep.name] = ep.value
+                self._instances.pop(ep.name, None)
+    
+    def _ensure_discovered(self) -> None:
+        if self._discover_pending:
+            self.discover()
+    
+    def register(self, name: str, target: str | type[CursorSkill]) -> None:
+        """Register skill class, or a "module:Class" path to import lazily"""
+        self._targets[name] = target
+        self._registered.add(name)
+        self._instances.pop(name, None)
+    
+    def names(self) -> list[str]:
+        self._ensure_discovered()
+        return sorted(self._targets)
+    
+    def get(self, name: str) -> CursorSkill:
+        """Skill instance by name, importing its module on first use"""
+        skill = self._instances.get(name)
+        if skill is not None:
+            return skill
+        
+        self._ensure_discovered()
+        target = self._targets.get(name)
+        if target is None:
+            raise KeyError(f"Unknown skill: {name}")
+        if isinstance(target, str):
+            module_name, _, attr = target.partition(":")
+            target = getattr(importlib.import_module(module_name), attr)
+        
+        skill = self._instances[name] = target()
+        logger.debug(f"Loaded skill {name}")
+        return skill
+    
+    async def execute_many(
+        self,
+        files: Iterable[str | Path],
+        skills: Iterable[str],
+        context: dict | None = None,
+        concurrency: int = 8,
+        cache: ResultCache | None = None
+    ) -> AsyncIterator[dict]:
+        """Run the named skills over many files, yielding results in file order
+        
+        Only the named skills are imported. Each file is read on a worker
+        thread and parsed once for all of its skills (SkillPipeline). At most
+        `concurrency` files are in flight at a time. Each result is
+        {"path", "results": {skill: result}, "error"}.
+        """
+        from agents.cursor.skills import SkillPipeline
+        
+        pipeline = SkillPipeline([self.get(name) for name in skills], cache=cache)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run_file(path: str) -> dict:
+            async with semaphore:
+                try:
+                    code = await asyncio.to_thread(Path(path).read_text, encoding="utf-8", errors="replace")
+                    results = await pipeline.run(code, context)
+                except Exception as e:
+                    logger.error(f"Skills failed on {path}: {e}")
+                    return {"path": path, "results": {}, "error": str(e)}
+            return {"path": path, "results": results, "error": None}
+        
+        # Sliding window: keep a bounded number of scheduled files ahead of
+        # the one being yielded
+        window: deque[asyncio.Task] = deque()
+        try:
+            for path in files:
+                window.append(asyncio.ensure_future(run_file(str(path))))
+                if len(window) >= concurrency * 2:
+                    yield await window.popleft()
+            while window:
+                yield await window.popleft()
+        finally:
+            for task in window:
+                task.cancel()
+
+# Default registry
+registry = SkillRegistry()
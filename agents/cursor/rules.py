@@ -1,8 +1,28 @@
 """Cursor-like Rules System"""
 
 from __future__ import annotations
-from typing import Any
-from dataclasses import dataclass
+import bisect
+import fnmatch
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, ClassVar, Iterable, Iterator
+from dataclasses import asdict, dataclass
+
+from agents.cursor.cache import ResultCache, fingerprint
+
+# Backreferences depend on group numbering/names, which change when a
+# pattern is embedded in the combined alternation
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+# Combined regexes cached per set of remaining rules
+COMBINED_CACHE_SIZE = 256
+
+# Directory-tree linting defaults
+DEFAULT_INCLUDE = ("*.py",)
+DEFAULT_EXCLUDE = (".git", "__pycache__", ".venv", "venv", "node_modules", "*.egg-info")
+MAX_FILE_SIZE = 1_000_000
 
 @dataclass
 class Rule:
@@ -14,10 +34,21 @@ class Rule:
     priority: int = 0
     enabled: bool = True
 
-class CursorRulesEngine:
-    """Rule engine for code patterns"""
+class LineIndex:
+    """Line-start offset table mapping string offsets to (line, column)
+    
+    Built once per text. Lookups are a binary search, so locating a match
+    never rescans the text from the start.
+    """
     
-from typing import ClassVar
+    def __init__(self, text: str):
+        self.starts = [0]
+        self.starts.extend(m.end() for m in re.finditer("\n", text))
+    
+    def position(self, offset: int) -> tuple[int, int]:
+        """1-based (line, column) of an offset"""
+        line = bisect.bisect_right(self.starts, offset) - 1
+        return line + 1, offset - self.starts[line] + 1
 
 class CursorRulesEngine:
     """Rule engine for code patterns"""
@@ -53,34 +84,310 @@ class CursorRulesEngine:
         ),
     ]
     
-    def __init__(self):
+    def __init__(self, cache: ResultCache | None = None):
         self.rules: dict[str, Rule] = {}
+        self.cache = cache
+        self._compiled: dict[str, tuple[str, re.Pattern]] = {}
+        self._combined: dict[tuple[str, ...], re.Pattern | None] = {}
         for rule in self.DEFAULT_RULES:
-            self.rules[rule.name] = rule
+            self.add_rule(rule)
+    
+    @classmethod
+    def from_rules(cls, rules: Iterable[Rule], cache: ResultCache | None = None) -> CursorRulesEngine:
+        """Engine with exactly the given rules (no defaults)"""
+        engine = cls.__new__(cls)
+        engine.rules = {}
+        engine.cache = cache
+        engine._compiled = {}
+        engine._combined = {}
+        for rule in rules:
+            engine.add_rule(rule)
+        return engine
+    
+    def rules_fingerprint(self) -> str:
+        """Hash of the active rule set, part of every result cache key"""
+        return fingerprint([asdict(rule) for rule in self.rules.values()])
+    
+    def _cached(self, kind: str, options: Any, code: str, compute) -> tuple[list[dict], bool]:
+        """Result from the cache if code and rule set are unchanged, else compute and store it"""
+        if self.cache is None:
+            return compute(), False
+        
+        key = self.cache.key(fingerprint(kind, options, self.rules_fingerprint()), code)
+        result = self.cache.get(key)
+        if result is not None:
+            return result, True
+        
+        result = compute()
+        self.cache.put(key, result)
+        return result, False
     
     def add_rule(self, rule: Rule) -> None:
-        """Add new rule"""
+        """Add new rule
+        
+        Raises ValueError if the rule's condition is not a valid regex.
+        """
+        self._compiled[rule.name] = (rule.condition, self._compile(rule))
         self.rules[rule.name] = rule
+        self._combined.clear()
+    
+    @staticmethod
+    def _compile(rule: Rule) -> re.Pattern:
+        try:
+            return re.compile(rule.condition, re.MULTILINE)
+        except re.error as e:
+            raise ValueError(f"Invalid pattern for rule {rule.name!r}: {e}") from e
+    
+    def _pattern(self, rule: Rule) -> re.Pattern:
+        """Compiled pattern for rule, recompiled if its condition was edited"""
+        condition, pattern = self._compiled.get(rule.name, (None, None))
+        if condition != rule.condition:
+            pattern = self._compile(rule)
+            self._compiled[rule.name] = (rule.condition, pattern)
+            self._combined.clear()
+        return pattern
+    
+    @staticmethod
+    def _combinable(pattern: re.Pattern) -> bool:
+        """Whether pattern keeps its meaning inside the combined alternation"""
+        if pattern.groupindex or pattern.flags & ~(re.MULTILINE | re.UNICODE):
+            # Named groups would clash; inline global flags such as (?i)
+            # are only valid at the start of the whole regex
+            return False
+        return not (pattern.groups and _BACKREFERENCE.search(pattern.pattern))
+    
+    def _combined_pattern(self, names: tuple[str, ...]) -> re.Pattern | None:
+        """One alternation regex with a named group per rule"""
+        if names not in self._combined:
+            if len(self._combined) >= COMBINED_CACHE_SIZE:
+                self._combined.clear()
+            alternation = "|".join(
+                f"(?P<r{idx}>{self._compiled[name][1].pattern})" for idx, name in enumerate(names)
+            )
+            try:
+                self._combined[names] = re.compile(alternation, re.MULTILINE)
+            except re.error:
+                self._combined[names] = None
+        return self._combined[names]
     
-    def check_code(self, code: str) -> list[dict]:
+    def scan(self, code: str, single_pass: bool = False) -> set[str]:
+        """Names of enabled rules that match anywhere in code
+        
+        By default each precompiled rule is searched separately, stopping at
+        its first match. That is usually fastest with CPython's re, because
+        literal prefixes such as "print(" keep their fast search path.
+        
+        With single_pass=True, combinable rules are matched with one
+        alternation regex that stops at the leftmost match of any rule. The
+        matched rule is dropped and the search resumes at the same position
+        with the rest. No remaining rule can match before that position, so
+        the input is traversed once.
+        """
+        matched: set[str] = set()
+        remaining: list[str] = []
+        for name, rule in self.rules.items():
+            if not rule.enabled:
+                continue
+            pattern = self._pattern(rule)
+            if single_pass and self._combinable(pattern):
+                remaining.append(name)
+            elif pattern.search(code):
+                matched.add(name)
+        
+        pos = 0
+        while remaining:
+            names = tuple(remaining)
+            combined = self._combined_pattern(names)
+            if combined is None:
+                matched.update(name for name in names if self._compiled[name][1].search(code, pos))
+                break
+            
+            m = combined.search(code, pos)
+            if m is None:
+                break
+            name = names[int(m.lastgroup[1:])]
+            matched.add(name)
+            remaining.remove(name)
+            pos = m.start()
+        
+        return matched
+    
+    def check_code(self, code: str, single_pass: bool = False) -> list[dict]:
         """Check code against all rules"""
+        return self._cached("check_code", None, code, lambda: self._check_code(code, single_pass))[0]
+    
+    def _check_code(self, code: str, single_pass: bool) -> list[dict]:
+        matched = self.scan(code, single_pass)
+        violations = [
+            {
+                "rule": rule_name,
+                "description": rule.description,
+                "action": rule.action,
+                "priority": rule.priority
+            }
+            for rule_name, rule in self.rules.items()
+            if rule_name in matched
+        ]
+        
+        return sorted(violations, key=lambda x: x["priority"], reverse=True)
+    
+    def check_code_locations(self, code: str, max_per_rule: int | None = 100) -> list[dict]:
+        """Check code against all rules, reporting every match with its span
+        
+        Returns at most max_per_rule violations per rule (None for no cap),
+        ordered by priority and then position. Lines and columns are 1-based;
+        end positions are exclusive.
+        """
+        return self._cached(
+            "check_code_locations", max_per_rule, code,
+            lambda: self._check_code_locations(code, max_per_rule)
+        )[0]
+    
+    def _check_code_locations(self, code: str, max_per_rule: int | None) -> list[dict]:
+        index = LineIndex(code)
         violations = []
         
-        import re
         for rule_name, rule in self.rules.items():
             if not rule.enabled:
                 continue
             
-            try:
-                if re.search(rule.condition, code, re.MULTILINE):
-                    violations.append({
-                        "rule": rule_name,
-                        "description": rule.description,
-                        "action": rule.action,
-                        "priority": rule.priority
-                    })
-            except re.error:
-                pass
+            for count, m in enumerate(self._pattern(rule).finditer(code)):
+                if max_per_rule is not None and count >= max_per_rule:
+                    break
+                line, column = index.position(m.start())
+                end_line, end_column = index.position(m.end())
+                violations.append({
+                    "rule": rule_name,
+                    "description": rule.description,
+                    "action": rule.action,
+                    "priority": rule.priority,
+                    "line": line,
+                    "column": column,
+                    "end_line": end_line,
+                    "end_column": end_column,
+                    "match": m.group(0)
+                })
         
-        return sorted(violations, key=lambda x: x["priority"], reverse=True)
+        return sorted(violations, key=lambda x: (-x["priority"], x["line"], x["column"]))
+    
+    def check_file(
+        self,
+        path: str | Path,
+        locations: bool = False,
+        max_file_size: int | None = MAX_FILE_SIZE
+    ) -> dict:
+        """Check one file, returning {"path", "violations", "error", "skipped", "cached"}
+        
+        With a result cache, files whose content and rule set are unchanged
+        are not re-checked ("cached": True).
+        """
+        result = {"path": str(path), "violations": [], "error": None, "skipped": None, "cached": False}
+        try:
+            if max_file_size is not None and os.stat(path).st_size > max_file_size:
+                result["skipped"] = "too_large"
+                return result
+            # One bulk read; the regexes need a decoded str either way
+            with open(path, "rb") as f:
+                code = f.read().decode("utf-8", errors="replace")
+        except OSError as e:
+            result["error"] = str(e)
+            return result
+        
+        if locations:
+            result["violations"], result["cached"] = self._cached(
+                "check_code_locations", 100, code, lambda: self._check_code_locations(code, 100)
+            )
+        else:
+            result["violations"], result["cached"] = self._cached(
+                "check_code", None, code, lambda: self._check_code(code, False)
+            )
+        return result
+    
+    def check_paths(
+        self,
+        paths: Iterable[str | Path],
+        workers: int | None = None,
+        locations: bool = False,
+        max_file_size: int | None = MAX_FILE_SIZE,
+        chunksize: int = 16
+    ) -> Iterator[dict]:
+        """Check many files on a process pool, yielding results in input order
+        
+        Regex matching is CPU-bound and holds the GIL, so files are spread
+        over worker processes (os.cpu_count() by default). With workers=1 they
+        are checked in this process. Workers' cache hits and misses are
+        recorded in this process's cache stats.
+        """
+        paths = [str(path) for path in paths]
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(paths) <= 1:
+            for path in paths:
+                yield self.check_file(path, locations, max_file_size)
+            return
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                list(self.rules.values()),
+                locations,
+                max_file_size,
+                (self.cache.path, self.cache.max_entries) if self.cache else None
+            )
+        ) as executor:
+            for result in executor.map(_check_file_worker, paths, chunksize=chunksize):
+                if self.cache is not None and result["error"] is None and result["skipped"] is None:
+                    self.cache.record(result["cached"])
+                yield result
+    
+    def check_tree(
+        self,
+        root: str | Path,
+        include: Iterable[str] = DEFAULT_INCLUDE,
+        exclude: Iterable[str] = DEFAULT_EXCLUDE,
+        **kwargs: Any
+    ) -> Iterator[dict]:
+        """Walk a directory and check every matching file (see check_paths)"""
+        return self.check_paths(iter_tree(root, include, exclude), **kwargs)
+
+def _matches(rel_path: str, patterns: tuple[str, ...]) -> bool:
+    name = rel_path.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+def iter_tree(
+    root: str | Path,
+    include: Iterable[str] = DEFAULT_INCLUDE,
+    exclude: Iterable[str] = DEFAULT_EXCLUDE
+) -> Iterator[str]:
+    """Files under root matching include globs and no exclude glob, in sorted order
+    
+    Globs match the path relative to root (with "/" separators) or the bare
+    name. Excluded directories are pruned without being walked.
+    """
+    include, exclude = tuple(include), tuple(exclude)
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+        dirnames[:] = sorted(d for d in dirnames if not _matches(prefix + d, exclude))
+        for name in sorted(filenames):
+            rel_path = prefix + name
+            if _matches(rel_path, include) and not _matches(rel_path, exclude):
+                yield os.path.join(dirpath, name)
+
+# Per-process state for check_paths workers
+_worker_engine: CursorRulesEngine | None = None
+_worker_options: tuple[bool, int | None] = (False, MAX_FILE_SIZE)
+
+def _init_worker(
+    rules: list[Rule],
+    locations: bool,
+    max_file_size: int | None,
+    cache_args: tuple[str, int] | None
+) -> None:
+    global _worker_engine, _worker_options
+    cache = ResultCache(*cache_args) if cache_args else None
+    _worker_engine = CursorRulesEngine.from_rules(rules, cache)
+    _worker_options = (locations, max_file_size)
 
+def _check_file_worker(path: str) -> dict:
+    return _worker_engine.check_file(path, *_worker_options)
@@ -3,14 +3,23 @@
 from __future__ import annotations
 from typing import Any
 from abc import ABC, abstractmethod
+import asyncio
 import re
 
+from agents.cursor.cache import ResultCache, fingerprint
+from agents.cursor.summary import CodeSummary, summarize
+
+# Parameter lists of 50+ characters get a "long_parameters" finding
+LONG_PARAMETERS = re.compile(r'def \w+\([^)]{50,}')
+
 class CursorSkill(ABC):
     """Base Cursor Skill"""
     
     name: str
     description: str
     pattern: str = ""
+    version: str = "1"  # Bump when output changes, to invalidate cached results
+    uses_summary: bool = False  # execute() accepts a shared CodeSummary
     
     @abstractmethod
     async def execute(self, code: str, context: dict) -> dict:
@@ -48,23 +57,40 @@ class RefactorSkill(CursorSkill):
     """Refactor code for quality"""
     name = "refactor"
     description = "Refactor code for better patterns"
+    version = "3"
+    uses_summary = True
     
-    async def execute(self, code: str, context: dict) -> dict:
-        patterns = self._detect_patterns(code)
+    async def execute(self, code: str, context: dict, summary: CodeSummary | None = None) -> dict:
+        summary = summary or summarize(code)
+        patterns = self._detect_patterns(code, summary)
         return {
             "refactored": True,
             "patterns_found": patterns,
             "suggestions": self._get_suggestions(patterns)
         }
     
-    def _detect_patterns(self, code: str) -> list[str]:
+    def _detect_patterns(self, code: str, summary: CodeSummary) -> list[str]:
         """Detect code patterns"""
+        if not summary.parsed:
+            return self._detect_patterns_text(code)
+        
+        patterns = []
+        if summary.loops_with_nesting:
+            patterns.append("nested_loops")
+        if summary.bare_excepts:
+            patterns.append("error_handling")
+        if LONG_PARAMETERS.search(code):
+            patterns.append("long_parameters")
+        return patterns
+    
+    def _detect_patterns_text(self, code: str) -> list[str]:
+        """Detect code patterns in code that does not parse"""
         patterns = []
         if "for " in code and "if " in code:
             patterns.append("nested_loops")
         if "try:" in code and "except:" in code:
             patterns.append("error_handling")
-        if re.search(r'def \w+\([^)]{50,}', code):
+        if LONG_PARAMETERS.search(code):
             patterns.append("long_parameters")
         return patterns
     
@@ -81,26 +107,42 @@ class DocumentSkill(CursorSkill):
     """Generate documentation"""
     name = "document"
     description = "Generate docstrings and comments"
+    version = "2"
+    uses_summary = True
     
-    async def execute(self, code: str, context: dict) -> dict:
+    async def execute(self, code: str, context: dict, summary: CodeSummary | None = None) -> dict:
+        summary = summary or summarize(code)
+        names = self._function_names(code, summary)
         return {
             "documented": True,
-            "docstring": self._generate_docstring(code),
-            "comments": self._generate_comments(code)
+            "docstring": self._generate_docstring(names[0]) if names else "",
+            "docstrings": {
+                f.name: self._generate_docstring(f.name)
+                for f in summary.functions if not f.has_docstring
+            },
+            "comments": self._generate_comments(code, summary)
         }
     
-    def _generate_docstring(self, code: str) -> str:
-        """Generate docstring"""
+    @staticmethod
+    def _function_names(code: str, summary: CodeSummary) -> list[str]:
+        if summary.parsed:
+            return [f.name for f in summary.functions]
         if "def " in code:
-            func_name = code.split("def ")[1].split("(")[0]
-            return f'"""{func_name}\\n    Automatically generated docstring.\\n    """'
-        return ""
+            return [code.split("def ")[1].split("(")[0]]
+        return []
+    
+    def _generate_docstring(self, func_name: str) -> str:
+        """Generate docstring"""
+        return f'"""{func_name}\\n    Automatically generated docstring.\\n    """'
     
-    def _generate_comments(self, code: str) -> list[str]:
+    def _generate_comments(self, code: str, summary: CodeSummary) -> list[str]:
         """Generate inline comments"""
-        lines = code.split("\n")
+        if summary.parsed:
+            lines = sorted(set(summary.assignments))
+            return [f"Line {lineno - 1}: # Assignment" for lineno in lines]
+        
         comments = []
-        for i, line in enumerate(lines):
+        for i, line in enumerate(code.split("\n")):
             if "=" in line and not line.strip().startswith("#"):
                 comments.append(f"Line {i}: # Assignment")
         return comments
@@ -109,21 +151,62 @@ class TestSkill(CursorSkill):
     """Generate tests"""
     name = "test"
     description = "Generate test cases"
+    version = "2"
+    uses_summary = True
     
-    async def execute(self, code: str, context: dict) -> dict:
+    async def execute(self, code: str, context: dict, summary: CodeSummary | None = None) -> dict:
+        summary = summary or summarize(code)
         return {
             "tests_generated": True,
-            "test_cases": self._generate_tests(code)
+            "test_cases": self._generate_tests(code, summary)
         }
     
-    def _generate_tests(self, code: str) -> list[dict]:
+    def _generate_tests(self, code: str, summary: CodeSummary) -> list[dict]:
         """Generate test cases"""
-        tests = []
-        if "def " in code:
-            func_name = code.split("def ")[1].split("(")[0]
-            tests.append({
-                "name": f"test_{func_name}",
-                "type": "unit"
-            })
-        return tests
+        if summary.parsed:
+            names = [f.name for f in summary.functions if not f.name.startswith("_")]
+        elif "def " in code:
+            names = [code.split("def ")[1].split("(")[0]]
+        else:
+            names = []
+        
+        return [{"name": f"test_{name}", "type": "unit"} for name in dict.fromkeys(names)]
 
+async def run_skill(
+    skill: CursorSkill,
+    code: str,
+    context: dict | None = None,
+    cache: ResultCache | None = None,
+    summary: CodeSummary | None = None
+) -> dict:
+    """Execute skill, reusing a cached result for unchanged code, context and skill version"""
+    context = context or {}
+    key = cache.key(fingerprint(skill.name, skill.version, context), code) if cache else None
+    if key is not None:
+        result = cache.get(key)
+        if result is not None:
+            return result
+    
+    if skill.uses_summary:
+        result = await skill.execute(code, context, summary=summary)
+    else:
+        result = await skill.execute(code, context)
+    
+    if key is not None:
+        cache.put(key, result)
+    return result
+
+class SkillPipeline:
+    """Run several skills on one file from a single shared parse"""
+    
+    def __init__(self, skills: list[CursorSkill] | None = None, cache: ResultCache | None = None):
+        self.skills = skills if skills is not None else [RefactorSkill(), DocumentSkill(), TestSkill()]
+        self.cache = cache
+    
+    async def run(self, code: str, context: dict | None = None) -> dict[str, dict]:
+        """Parse code once and run every skill on it concurrently"""
+        summary = summarize(code) if any(skill.uses_summary for skill in self.skills) else None
+        results = await asyncio.gather(*(
+            run_skill(skill, code, context, self.cache, summary) for skill in self.skills
+        ))
+        return {skill.name: result for skill, result in zip(self.skills, results)}
@@ -0,0 +1,119 @@
+"""Structural code summary shared by Cursor skills"""
+
+from __future__ import annotations
+import ast
+from dataclasses import dataclass, field
+
+@dataclass
+class FunctionInfo:
+    """Function or method found in the code"""
+    name: str
+    params: list[str]
+    lineno: int
+    is_async: bool = False
+    has_docstring: bool = False
+
+@dataclass
+class CodeSummary:
+    """Result of parsing a file once with ast"""
+    functions: list[FunctionInfo] = field(default_factory=list)
+    loops: list[int] = field(default_factory=list)  # line numbers
+    loops_with_nesting: list[int] = field(default_factory=list)  # loops containing a loop or if
+    try_blocks: list[int] = field(default_factory=list)
+    bare_excepts: list[int] = field(default_factory=list)
+    assignments: list[int] = field(default_factory=list)
+    syntax_error: str | None = None
+    
+    @property
+    def parsed(self) -> bool:
+        return self.syntax_error is None
+
+class _SummaryVisitor(ast.NodeVisitor):
+    def __init__(self, summary: CodeSummary):
+        self.summary = summary
+        # Indexes into summary.loops of the loops whose body is being visited, innermost last
+        self._open_loops: list[int] = []
+        self._nested: set[int] = set()
+    
+    def nested_loops(self) -> list[int]:
+        """Line numbers of loops whose body holds a loop or if, in source order"""
+        return [self.summary.loops[i] for i in sorted(self._nested)]
+    
+    def _mark_enclosing_loop(self) -> None:
+        # The innermost loop is enough: a loop marks the loops around it itself
+        if self._open_loops:
+            self._nested.add(self._open_loops[-1])
+    
+    def _visit_function(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        args = node.args
+        params = [a.arg for a in (*args.posonlyargs, *args.args, *args.kwonlyargs)]
+        if args.vararg:
+            params.append(f"*{args.vararg.arg}")
+        if args.kwarg:
+            params.append(f"**{args.kwarg.arg}")
+        self.summary.functions.append(FunctionInfo(
+            name=node.name,
+            params=params,
+            lineno=node.lineno,
+            is_async=isinstance(node, ast.AsyncFunctionDef),
+            has_docstring=ast.get_docstring(node) is not None
+        ))
+        self.generic_visit(node)
+    
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+    
+    def _visit_loop(self, node: ast.For | ast.AsyncFor | ast.While) -> None:
+        self._mark_enclosing_loop()
+        self.summary.loops.append(node.lineno)
+        # Like generic_visit, but with the loop open while its body is visited
+        for name, value in ast.iter_fields(node):
+            if name == "body":
+                self._open_loops.append(len(self.summary.loops) - 1)
+            for child in value if isinstance(value, list) else [value]:
+                if isinstance(child, ast.AST):
+                    self.visit(child)
+            if name == "body":
+                self._open_loops.pop()
+    
+    visit_For = _visit_loop
+    visit_AsyncFor = _visit_loop
+    visit_While = _visit_loop
+    
+    def visit_If(self, node: ast.If) -> None:
+        self._mark_enclosing_loop()
+        self.generic_visit(node)
+    
+    def visit_Try(self, node: ast.Try | ast.TryStar) -> None:
+        self.summary.try_blocks.append(node.lineno)
+        self.summary.bare_excepts.extend(h.lineno for h in node.handlers if h.type is None)
+        self.generic_visit(node)
+    
+    visit_TryStar = visit_Try
+    
+    def _visit_assign(self, node: ast.Assign | ast.AugAssign | ast.AnnAssign) -> None:
+        self.summary.assignments.append(node.lineno)
+        self.generic_visit(node)
+    
+    visit_Assign = _visit_assign
+    visit_AugAssign = _visit_assign
+    visit_AnnAssign = _visit_assign
+
+def summarize(code: str) -> CodeSummary:
+    """Parse code once into a CodeSummary
+    
+    Code that does not parse as Python gets an empty summary with
+    syntax_error set, and skills fall back to their text heuristics.
+    """
+    summary = CodeSummary()
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError) as e:
+        summary.syntax_error = str(e)
+        return summary
+    
+    visitor = _SummaryVisitor(summary)
+    visitor.visit(tree)
+    summary.loops_with_nesting = visitor.nested_loops()
+    summary.functions.sort(key=lambda f: f.lineno)
+    return summary
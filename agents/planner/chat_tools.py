@@ -0,0 +1,214 @@
+"""
+Chat tools
+Task operations the model can call from TaskPlannerAgent.chat
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from agents.planner.planner_agent import Task, TaskPlannerAgent
+
+logger = logging.getLogger(__name__)
+
+# Result size limits, to keep tool results (and the next prompt) small
+MAX_LISTED_TASKS = 50
+MAX_REPORT_CHARS = 20_000
+
+CHAT_TOOLS: list[dict] = [
+    {
+        "name": "create_task",
+        "description": "Create a task.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "description": {"type": "string"},
+                "priority": {"type": "string", "enum": ["low", "medium", "high", "critical"]},
+                "due_date": {"type": "string", "description": "ISO 8601 date"},
+                "tags": {"type": "array", "items": {"type": "string"}},
+                "estimated_hours": {"type": "number"}
+            },
+            "required": ["title"]
+        }
+    },
+    {
+        "name": "update_task_status",
+        "description": "Set the status of a task.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string"},
+                "status": {
+                    "type": "string",
+                    "enum": ["pending", "in_progress", "completed", "failed", "blocked"]
+                }
+            },
+            "required": ["task_id", "status"]
+        }
+    },
+    {
+        "name": "complete_task",
+        "description": "Mark a task as completed.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string"},
+                "actual_hours": {"type": "number"}
+            },
+            "required": ["task_id"]
+        }
+    },
+    {
+        "name": "list_tasks_by_pattern",
+        "description": (
+            f"List tasks whose title or description matches a glob pattern such as "
+            f"'*login*' (case-insensitive), optionally filtered by status. Returns at most "
+            f"{MAX_LISTED_TASKS} tasks."
+        ),
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "pattern": {"type": "string"},
+                "status": {
+                    "type": "string",
+                    "enum": ["pending", "in_progress", "completed", "failed", "blocked"]
+                }
+            }
+        }
+    },
+    {
+        "name": "generate_markdown_report",
+        "description": "Markdown report of all tasks, or of one plan's tasks.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "plan_id": {"type": "string"}
+            }
+        }
+    }
+]
+
+CHAT_TOOLS_PROMPT = """
+
+Use the tools to act on tasks rather than describing what to do. Request all
+tool calls you need for the user's message in a single response, so they run
+together; only wait for results when a call depends on an earlier one."""
+
+# Tools that only read storage; within a turn they run after the writes
+READ_ONLY_TOOLS = frozenset({"list_tasks_by_pattern", "generate_markdown_report"})
+
+def _task_summary(task: Task) -> dict:
+    return {
+        "id": task.id,
+        "title": task.title,
+        "status": task.status.value,
+        "priority": task.priority.value,
+        "due_date": task.due_date,
+        "tags": task.tags
+    }
+
+class ChatToolRunner:
+    """Runs the model's tool calls against an agent's task operations"""
+    
+    def __init__(self, agent: TaskPlannerAgent):
+        self.agent = agent
+        self._handlers = {
+            "create_task": self._create_task,
+            "update_task_status": self._update_task_status,
+            "complete_task": self._complete_task,
+            "list_tasks_by_pattern": self._list_tasks_by_pattern,
+            "generate_markdown_report": self._generate_markdown_report
+        }
+    
+    async def run(self, name: str, args: dict) -> Any:
+        """Result of one tool call; raises on unknown tools and failed operations"""
+        handler = self._handlers.get(name)
+        if handler is None:
+            raise ValueError(f"Unknown tool: {name}")
+        return await handler(**args)
+    
+    async def run_all(self, calls: list[Any]) -> list[dict]:
+        """tool_result blocks for a turn's tool_use blocks, in call order
+        
+        Independent calls run concurrently: writes to different tasks run in
+        parallel, writes to the same task run in the order requested, and
+        reads run once the turn's writes are done.
+        """
+        results: dict[str, dict] = {}
+        
+        async def run_lane(lane: list[Any]) -> None:
+            for call in lane:
+                results[call.id] = await self._tool_result(call)
+        
+        lanes: dict[str, list[Any]] = {}
+        reads = []
+        for call in calls:
+            if call.name in READ_ONLY_TOOLS:
+                reads.append(call)
+            else:
+                lanes.setdefault(call.input.get("task_id") or call.id, []).append(call)
+        
+        await asyncio.gather(*(run_lane(lane) for lane in lanes.values()))
+        await asyncio.gather(*(run_lane([call]) for call in reads))
+        return [results[call.id] for call in calls]
+    
+    async def _tool_result(self, call: Any) -> dict:
+        try:
+            result = await self.run(call.name, call.input)
+        except Exception as e:
+            logger.warning(f"Chat tool {call.name} failed: {e}")
+            return {"type": "tool_result", "tool_use_id": call.id, "content": str(e), "is_error": True}
+        
+        content = result if isinstance(result, str) else json.dumps(result, default=str)
+        return {"type": "tool_result", "tool_use_id": call.id, "content": content}
+    
+    async def _create_task(
+        self,
+        title: str,
+        description: str = "",
+        priority: str = "medium",
+        due_date: str | None = None,
+        tags: list[str] | None = None,
+        estimated_hours: float | None = None
+    ) -> dict:
+        task = await self.agent.create_task(
+            title=title,
+            description=description,
+            priority=priority,
+            due_date=due_date,
+            tags=tags,
+            estimated_hours=estimated_hours
+        )
+        return _task_summary(task)
+    
+    async def _update_task_status(self, task_id: str, status: str) -> dict:
+        from agents.planner.planner_agent import TaskStatus
+        
+        TaskStatus(status)  # raises ValueError for invalid values
+        task = await self.agent.update_task_status(task_id, status)
+        if task is None:
+            raise ValueError(f"Task not found: {task_id}")
+        return _task_summary(task)
+    
+    async def _complete_task(self, task_id: str, actual_hours: float | None = None) -> dict:
+        task = await self.agent.complete_task(task_id, actual_hours)
+        if task is None:
+            raise ValueError(f"Task not found: {task_id}")
+        return _task_summary(task)
+    
+    async def _list_tasks_by_pattern(self, pattern: str | None = None, status: str | None = None) -> dict:
+        tasks = await self.agent.list_tasks_by_pattern(pattern, status)
+        return {
+            "total": len(tasks),
+            "tasks": [_task_summary(task) for task in tasks[:MAX_LISTED_TASKS]]
+        }
+    
+    async def _generate_markdown_report(self, plan_id: str | None = None) -> str:
+        report = await self.agent.generate_markdown_report(plan_id)
+        if len(report) > MAX_REPORT_CHARS:
+            report = report[:MAX_REPORT_CHARS] + "\n\n[report truncated]"
+        return report
@@ -0,0 +1,123 @@
+"""
+Conversation history for chat sessions
+Per-session, token-budgeted, with LRU/TTL eviction of idle sessions
+"""
+
+from __future__ import annotations
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+@dataclass
+class Message:
+    """Chat message with its token count computed once"""
+    role: str
+    content: str
+    tokens: int
+    
+    def to_dict(self) -> dict:
+        return {"role": self.role, "content": self.content}
+
+@dataclass
+class ConversationSession:
+    """History of one chat session"""
+    session_id: str
+    messages: deque[Message] = field(default_factory=deque)
+    total_tokens: int = 0
+    summary: str = ""  # summary of turns dropped from the window
+    last_used: float = field(default_factory=time.monotonic)
+    
+    def to_messages(self) -> list[dict]:
+        return [message.to_dict() for message in self.messages]
+
+class ConversationStore:
+    """Chat sessions by ID
+    
+    Each session keeps only as many recent turns as fit in token_budget. Older
+    turns are dropped, or folded into session.summary when a summarizer is
+    given. Sessions idle longer than ttl seconds, or beyond max_sessions
+    (least recently used first), are evicted.
+    """
+    
+    def __init__(
+        self,
+        token_budget: int = 8000,
+        max_sessions: int = 1000,
+        ttl: float = 3600.0,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        summarizer: Callable[[str, list[Message]], str] | None = None
+    ):
+        self.token_budget = token_budget
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.count_tokens = count_tokens
+        self.summarizer = summarizer
+        self._sessions: OrderedDict[str, ConversationSession] = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def get(self, session_id: str) -> ConversationSession:
+        """Session by ID, created on first use"""
+        now = time.monotonic()
+        self._evict(now)
+        
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = ConversationSession(session_id)
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                logger.debug(f"Evicted chat session {evicted} (LRU)")
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_used = now
+        return session
+    
+    def drop(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+    
+    def message(self, role: str, content: str) -> Message:
+        """Build message with its token count"""
+        return Message(role, content, self.count_tokens(content))
+    
+    def append(self, session: ConversationSession, *messages: Message) -> None:
+        """Commit messages to a session and trim it to the token budget"""
+        for message in messages:
+            session.messages.append(message)
+            session.total_tokens += message.tokens
+        self._trim(session)
+    
+    def _trim(self, session: ConversationSession) -> None:
+        dropped: list[Message] = []
+        # Always keep the latest exchange, even if it alone exceeds the budget
+        while session.total_tokens > self.token_budget and len(session.messages) > 2:
+            dropped.append(self._pop_oldest(session))
+            # The Messages API expects the history to start with a user turn
+            while session.messages and session.messages[0].role != "user":
+                dropped.append(self._pop_oldest(session))
+        
+        if dropped and self.summarizer is not None:
+            session.summary = self.summarizer(session.summary, dropped)
+    
+    @staticmethod
+    def _pop_oldest(session: ConversationSession) -> Message:
+        message = session.messages.popleft()
+        session.total_tokens -= message.tokens
+        return message
+    
+    def _evict(self, now: float) -> None:
+        """Drop sessions idle longer than the TTL (oldest first)"""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.ttl:
+                break
+            del self._sessions[session_id]
+            logger.debug(f"Evicted chat session {session_id} (idle)")
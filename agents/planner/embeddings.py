@@ -0,0 +1,118 @@
+"""
+Text embedders for semantic task search
+Backends for the configured EmbeddingConfig / LocalModelConfig, plus a deterministic local stand-in
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import Literal
+
+import numpy as np
+
+from agents.config.model import EmbeddingConfig, EmbeddingProvider, LLMConfig, LocalModelConfig
+
+InputType = Literal["document", "query"]
+
+_TOKEN_RE = re.compile(r"\w+")
+
+class Embedder(ABC):
+    """Maps texts to float32 vectors of a fixed dimension"""
+    
+    dimension: int
+    
+    @abstractmethod
+    async def embed(self, texts: list[str], input_type: InputType = "document") -> np.ndarray:
+        """Array of shape (len(texts), dimension)"""
+
+class HashingEmbedder(Embedder):
+    """Deterministic local embedder for tests and offline use
+    
+    Hashes words and their character trigrams into a fixed number of signed
+    buckets, so texts sharing words or word fragments get similar vectors.
+    Needs no model or network.
+    """
+    
+    def __init__(self, dimension: int = EmbeddingConfig.dimension):
+        self.dimension = dimension
+    
+    def _features(self, text: str) -> list[int]:
+        features = []
+        for word in _TOKEN_RE.findall(text.lower()):
+            features.append(zlib.crc32(word.encode()))
+            padded = f" {word} "
+            features.extend(zlib.crc32(padded[i:i + 3].encode()) for i in range(len(padded) - 2))
+        return features
+    
+    async def embed(self, texts: list[str], input_type: InputType = "document") -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.array(self._features(text), dtype=np.uint64)
+            if hashes.size:
+                signs = np.where(hashes & (1 << 31), -1.0, 1.0).astype(np.float32)
+                np.add.at(vectors[row], hashes % self.dimension, signs)
+        return vectors
+
+class BedrockEmbedder(Embedder):
+    """Cohere embedding models on AWS Bedrock (needs boto3)"""
+    
+    # Cohere embed accepts at most 96 texts per request
+    max_batch = 96
+    
+    def __init__(self, config: EmbeddingConfig | None = None, region: str = LLMConfig.region):
+        try:
+            import boto3
+        except ImportError as e:
+            raise ImportError("BedrockEmbedder needs boto3 (pip install boto3)") from e
+        self.config = config or EmbeddingConfig()
+        self.dimension = self.config.dimension
+        self._client = boto3.client("bedrock-runtime", region_name=region)
+    
+    def _invoke(self, texts: list[str], input_type: InputType) -> list[list[float]]:
+        response = self._client.invoke_model(
+            modelId=self.config.model_id,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps({
+                "texts": texts,
+                "input_type": "search_query" if input_type == "query" else "search_document",
+                "truncate": "END"
+            })
+        )
+        return json.loads(response["body"].read())["embeddings"]
+    
+    async def embed(self, texts: list[str], input_type: InputType = "document") -> np.ndarray:
+        batches = [texts[i:i + self.max_batch] for i in range(0, len(texts), self.max_batch)]
+        results = await asyncio.gather(*(asyncio.to_thread(self._invoke, batch, input_type) for batch in batches))
+        return np.asarray([vector for result in results for vector in result], dtype=np.float32)
+
+class LocalEmbedder(Embedder):
+    """sentence-transformers model from LocalModelConfig (needs sentence-transformers)"""
+    
+    def __init__(self, config: LocalModelConfig | None = None):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("LocalEmbedder needs sentence-transformers (pip install sentence-transformers)") from e
+        self.config = config or LocalModelConfig()
+        self._model = SentenceTransformer(self.config.model_name, device=self.config.device)
+        self.dimension = self._model.get_sentence_embedding_dimension()
+    
+    async def embed(self, texts: list[str], input_type: InputType = "document") -> np.ndarray:
+        vectors = await asyncio.to_thread(self._model.encode, texts, convert_to_numpy=True)
+        return vectors.astype(np.float32, copy=False)
+
+def embedder_from_config(
+    config: EmbeddingConfig | None = None,
+    local: LocalModelConfig | None = None
+) -> Embedder:
+    """Embedder for a provider configuration"""
+    config = config or EmbeddingConfig()
+    if config.provider == EmbeddingProvider.COHERE:
+        return BedrockEmbedder(config)
+    if config.provider == EmbeddingProvider.HUGGINGFACE:
+        return LocalEmbedder(local)
+    raise ValueError(f"Unsupported embedding provider: {config.provider.value}")
@@ -0,0 +1,163 @@
+"""
+Task ID generators
+Sortable, monotonic, collision-free IDs for tasks and plans
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+# Crockford base32: digits sort before letters in ASCII, so fixed-width
+# encodings compare lexicographically in numeric order
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: value for value, char in enumerate(_ALPHABET)}
+
+def _encode(value: int, width: int) -> str:
+    """Encode integer as fixed-width Crockford base32"""
+    chars = []
+    for _ in range(width):
+        value, rem = divmod(value, 32)
+        chars.append(_ALPHABET[rem])
+    return "".join(reversed(chars))
+
+def _decode(text: str) -> int:
+    """Decode Crockford base32 string"""
+    value = 0
+    for char in text.upper():
+        value = value * 32 + _DECODE[char]
+    return value
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+def _to_ms(when: datetime) -> int:
+    if when.tzinfo is None:
+        when = when.astimezone()
+    return int(when.timestamp() * 1000)
+
+def stable_id(prefix: str, key: str, length: int = 16) -> str:
+    """Deterministic ID for a key, identical across processes
+    
+    Unlike hash(), this does not depend on PYTHONHASHSEED.
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=10).digest()
+    return f"{prefix}-{_encode(int.from_bytes(digest, 'big'), length)}"
+
+class IdGenerator(ABC):
+    """Base ID generator
+    
+    IDs are "<prefix>-<fixed-width body>", and bodies sort in generation
+    order, so IDs from one generator and prefix can be range-scanned by time.
+    """
+    
+    width: int
+    
+    @abstractmethod
+    def _next(self) -> int:
+        """Next raw integer ID"""
+    
+    @abstractmethod
+    def _timestamp_ms(self, value: int) -> int:
+        """Millisecond timestamp encoded in a raw ID"""
+    
+    @abstractmethod
+    def _lower_bound(self, ms: int) -> int:
+        """Smallest raw ID for a millisecond timestamp"""
+    
+    def new_id(self, prefix: str = "task") -> str:
+        """Generate a new ID"""
+        return f"{prefix}-{_encode(self._next(), self.width)}"
+    
+    def timestamp(self, id_: str) -> datetime:
+        """Creation time encoded in an ID"""
+        body = id_.rsplit("-", 1)[-1]
+        return datetime.fromtimestamp(self._timestamp_ms(_decode(body)) / 1000, tz=timezone.utc)
+    
+    def bound(self, when: datetime, prefix: str = "task") -> str:
+        """Smallest possible ID generated at or after a point in time"""
+        return f"{prefix}-{_encode(self._lower_bound(_to_ms(when)), self.width)}"
+
+class UlidGenerator(IdGenerator):
+    """ULID: 48-bit millisecond timestamp + 80 random bits
+    
+    Monotonic within a process: IDs generated in the same millisecond
+    increment the random part instead of drawing new randomness.
+    """
+    
+    width = 26
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_rand = 0
+    
+    def _next(self) -> int:
+        ms = _now_ms()
+        with self._lock:
+            if ms <= self._last_ms:
+                ms = self._last_ms
+                rand = self._last_rand + 1
+                if rand >= 1 << 80:
+                    ms += 1
+                    rand = secrets.randbits(79)
+            else:
+                # Leave headroom so same-millisecond increments rarely overflow
+                rand = secrets.randbits(79)
+            self._last_ms, self._last_rand = ms, rand
+        return (ms << 80) | rand
+    
+    def _timestamp_ms(self, value: int) -> int:
+        return value >> 80
+    
+    def _lower_bound(self, ms: int) -> int:
+        return ms << 80
+
+class SnowflakeGenerator(IdGenerator):
+    """Snowflake: 41-bit millisecond timestamp, 10-bit node ID, 12-bit sequence
+    
+    Node IDs must be unique per process across a deployment. They default
+    to the TASK_NODE_ID environment variable.
+    """
+    
+    width = 13
+    EPOCH_MS = 1_704_067_200_000  # 2024-01-01T00:00:00Z
+    NODE_BITS = 10
+    SEQUENCE_BITS = 12
+    
+    def __init__(self, node_id: int | None = None):
+        if node_id is None:
+            node_id = int(os.environ.get("TASK_NODE_ID", "0"))
+        if not 0 <= node_id < 1 << self.NODE_BITS:
+            raise ValueError(f"node_id must be in [0, {1 << self.NODE_BITS})")
+        self.node_id = node_id
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+    
+    def _next(self) -> int:
+        ms = _now_ms() - self.EPOCH_MS
+        with self._lock:
+            if ms <= self._last_ms:
+                # Same millisecond or clock moved back: stay on the last
+                # timestamp and borrow the next one when the sequence runs out
+                ms = self._last_ms
+                self._sequence += 1
+                if self._sequence >= 1 << self.SEQUENCE_BITS:
+                    ms += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = ms
+            sequence = self._sequence
+        return (ms << (self.NODE_BITS + self.SEQUENCE_BITS)) | (self.node_id << self.SEQUENCE_BITS) | sequence
+    
+    def _timestamp_ms(self, value: int) -> int:
+        return (value >> (self.NODE_BITS + self.SEQUENCE_BITS)) + self.EPOCH_MS
+    
+    def _lower_bound(self, ms: int) -> int:
+        return max(ms - self.EPOCH_MS, 0) << (self.NODE_BITS + self.SEQUENCE_BITS)
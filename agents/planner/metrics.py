@@ -0,0 +1,89 @@
+"""Latency and usage metrics for LLM calls"""
+
+from __future__ import annotations
+from collections import deque
+from statistics import quantiles
+from typing import Any
+
+# Latency samples kept for percentiles
+METRICS_WINDOW = 1024
+
+# Prompt cache pricing relative to uncached input tokens
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+def _percentiles(samples: deque[float]) -> dict:
+    if not samples:
+        return {"avg_ms": None, "p50_ms": None, "p95_ms": None}
+    values = sorted(samples)
+    cuts = quantiles(values, n=20, method="inclusive") if len(values) > 1 else values * 19
+    return {
+        "avg_ms": round(sum(values) / len(values) * 1000, 2),
+        "p50_ms": round(cuts[9] * 1000, 2),
+        "p95_ms": round(cuts[18] * 1000, 2)
+    }
+
+class ChatMetrics:
+    """Counters and recent latencies of chat calls
+    
+    time_to_first_token is the delay until the first text delta for streamed
+    calls, and until the full reply for non-streamed ones. Token usage is
+    summed over API responses; memo hits are replies served locally.
+    """
+    
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.calls = 0
+        self.streamed = 0
+        self.errors = 0
+        self.memo_hits = 0
+        self.usage = dict.fromkeys(USAGE_FIELDS, 0)
+        self.time_to_first_token: deque[float] = deque(maxlen=window)
+        self.duration: deque[float] = deque(maxlen=window)
+    
+    def record(self, ttft: float | None, duration: float, streamed: bool = False) -> None:
+        """Record a finished call (ttft is None if no text arrived)"""
+        self.calls += 1
+        self.streamed += streamed
+        if ttft is not None:
+            self.time_to_first_token.append(ttft)
+        self.duration.append(duration)
+    
+    def record_error(self) -> None:
+        self.errors += 1
+    
+    def record_memo_hit(self) -> None:
+        self.memo_hits += 1
+    
+    def record_usage(self, usage: Any) -> None:
+        """Add token counts of an API response's usage"""
+        for name in USAGE_FIELDS:
+            self.usage[name] += getattr(usage, name, None) or 0
+    
+    def prompt_cache_stats(self) -> dict:
+        """Prompt cache hit rate and input cost saved versus no caching"""
+        uncached = self.usage["input_tokens"]
+        written = self.usage["cache_creation_input_tokens"]
+        read = self.usage["cache_read_input_tokens"]
+        total = uncached + written + read
+        billed = uncached + written * CACHE_WRITE_MULTIPLIER + read * CACHE_READ_MULTIPLIER
+        return {
+            "read_ratio": read / total if total else 0.0,
+            "input_cost_saved": 1 - billed / total if total else 0.0
+        }
+    
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "streamed": self.streamed,
+            "errors": self.errors,
+            "memo_hits": self.memo_hits,
+            # Each memo hit saves about one average API call
+            "memo_seconds_saved": round(self.memo_hits * sum(self.duration) / len(self.duration), 3)
+            if self.duration else 0.0,
+            "usage": dict(self.usage),
+            "prompt_cache": self.prompt_cache_stats(),
+            "time_to_first_token": _percentiles(self.time_to_first_token),
+            "duration": _percentiles(self.duration)
+        }
@@ -5,18 +5,88 @@ Python 3.13+ with async/await and type hints
 
 from __future__ import annotations
 import asyncio
+import bisect
+import heapq
 import json
 import logging
-from typing import Any
+import random
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable
+from collections import Counter, defaultdict
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from enum import Enum
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field
 from pathlib import Path
-import glob as glob_module
-from anthropic import Anthropic
+from anthropic import APIConnectionError, APIStatusError, AsyncAnthropic
+
+from agents.planner import serialization
+from agents.planner.chat_tools import CHAT_TOOLS, CHAT_TOOLS_PROMPT, ChatToolRunner
+from agents.planner.conversation import ConversationSession, ConversationStore, Message
+from agents.planner.ids import IdGenerator, UlidGenerator, stable_id
+from agents.planner.metrics import ChatMetrics
+from agents.planner.report_cache import ReportCache
+from agents.planner.response_memo import ResponseMemo
+from agents.planner.scheduler import ScheduleAnalysis, TaskScheduler
+from agents.planner.search_index import TaskSearchIndex
+
+if TYPE_CHECKING:
+    from agents.planner.semantic_search import SemanticIndex
 
 logger = logging.getLogger(__name__)
 
+# Tasks rendered per chunk when streaming markdown reports
+REPORT_CHUNK_TASKS = 256
+
+# LLM client defaults
+LLM_MAX_CONCURRENCY = 8
+LLM_TIMEOUT = 60.0
+LLM_MAX_RETRIES = 3
+LLM_RETRY_BASE_DELAY = 0.5
+LLM_RETRY_MAX_DELAY = 8.0
+
+# Chat defaults
+DEFAULT_CHAT_SESSION = "default"
+PROMPT_CACHE_CONTROL = {"type": "ephemeral"}
+CHAT_MAX_TOOL_TURNS = 4
+CHAT_SYSTEM_PROMPT = """You are a task planning assistant. Help users manage their tasks.
+You can:
+- Create tasks with descriptions and priorities
+- Update task status (pending, in_progress, completed, failed)
+- Generate task reports
+- Organize tasks by priority and due date
+
+Respond in a helpful, structured way. When suggesting tasks, include estimated effort."""
+
+# Status codes worth retrying: timeout, conflict, rate limit, 5xx (incl. 529 overloaded)
+_RETRYABLE_STATUS = frozenset({408, 409, 429})
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in _RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+_shared_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncAnthropic] = weakref.WeakKeyDictionary()
+_shared_clients_lock = threading.Lock()
+
+def shared_anthropic_client() -> AsyncAnthropic:
+    """Async client shared by the agents on the running event loop
+    
+    A client's HTTP connection pool belongs to the loop it was first used
+    on, so each loop (e.g. the webhook loop and a job queue's) gets its own.
+    SDK retries are disabled; TaskPlannerAgent retries with jittered backoff.
+    """
+    loop = asyncio.get_running_loop()
+    with _shared_clients_lock:
+        client = _shared_clients.get(loop)
+        if client is None:
+            client = _shared_clients[loop] = AsyncAnthropic(timeout=LLM_TIMEOUT, max_retries=0)
+    return client
+
 class TaskStatus(str, Enum):
     """Task status types"""
     PENDING = "pending"
@@ -32,6 +102,22 @@ class TaskPriority(str, Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+# Priority order for listings and scheduling (the .value strings sort alphabetically)
+PRIORITY_RANK = {
+    TaskPriority.LOW: 0,
+    TaskPriority.MEDIUM: 1,
+    TaskPriority.HIGH: 2,
+    TaskPriority.CRITICAL: 3,
+}
+
+# Status sections rendered in markdown reports, in order
+REPORT_STATUS_ORDER = (
+    TaskStatus.IN_PROGRESS,
+    TaskStatus.PENDING,
+    TaskStatus.COMPLETED,
+    TaskStatus.FAILED,
+)
+
 @dataclass
 class Task:
     """Task data model"""
@@ -55,19 +141,12 @@ class Task:
     
     def to_dict(self) -> dict:
         """Convert to dictionary"""
-        data = asdict(self)
-        data['status'] = self.status.value
-        data['priority'] = self.priority.value
-        data['subtasks'] = [st.to_dict() for st in self.subtasks]
-        return data
+        return serialization.to_dict(self)
     
     @classmethod
     def from_dict(cls, data: dict) -> Task:
-        """Create from dictionary"""
-        data['status'] = TaskStatus(data.get('status', 'pending'))
-        data['priority'] = TaskPriority(data.get('priority', 'medium'))
-        data['subtasks'] = [cls.from_dict(st) for st in data.get('subtasks', [])]
-        return cls(**data)
+        """Create from dictionary (data is not modified)"""
+        return serialization.from_dict(cls, data)
 
 @dataclass
 class TaskPlan:
@@ -83,49 +162,257 @@ class TaskPlan:
     
     def to_dict(self) -> dict:
         """Convert to dictionary"""
-        data = asdict(self)
-        data['tasks'] = [t.to_dict() for t in self.tasks]
-        data['status'] = self.status.value
-        return data
+        return serialization.to_dict(self)
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> TaskPlan:
+        """Create from dictionary (data is not modified)"""
+        return serialization.from_dict(cls, data)
+
+@dataclass
+class BulkResult:
+    """Per-item outcome of a bulk operation"""
+    index: int
+    task: Task | None = None
+    error: str | None = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+    
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        if self.ok:
+            return {'index': self.index, 'status': 'success', 'task': self.task.to_dict()}
+        return {'index': self.index, 'status': 'error', 'error': self.error}
 
-class TaskStorage:
-    """In-memory task storage"""
+class StorageListeners:
+    """Mutation listener hook for task storages
+    
+    Listeners are called as callback(event, payload) with
+    ('task.saved', Task), ('task.deleted', task_id) or ('plan.saved', TaskPlan).
+    Saving a plan also saves its tasks: each gets 'task.saved' before the
+    'plan.saved' event.
+    """
+    
+    _listeners: list[Callable[[str, Any], None]]
+    
+    def add_listener(self, callback: Callable[[str, Any], None]) -> None:
+        """Register mutation listener"""
+        self._listeners.append(callback)
+    
+    def _notify(self, event: str, payload: Any) -> None:
+        for callback in self._listeners:
+            try:
+                callback(event, payload)
+            except Exception as e:
+                logger.error(f"Storage listener failed on {event}: {e}")
+
+class TaskStorage(StorageListeners):
+    """In-memory task storage with incremental secondary indexes
+    
+    Index updates and listings hold a lock, so server threads (each with
+    its own event loop) can share one storage. Listeners are notified
+    outside the lock.
+    """
     
     def __init__(self):
         self.plans: dict[str, TaskPlan] = {}
         self.tasks: dict[str, Task] = {}
+        self._listeners = []
+        self._lock = threading.RLock()
+        
+        # Secondary indexes, kept in sync by save_task/delete_task
+        self._by_status: dict[TaskStatus, set[str]] = defaultdict(set)
+        self._by_priority: dict[TaskPriority, set[str]] = defaultdict(set)
+        self._by_tag: dict[str, set[str]] = defaultdict(set)
+        self._by_assignee: dict[str, set[str]] = defaultdict(set)
+        self._order: list[tuple[int, str, str]] = []
+        self._ids: list[str] = []
+        self._indexed: dict[str, tuple] = {}
+    
+    @staticmethod
+    def _order_key(task: Task) -> tuple[int, str, str]:
+        """Sort key for the (priority, created_at) listing order"""
+        return (PRIORITY_RANK[task.priority], task.created_at, task.id)
+    
+    def _index_entry(self, task: Task) -> tuple:
+        """Snapshot of the indexed fields of a task"""
+        return (
+            task.status,
+            task.priority,
+            frozenset(task.tags),
+            task.assigned_to,
+            self._order_key(task)
+        )
+    
+    @staticmethod
+    def _discard(index: dict[Any, set[str]], key: Any, task_id: str) -> None:
+        """Remove task ID from an index bucket, dropping empty buckets"""
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.discard(task_id)
+        if not bucket:
+            del index[key]
+    
+    def _unindex(self, task_id: str, keep_id: bool = False) -> None:
+        """Remove task from all secondary indexes"""
+        entry = self._indexed.pop(task_id, None)
+        if entry is None:
+            return
+        if not keep_id:
+            pos = bisect.bisect_left(self._ids, task_id)
+            if pos < len(self._ids) and self._ids[pos] == task_id:
+                del self._ids[pos]
+        status, priority, tags, assigned_to, order_key = entry
+        self._discard(self._by_status, status, task_id)
+        self._discard(self._by_priority, priority, task_id)
+        for tag in tags:
+            self._discard(self._by_tag, tag, task_id)
+        if assigned_to is not None:
+            self._discard(self._by_assignee, assigned_to, task_id)
+        pos = bisect.bisect_left(self._order, order_key)
+        if pos < len(self._order) and self._order[pos] == order_key:
+            del self._order[pos]
+    
+    def _index(self, task: Task) -> None:
+        """Add or refresh task in the secondary indexes"""
+        entry = self._index_entry(task)
+        previous = self._indexed.get(task.id)
+        if previous == entry:
+            return
+        if previous is None:
+            bisect.insort(self._ids, task.id)
+        else:
+            self._unindex(task.id, keep_id=True)
+        status, priority, tags, assigned_to, order_key = entry
+        self._by_status[status].add(task.id)
+        self._by_priority[priority].add(task.id)
+        for tag in tags:
+            self._by_tag[tag].add(task.id)
+        if assigned_to is not None:
+            self._by_assignee[assigned_to].add(task.id)
+        bisect.insort(self._order, order_key)
+        self._indexed[task.id] = entry
     
     async def save_task(self, task: Task) -> None:
         """Save task"""
-        self.tasks[task.id] = task
-        task.updated_at = datetime.now().isoformat()
+        with self._lock:
+            self.tasks[task.id] = task
+            task.updated_at = datetime.now().isoformat()
+            self._index(task)
+        self._notify('task.saved', task)
+    
+    async def save_tasks(self, tasks: list[Task]) -> None:
+        """Save many tasks in one operation"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            for task in tasks:
+                self.tasks[task.id] = task
+                task.updated_at = now
+                self._index(task)
+        for task in tasks:
+            self._notify('task.saved', task)
+    
+    async def set_statuses_if(self, changes: dict[str, tuple[TaskStatus, TaskStatus]]) -> list[Task]:
+        """Move tasks from an expected status to a new one; returns the tasks updated
+        
+        Tasks whose status changed since the caller looked are left alone;
+        tasks already in the new status count as updated.
+        """
+        now = datetime.now().isoformat()
+        changed = []
+        with self._lock:
+            for task_id, (expected, status) in changes.items():
+                task = self.tasks.get(task_id)
+                if task is None or task.status not in (expected, status):
+                    continue
+                task.status = status
+                task.updated_at = now
+                self._index(task)
+                changed.append(task)
+        for task in changed:
+            self._notify('task.saved', task)
+        return changed
     
     async def get_task(self, task_id: str) -> Task | None:
         """Get task by ID"""
         return self.tasks.get(task_id)
     
-    async def list_tasks(self, status: TaskStatus | None = None, priority: TaskPriority | None = None) -> list[Task]:
-        """List tasks with filters"""
-        tasks = list(self.tasks.values())
+    async def get_tasks(self, task_ids: list[str]) -> list[Task | None]:
+        """Get many tasks by ID, None for missing ones"""
+        return [self.tasks.get(task_id) for task_id in task_ids]
+    
+    async def list_tasks(
+        self,
+        status: TaskStatus | None = None,
+        priority: TaskPriority | None = None,
+        tag: str | None = None,
+        assigned_to: str | None = None
+    ) -> list[Task]:
+        """List tasks with filters, ordered by (priority, created_at) descending"""
         
-        if status:
-            tasks = [t for t in tasks if t.status == status]
-        if priority:
-            tasks = [t for t in tasks if t.priority == priority]
+        with self._lock:
+            if status is None and priority is None and tag is None and assigned_to is None:
+                return [self.tasks[key[2]] for key in reversed(self._order)]
+            
+            buckets = []
+            if status is not None:
+                buckets.append(self._by_status.get(status, set()))
+            if priority is not None:
+                buckets.append(self._by_priority.get(priority, set()))
+            if tag is not None:
+                buckets.append(self._by_tag.get(tag, set()))
+            if assigned_to is not None:
+                buckets.append(self._by_assignee.get(assigned_to, set()))
+            
+            # Intersect starting from the smallest bucket
+            buckets.sort(key=len)
+            task_ids = buckets[0].intersection(*buckets[1:])
+            
+            keys = sorted((self._indexed[task_id][4] for task_id in task_ids), reverse=True)
+            return [self.tasks[key[2]] for key in keys]
+    
+    async def list_tasks_in_range(
+        self,
+        start_id: str | None = None,
+        end_id: str | None = None,
+        limit: int | None = None
+    ) -> list[Task]:
+        """List tasks with start_id <= id < end_id in ID order
         
-        return sorted(tasks, key=lambda t: (t.priority.value, t.created_at), reverse=True)
+        With time-sortable IDs (see agents.planner.ids) this is a creation
+        time range scan, e.g. start_id=generator.bound(since).
+        """
+        with self._lock:
+            lo = bisect.bisect_left(self._ids, start_id) if start_id is not None else 0
+            hi = bisect.bisect_left(self._ids, end_id) if end_id is not None else len(self._ids)
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            return [self.tasks[task_id] for task_id in self._ids[lo:hi]]
     
     async def delete_task(self, task_id: str) -> bool:
         """Delete task"""
-        if task_id in self.tasks:
+        with self._lock:
+            if task_id not in self.tasks:
+                return False
             del self.tasks[task_id]
-            return True
-        return False
+            self._unindex(task_id)
+        self._notify('task.deleted', task_id)
+        return True
     
     async def save_plan(self, plan: TaskPlan) -> None:
-        """Save plan"""
-        self.plans[plan.id] = plan
-        plan.updated_at = datetime.now().isoformat()
+        """Save plan (and the tasks it contains)"""
+        with self._lock:
+            self.plans[plan.id] = plan
+            plan.updated_at = datetime.now().isoformat()
+            for task in plan.tasks:
+                self.tasks[task.id] = task
+                self._index(task)
+        for task in plan.tasks:
+            self._notify('task.saved', task)
+        self._notify('plan.saved', plan)
     
     async def get_plan(self, plan_id: str) -> TaskPlan | None:
         """Get plan"""
@@ -134,11 +421,52 @@ class TaskStorage:
 class TaskPlannerAgent:
     """Main task planner agent"""
     
-    def __init__(self, storage: TaskStorage | None = None):
+    def __init__(
+        self,
+        storage: TaskStorage | None = None,
+        id_generator: IdGenerator | None = None,
+        client: AsyncAnthropic | None = None,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_retries: int = LLM_MAX_RETRIES,
+        conversations: ConversationStore | None = None,
+        response_memo: ResponseMemo | None = None,
+        semantic_index: SemanticIndex | None = None
+    ):
         self.storage = storage or TaskStorage()
-        self.anthropic = Anthropic()
+        self.id_generator = id_generator or UlidGenerator()
+        self.report_cache = ReportCache(
+            render_section=self._render_section_markdown,
+            render_summary=self._render_summary_markdown,
+            section_order=REPORT_STATUS_ORDER
+        )
+        self.storage.add_listener(self.report_cache.on_mutation)
+        self.search_index = TaskSearchIndex()
+        self.storage.add_listener(self.search_index.on_mutation)
+        self.scheduler = TaskScheduler(self.storage, PRIORITY_RANK)
+        self.storage.add_listener(self.scheduler.on_mutation)
+        self.semantic_index = semantic_index
+        if semantic_index is not None:
+            self.storage.add_listener(semantic_index.on_mutation)
+        self._client = client
         self.model = "claude-3-5-sonnet-20241022"
-        self.conversation_history: list[dict] = []
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self._llm_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.conversations = conversations if conversations is not None else ConversationStore()
+        self.response_memo = response_memo if response_memo is not None else ResponseMemo()
+        # Thread-safe futures, so identical requests on other loops can wait on them
+        self._chat_inflight: dict[str, Future] = {}
+        self._chat_inflight_lock = threading.Lock()
+        self.chat_metrics = ChatMetrics()
+        self._webhook_handlers = {
+            'task.create': self._on_task_create,
+            'task.complete': self._on_task_complete,
+            'task.error': self._on_task_error,
+            'task.status': self._on_task_status,
+            'report.generate': self._on_report_generate,
+        }
     
     async def plan_from_analysis(
         self,
@@ -147,26 +475,30 @@ class TaskPlannerAgent:
     ) -> TaskPlan:
         """Create task plan from code analysis"""
         
-        plan_id = f"plan-{hash(repo_url) % (2**31)}"
-        
-        tasks: list[Task] = []
+        plan_id = stable_id("plan", repo_url)
         
         # Create tasks from analysis
-        for idx, task_data in enumerate(analysis.get('tasks', []), 1):
-            task = Task(
-                id=f"{plan_id}-task-{idx}",
-                title=task_data.get('title', f'Task {idx}'),
-                description=task_data.get('description', ''),
-                priority=TaskPriority(task_data.get('priority', 'medium')),
-                estimated_hours=float(task_data.get('effort', '0').split()[0]) if task_data.get('effort') else None,
-                tags=['auto-generated', 'code-review'],
-                metadata={
+        items = [
+            {
+                'id': f"{plan_id}-task-{idx}",
+                'title': task_data.get('title', f'Task {idx}'),
+                'description': task_data.get('description', ''),
+                'priority': task_data.get('priority', 'medium'),
+                'estimated_hours': float(task_data.get('effort', '0').split()[0]) if task_data.get('effort') else None,
+                'tags': ['auto-generated', 'code-review'],
+                'metadata': {
                     'repo_url': repo_url,
                     'analysis': analysis.get('review', '')
                 }
-            )
-            tasks.append(task)
-            await self.storage.save_task(task)
+            }
+            for idx, task_data in enumerate(analysis.get('tasks', []), 1)
+        ]
+        
+        results = await self.create_tasks(items, keep_ids=True)
+        for result in results:
+            if not result.ok:
+                logger.error(f"Skipped analysis task {result.index + 1}: {result.error}")
+        tasks = [result.task for result in results if result.ok]
         
         plan = TaskPlan(
             id=plan_id,
@@ -179,6 +511,32 @@ class TaskPlannerAgent:
         await self.storage.save_plan(plan)
         return plan
     
+    def _build_task(self, data: dict, now: str, keep_ids: bool = False) -> Task:
+        """Validate task fields and build a Task
+        
+        The ID comes from data['id'] only with keep_ids; otherwise an item
+        carrying an ID is rejected, so it cannot overwrite an existing task.
+        """
+        if not data.get('title'):
+            raise ValueError("title is required")
+        if data.get('id') and not keep_ids:
+            raise ValueError("id is assigned by the planner and cannot be set")
+        estimated_hours = data.get('estimated_hours')
+        return Task(
+            id=data.get('id') or self.id_generator.new_id("task"),
+            title=data['title'],
+            description=data.get('description') or '',
+            priority=TaskPriority(data.get('priority') or 'medium'),
+            created_at=now,
+            updated_at=now,
+            due_date=data.get('due_date'),
+            assigned_to=data.get('assigned_to'),
+            tags=list(data.get('tags') or []),
+            dependencies=list(data.get('dependencies') or []),
+            estimated_hours=float(estimated_hours) if estimated_hours is not None else None,
+            metadata=dict(data.get('metadata') or {})
+        )
+    
     async def create_task(
         self,
         title: str,
@@ -186,11 +544,12 @@ class TaskPlannerAgent:
         priority: str = 'medium',
         due_date: str | None = None,
         tags: list[str] | None = None,
-        estimated_hours: float | None = None
+        estimated_hours: float | None = None,
+        dependencies: list[str] | None = None
     ) -> Task:
         """Create new task"""
         
-        task_id = f"task-{datetime.now().timestamp()}"
+        task_id = self.id_generator.new_id("task")
         
         task = Task(
             id=task_id,
@@ -199,6 +558,7 @@ class TaskPlannerAgent:
             priority=TaskPriority(priority),
             due_date=due_date,
             tags=tags or [],
+            dependencies=list(dependencies or []),
             estimated_hours=estimated_hours
         )
         
@@ -206,6 +566,57 @@ class TaskPlannerAgent:
         logger.info(f"Created task: {task_id}")
         return task
     
+    async def create_tasks(self, items: list[dict], keep_ids: bool = False) -> list[BulkResult]:
+        """Create many tasks, validated up front and saved in one storage call
+        
+        keep_ids=True takes task IDs from the items (e.g. stable IDs from
+        plan_from_analysis or a migration) and replaces existing tasks with
+        the same ID. Leave it off for input from webhooks.
+        """
+        
+        now = datetime.now().isoformat()
+        
+        results: list[BulkResult] = []
+        tasks: list[Task] = []
+        for idx, item in enumerate(items):
+            try:
+                task = self._build_task(item, now, keep_ids)
+            except (TypeError, ValueError, AttributeError) as e:
+                results.append(BulkResult(index=idx, error=str(e)))
+                continue
+            tasks.append(task)
+            results.append(BulkResult(index=idx, task=task))
+        
+        await self.storage.save_tasks(tasks)
+        logger.info(f"Created {len(tasks)} tasks ({len(items) - len(tasks)} rejected)")
+        return results
+    
+    async def _apply_bulk(self, items: list[dict], apply) -> list[BulkResult]:
+        """Fetch tasks for items, apply a mutation to each and save in one call"""
+        
+        task_ids = [item.get('task_id') if isinstance(item, dict) else None for item in items]
+        found = await self.storage.get_tasks([task_id for task_id in task_ids if task_id])
+        by_id = {task.id: task for task in found if task is not None}
+        now = datetime.now().isoformat()
+        
+        results: list[BulkResult] = []
+        changed: dict[str, Task] = {}
+        for idx, (item, task_id) in enumerate(zip(items, task_ids)):
+            task = by_id.get(task_id)
+            if task is None:
+                results.append(BulkResult(index=idx, error=f"Task not found: {task_id}"))
+                continue
+            try:
+                apply(task, item, now)
+            except (TypeError, ValueError) as e:
+                results.append(BulkResult(index=idx, error=str(e)))
+                continue
+            changed[task.id] = task
+            results.append(BulkResult(index=idx, task=task))
+        
+        await self.storage.save_tasks(list(changed.values()))
+        return results
+    
     async def update_task_status(
         self,
         task_id: str,
@@ -222,7 +633,7 @@ class TaskPlannerAgent:
         except ValueError:
             logger.error(f"Invalid status value: {status}")
             return None
-            
+        
         task.updated_at = datetime.now().isoformat()
         
         if status == TaskStatus.COMPLETED.value:
@@ -232,6 +643,23 @@ class TaskPlannerAgent:
         logger.info(f"Updated task {task_id} to {status}")
         return task
     
+    async def update_task_statuses(self, updates: list[dict]) -> list[BulkResult]:
+        """Update status of many tasks ({'task_id', 'status'} items) in one storage call"""
+        
+        def apply(task: Task, update: dict, now: str) -> None:
+            try:
+                status = TaskStatus(update.get('status'))
+            except ValueError:
+                raise ValueError(f"Invalid status value: {update.get('status')}") from None
+            task.status = status
+            task.updated_at = now
+            if status == TaskStatus.COMPLETED:
+                task.completion_time = now
+        
+        results = await self._apply_bulk(updates, apply)
+        logger.info(f"Updated status of {sum(r.ok for r in results)}/{len(updates)} tasks")
+        return results
+    
     async def mark_task_error(
         self,
         task_id: str,
@@ -271,199 +699,564 @@ class TaskPlannerAgent:
         logger.info(f"Completed task: {task_id}")
         return task
     
+    async def complete_tasks(self, items: list[dict]) -> list[BulkResult]:
+        """Complete many tasks ({'task_id', 'actual_hours'} items) in one storage call"""
+        
+        def apply(task: Task, item: dict, now: str) -> None:
+            actual_hours = item.get('actual_hours')
+            if actual_hours:
+                actual_hours = float(actual_hours)
+            task.status = TaskStatus.COMPLETED
+            task.completion_time = now
+            if actual_hours:
+                task.actual_hours = actual_hours
+        
+        results = await self._apply_bulk(items, apply)
+        logger.info(f"Completed {sum(r.ok for r in results)}/{len(items)} tasks")
+        return results
+    
+    async def process_batch_webhook(self, operation: str, items: list[dict]) -> list[dict]:
+        """Process a webhook batch through the bulk operations"""
+        
+        handlers = {
+            'create': self.create_tasks,
+            'status': self.update_task_statuses,
+            'complete': self.complete_tasks,
+        }
+        handler = handlers.get(operation)
+        if handler is None:
+            raise ValueError(f"Unknown batch operation: {operation}")
+        
+        results = await handler(items)
+        return [result.to_dict() for result in results]
+    
     async def list_tasks_by_pattern(
         self,
         pattern: str | None = None,
         status: str | None = None
     ) -> list[Task]:
-        """List tasks matching glob pattern in title/description"""
+        """List tasks matching glob pattern in title/description
         
-        tasks = await self.storage.list_tasks(
-            status=TaskStatus(status) if status else None
-        )
+        Patterns are resolved through the search index, and results are ranked
+        by relevance: title matches first, then matches on rarer words.
+        """
         
+        status_filter = TaskStatus(status) if status else None
         if not pattern:
-            return tasks
+            return await self.storage.list_tasks(status=status_filter)
         
-        # Match against title and description
-        filtered = []
-        for task in tasks:
-            if glob_module.fnmatch.fnmatch(task.title.lower(), pattern.lower()):
-                filtered.append(task)
-            elif glob_module.fnmatch.fnmatch(task.description.lower(), pattern.lower()):
-                filtered.append(task)
+        await self.search_index.ensure_loaded(self.storage)
+        return await self._ranked_tasks(self.search_index.match(pattern, status_filter))
+    
+    async def search_tasks(
+        self,
+        query: str,
+        status: str | None = None,
+        limit: int = 20
+    ) -> list[Task]:
+        """Full-text search over task titles and descriptions, best matches first"""
         
-        return filtered
+        await self.search_index.ensure_loaded(self.storage)
+        scores = self.search_index.search(query, TaskStatus(status) if status else None)
+        return await self._ranked_tasks(scores, limit)
     
-    async def generate_markdown_report(
+    async def semantic_search(
+        self,
+        query: str,
+        status: str | None = None,
+        limit: int = 10
+    ) -> list[tuple[Task, float]]:
+        """Tasks closest in meaning to a query, with cosine similarity, best first
+        
+        Needs a SemanticIndex (semantic_index=...).
+        """
+        
+        if self.semantic_index is None:
+            raise RuntimeError("Semantic search needs a SemanticIndex (TaskPlannerAgent(semantic_index=...))")
+        await self.semantic_index.ensure_loaded(self.storage)
+        
+        task_ids = None
+        if status:
+            task_ids = [task.id for task in await self.storage.list_tasks(status=TaskStatus(status))]
+        hits = await self.semantic_index.search(query, limit, task_ids)
+        tasks = await self.storage.get_tasks([task_id for task_id, _ in hits])
+        return [(task, score) for task, (_, score) in zip(tasks, hits) if task is not None]
+    
+    async def get_ready_tasks(self, limit: int | None = None) -> list[Task]:
+        """Pending tasks whose dependencies are all completed, highest priority first"""
+        
+        await self.scheduler.flush()
+        task_ids = self.scheduler.ready(limit)
+        return [task for task in await self.storage.get_tasks(task_ids) if task is not None]
+    
+    async def add_dependencies(self, task_id: str, depends_on: list[str]) -> Task | None:
+        """Make a task depend on other tasks; raises ValueError if that closes a cycle"""
+        
+        task = await self.storage.get_task(task_id)
+        if not task:
+            return None
+        
+        await self.scheduler.ensure_loaded()
+        new = [dep for dep in depends_on if dep not in task.dependencies]
+        if task_id in new or self.scheduler.would_cycle(task_id, new):
+            raise ValueError(f"Dependencies {new} of {task_id} would form a cycle")
+        
+        task.dependencies.extend(new)
+        task.updated_at = datetime.now().isoformat()
+        await self.storage.save_task(task)
+        return task
+    
+    async def analyze_schedule(self) -> ScheduleAnalysis:
+        """Topological order, critical path and slack of the remaining work"""
+        
+        await self.scheduler.ensure_loaded()
+        return self.scheduler.analyze()
+    
+    async def _ranked_tasks(self, scores: dict[str, float], limit: int | None = None) -> list[Task]:
+        """Tasks by descending score, ties in listing order"""
+        task_ids = list(scores) if limit is None else heapq.nlargest(limit, scores, key=scores.get)
+        tasks = [task for task in await self.storage.get_tasks(task_ids) if task is not None]
+        tasks.sort(key=lambda task: (scores[task.id], TaskStorage._order_key(task)), reverse=True)
+        return tasks
+    
+    @staticmethod
+    def _render_task_markdown(task: Task) -> str:
+        """Render one task as a markdown list entry"""
+        lines = [
+            f"- **{task.title}** [{task.priority.value}]\n",
+            f"  - Status: {task.status.value}\n",
+            f"  - Description: {task.description}\n"
+        ]
+        
+        if task.estimated_hours:
+            lines.append(f"  - Estimated: {task.estimated_hours}h\n")
+        
+        if task.actual_hours:
+            lines.append(f"  - Actual: {task.actual_hours}h\n")
+        
+        if task.due_date:
+            lines.append(f"  - Due: {task.due_date}\n")
+        
+        if task.error_message:
+            lines.append(f"  - Error: {task.error_message}\n")
+        
+        if task.tags:
+            lines.append(f"  - Tags: {', '.join(task.tags)}\n")
+        
+        lines.append("\n")
+        return "".join(lines)
+    
+    @staticmethod
+    def _render_section_header(status: TaskStatus, count: int) -> str:
+        return f"### {status.value.replace('_', ' ').title()} ({count})\n\n"
+    
+    @classmethod
+    def _render_section_markdown(cls, status: TaskStatus, tasks: list[Task], count: int) -> str:
+        """Render a whole status section"""
+        header = cls._render_section_header(status, count)
+        return header + "".join(cls._render_task_markdown(task) for task in tasks)
+    
+    @staticmethod
+    def _render_summary_markdown(counts: Counter, total: int) -> str:
+        """Render the summary section"""
+        return (
+            "## Summary\n\n"
+            f"- Total Tasks: {total}\n"
+            f"- Completed: {counts[TaskStatus.COMPLETED]}\n"
+            f"- In Progress: {counts[TaskStatus.IN_PROGRESS]}\n"
+            f"- Pending: {counts[TaskStatus.PENDING]}\n"
+            f"- Failed: {counts[TaskStatus.FAILED]}\n"
+        )
+    
+    @staticmethod
+    def _render_report_title() -> str:
+        return (
+            "# Task Report\n"
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        )
+    
+    async def _load_report_tasks(self, plan_id: str | None) -> tuple[str, list[Task]]:
+        """Plan header and tasks for a report"""
+        if not plan_id:
+            return "", await self.storage.list_tasks()
+        
+        plan = await self.storage.get_plan(plan_id)
+        if not plan:
+            return "", []
+        return f"## Plan: {plan.name}\n{plan.description}\n\n", plan.tasks
+    
+    async def iter_markdown_report(
         self,
         plan_id: str | None = None
-    ) -> str:
-        """Generate markdown report of tasks"""
-        
-        markdown = []
-        markdown.append("# Task Report\n")
-        markdown.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        if plan_id:
-            plan = await self.storage.get_plan(plan_id)
-            if plan:
-                markdown.append(f"## Plan: {plan.name}\n")
-                markdown.append(f"{plan.description}\n\n")
-                tasks = plan.tasks
-            else:
-                tasks = []
-        else:
-            tasks = await self.storage.list_tasks()
+    ) -> AsyncIterator[str]:
+        """Generate markdown report of tasks, yielding it section by section"""
         
-        # Group by status
-        by_status = {}
-        for task in tasks:
-            status = task.status.value
-            if status not in by_status:
-                by_status[status] = []
-            by_status[status].append(task)
+        title = self._render_report_title()
+        prefix, tasks = await self._load_report_tasks(plan_id)
+        yield title + prefix
+        
+        # Count by status in a single pass, without grouping tasks
+        counts = Counter(task.status for task in tasks)
         
         # Generate sections
-        for status in [TaskStatus.IN_PROGRESS.value, TaskStatus.PENDING.value, 
-                      TaskStatus.COMPLETED.value, TaskStatus.FAILED.value]:
-            if status not in by_status:
+        for status in REPORT_STATUS_ORDER:
+            if not counts[status]:
                 continue
             
-            status_tasks = by_status[status]
-            markdown.append(f"### {status.replace('_', ' ').title()} ({len(status_tasks)})\n\n")
+            yield self._render_section_header(status, counts[status])
+            
+            chunk = []
+            for task in tasks:
+                if task.status != status:
+                    continue
+                chunk.append(self._render_task_markdown(task))
+                if len(chunk) >= REPORT_CHUNK_TASKS:
+                    yield "".join(chunk)
+                    chunk = []
+                    # Let other coroutines run between chunks of a large report
+                    await asyncio.sleep(0)
+            if chunk:
+                yield "".join(chunk)
+        
+        yield self._render_summary_markdown(counts, len(tasks))
+    
+    async def generate_markdown_report(
+        self,
+        plan_id: str | None = None
+    ) -> str:
+        """Generate markdown report of tasks
+        
+        Served from the report cache while the plan is unchanged; after task
+        mutations only the affected status sections are re-rendered.
+        """
+        title = self._render_report_title()
+        key = (plan_id or None, 'markdown', ())
+        
+        body = self.report_cache.get(key)
+        if body is None:
+            # Read before loading, so a mutation during the load is not
+            # stamped onto the content loaded before it
+            version = self.report_cache.version(key[0])
+            prefix, tasks = await self._load_report_tasks(plan_id)
+            body = self.report_cache.render(key, prefix, tasks, version)
+        return title + body
+    
+    @property
+    def anthropic(self) -> AsyncAnthropic:
+        """The client passed in, else the running loop's shared client"""
+        if self._client is not None:
+            return self._client
+        return shared_anthropic_client()
+    
+    @anthropic.setter
+    def anthropic(self, client: AsyncAnthropic | None) -> None:
+        self._client = client
+    
+    def _llm_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limit of LLM calls on the running loop (max_concurrency per loop)"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._llm_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._llm_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+    
+    async def _create_message(self, **kwargs: Any) -> Any:
+        """Call messages.create with bounded concurrency and jittered retries"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._llm_semaphore():
+                    response = await self.anthropic.messages.create(**kwargs)
+                self.chat_metrics.record_usage(response.usage)
+                return response
+            except (APIConnectionError, APIStatusError) as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                await self._backoff(attempt, e)
+    
+    async def _stream_text(self, **kwargs: Any) -> AsyncIterator[str]:
+        """Stream text deltas of messages.stream with bounded concurrency
+        
+        Retried like _create_message, but only until the first delta arrives.
+        """
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self._llm_semaphore():
+                    async with self.anthropic.messages.stream(**kwargs) as stream:
+                        async for text in stream.text_stream:
+                            started = True
+                            yield text
+                        message = await stream.get_final_message()
+                self.chat_metrics.record_usage(message.usage)
+                return
+            except (APIConnectionError, APIStatusError) as e:
+                if started or attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                await self._backoff(attempt, e)
+    
+    @staticmethod
+    async def _backoff(attempt: int, error: Exception) -> None:
+        # Full jitter: spread retries of concurrent callers apart
+        delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+        logger.warning(f"Anthropic API call failed ({error}), retry {attempt + 1} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+    
+    @property
+    def conversation_history(self) -> list[dict]:
+        """Messages of the default chat session"""
+        return self.conversations.get(DEFAULT_CHAT_SESSION).to_messages()
+    
+    def _chat_system_prompt(self, session: ConversationSession, tools: bool = False) -> list[dict]:
+        prompt = CHAT_SYSTEM_PROMPT + CHAT_TOOLS_PROMPT if tools else CHAT_SYSTEM_PROMPT
+        blocks = [{"type": "text", "text": prompt, "cache_control": PROMPT_CACHE_CONTROL}]
+        if session.summary:
+            blocks.append({"type": "text", "text": f"Summary of the earlier conversation:\n{session.summary}"})
+        return blocks
+    
+    def _chat_request(self, session: ConversationSession, user_turn: Message, tools: bool = False) -> dict:
+        """messages.create arguments for a new user turn in a session
+        
+        The static system prompt and the history before the new turn are
+        marked as prompt cache breakpoints, so follow-up calls in a session
+        read that prefix from the provider's cache.
+        """
+        messages = session.to_messages()
+        if messages:
+            last = messages[-1]
+            messages[-1] = {
+                "role": last["role"],
+                "content": [{"type": "text", "text": last["content"], "cache_control": PROMPT_CACHE_CONTROL}]
+            }
+        request = {
+            "model": self.model,
+            "max_tokens": 1000,
+            "system": self._chat_system_prompt(session, tools),
+            "messages": [*messages, user_turn.to_dict()]
+        }
+        if tools:
+            request["tools"] = CHAT_TOOLS
+        return request
+    
+    async def _chat_reply(self, chat_request: dict) -> str:
+        """Reply text for a chat request, from the memo when possible"""
+        memo_key = self.response_memo.key(chat_request)
+        reply = self.response_memo.get(memo_key)
+        if reply is not None:
+            self.chat_metrics.record_memo_hit()
+            return reply
+        
+        with self._chat_inflight_lock:
+            pending = self._chat_inflight.get(memo_key)
+            if pending is None:
+                future = Future()
+                if self.response_memo.enabled:
+                    self._chat_inflight[memo_key] = future
+        if pending is not None:
+            self.chat_metrics.record_memo_hit()
+            return await asyncio.shield(asyncio.wrap_future(pending))
+        
+        start = time.perf_counter()
+        try:
+            response = await self._create_message(**chat_request)
+            reply = response.content[0].text
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._chat_inflight_lock:
+                self._chat_inflight.pop(memo_key, None)
+        
+        elapsed = time.perf_counter() - start
+        self.chat_metrics.record(elapsed, elapsed)
+        self.response_memo.put(memo_key, reply)
+        future.set_result(reply)
+        return reply
+    
+    async def _chat_with_tools(self, chat_request: dict) -> str:
+        """Reply text for a chat request, running the model's tool calls
+        
+        All tool calls of a model turn run together (see ChatToolRunner), and
+        the last allowed turn disables tools so the model must answer. Only
+        replies that used no tools are memoized.
+        """
+        memo_key = self.response_memo.key(chat_request)
+        reply = self.response_memo.get(memo_key)
+        if reply is not None:
+            self.chat_metrics.record_memo_hit()
+            return reply
+        
+        runner = ChatToolRunner(self)
+        messages = list(chat_request["messages"])
+        used_tools = False
+        start = time.perf_counter()
+        
+        for turn in range(CHAT_MAX_TOOL_TURNS):
+            request = {**chat_request, "messages": messages}
+            if turn == CHAT_MAX_TOOL_TURNS - 1:
+                request["tool_choice"] = {"type": "none"}
+            response = await self._create_message(**request)
             
-            for task in status_tasks:
-                markdown.append(f"- **{task.title}** [{task.priority.value}]\n")
-                markdown.append(f"  - Status: {task.status.value}\n")
-                markdown.append(f"  - Description: {task.description}\n")
-                
-                if task.estimated_hours:
-                    markdown.append(f"  - Estimated: {task.estimated_hours}h\n")
-                
-                if task.actual_hours:
-                    markdown.append(f"  - Actual: {task.actual_hours}h\n")
-                
-                if task.due_date:
-                    markdown.append(f"  - Due: {task.due_date}\n")
-                
-                if task.error_message:
-                    markdown.append(f"  - Error: {task.error_message}\n")
-                
-                if task.tags:
-                    markdown.append(f"  - Tags: {', '.join(task.tags)}\n")
-                
-                markdown.append("\n")
-        
-        # Summary
-        markdown.append("## Summary\n\n")
-        markdown.append(f"- Total Tasks: {len(tasks)}\n")
-        markdown.append(f"- Completed: {len(by_status.get(TaskStatus.COMPLETED.value, []))}\n")
-        markdown.append(f"- In Progress: {len(by_status.get(TaskStatus.IN_PROGRESS.value, []))}\n")
-        markdown.append(f"- Pending: {len(by_status.get(TaskStatus.PENDING.value, []))}\n")
-        markdown.append(f"- Failed: {len(by_status.get(TaskStatus.FAILED.value, []))}\n")
-        
-        return "".join(markdown)
-    
-    async def chat(self, user_message: str) -> str:
-        """Chat with agent for task management"""
-        
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
-        
-        system_prompt = """You are a task planning assistant. Help users manage their tasks.
-        You can:
-        - Create tasks with descriptions and priorities
-        - Update task status (pending, in_progress, completed, failed)
-        - Generate task reports
-        - Organize tasks by priority and due date
-        
-        Respond in a helpful, structured way. When suggesting tasks, include estimated effort."""
+            calls = [block for block in response.content if block.type == "tool_use"]
+            if response.stop_reason != "tool_use" or not calls:
+                break
+            used_tools = True
+            messages.append({
+                "role": "assistant",
+                "content": [
+                    {"type": "text", "text": block.text} if block.type == "text" else
+                    {"type": "tool_use", "id": block.id, "name": block.name, "input": block.input}
+                    for block in response.content
+                    if block.type in ("text", "tool_use")
+                ]
+            })
+            messages.append({"role": "user", "content": await runner.run_all(calls)})
+            logger.info(f"Chat ran {len(calls)} tool call(s) in turn {turn + 1}")
+        
+        elapsed = time.perf_counter() - start
+        self.chat_metrics.record(elapsed, elapsed)
+        reply = "".join(block.text for block in response.content if block.type == "text")
+        if not used_tools:
+            self.response_memo.put(memo_key, reply)
+        return reply
+    
+    async def chat(
+        self,
+        user_message: str,
+        session_id: str = DEFAULT_CHAT_SESSION,
+        use_tools: bool = True
+    ) -> str:
+        """Chat with agent for task management
+        
+        With use_tools the model can create, update, complete, list and report
+        on tasks through CHAT_TOOLS. Each session keeps its own history,
+        trimmed to the store's token budget; only the user message and the
+        final reply are kept. The turn is committed to the history only if
+        the call succeeds. Identical requests within the memo TTL reuse the
+        earlier reply, and without tools concurrent identical requests share
+        one API call.
+        """
+        
+        session = self.conversations.get(session_id)
+        user_turn = self.conversations.message("user", user_message)
+        chat_request = self._chat_request(session, user_turn, tools=use_tools)
         
         try:
-            response = self.anthropic.messages.create(
-                model=self.model,
-                max_tokens=1000,
-                system=system_prompt,
-                messages=self.conversation_history
-            )
+            if use_tools:
+                assistant_message = await self._chat_with_tools(chat_request)
+            else:
+                assistant_message = await self._chat_reply(chat_request)
         except Exception as e:
             logger.error(f"Anthropic API call failed: {e}")
+            self.chat_metrics.record_error()
             return f"Sorry, I encountered an error: {str(e)}"
         
-        assistant_message = response.content[0].text
-        
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": assistant_message
-        })
+        self.conversations.append(
+            session,
+            user_turn,
+            self.conversations.message("assistant", assistant_message)
+        )
         
         return assistant_message
     
-    async def process_webhook(
+    async def chat_stream(
         self,
-        event_type: str,
-        payload: dict
-    ) -> dict:
-        """Process webhook events"""
+        user_message: str,
+        session_id: str = DEFAULT_CHAT_SESSION
+    ) -> AsyncIterator[str]:
+        """Stream the reply to a chat message as text deltas (without tools)
         
-        if event_type == 'task.create':
-            task = await self.create_task(
-                title=payload.get('title'),
-                description=payload.get('description'),
-                priority=payload.get('priority', 'medium'),
-                due_date=payload.get('due_date'),
-                tags=payload.get('tags', []),
-                estimated_hours=payload.get('estimated_hours')
-            )
-            return {
-                'status': 'created',
-                'task': task.to_dict()
-            }
+        The turn is committed to the session history only once the stream
+        completes; a failed or abandoned stream leaves the history unchanged.
+        """
+        session = self.conversations.get(session_id)
+        user_turn = self.conversations.message("user", user_message)
+        chat_request = self._chat_request(session, user_turn)
+        memo_key = self.response_memo.key(chat_request)
         
-        elif event_type == 'task.complete':
-            task = await self.complete_task(
-                task_id=payload.get('task_id'),
-                actual_hours=payload.get('actual_hours')
-            )
-            return {
-                'status': 'completed',
-                'task': task.to_dict() if task else None
-            }
+        memoized = self.response_memo.get(memo_key)
+        if memoized is not None:
+            self.chat_metrics.record_memo_hit()
+            yield memoized
+            self.conversations.append(session, user_turn, self.conversations.message("assistant", memoized))
+            return
         
-        elif event_type == 'task.error':
-            task = await self.mark_task_error(
-                task_id=payload.get('task_id'),
-                error_message=payload.get('error_message')
-            )
-            return {
-                'status': 'failed',
-                'task': task.to_dict() if task else None
-            }
+        start = time.perf_counter()
+        ttft = None
+        parts: list[str] = []
         
-        elif event_type == 'task.status':
-            task = await self.update_task_status(
-                task_id=payload.get('task_id'),
-                status=payload.get('status')
-            )
-            return {
-                'status': 'updated',
-                'task': task.to_dict() if task else None
-            }
+        try:
+            async for text in self._stream_text(**chat_request):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                parts.append(text)
+                yield text
+        except Exception as e:
+            logger.error(f"Anthropic API stream failed: {e}")
+            self.chat_metrics.record_error()
+            yield f"Sorry, I encountered an error: {str(e)}"
+            return
         
-        elif event_type == 'report.generate':
-            plan_id = payload.get('plan_id')
-            markdown = await self.generate_markdown_report(plan_id)
-            return {
-                'status': 'generated',
-                'report': markdown
-            }
+        self.chat_metrics.record(ttft, time.perf_counter() - start, streamed=True)
+        assistant_message = "".join(parts)
+        self.response_memo.put(memo_key, assistant_message)
+        self.conversations.append(
+            session,
+            user_turn,
+            self.conversations.message("assistant", assistant_message)
+        )
+    
+    async def process_webhook(
+        self,
+        event_type: str,
+        payload: dict
+    ) -> dict:
+        """Process webhook events"""
         
-        else:
+        handler = self._webhook_handlers.get(event_type)
+        if handler is None:
             return {
                 'status': 'unknown_event',
                 'error': f'Unknown event type: {event_type}'
             }
+        return await handler(payload)
+    
+    async def _on_task_create(self, payload: dict) -> dict:
+        task = await self.create_task(
+            title=payload.get('title'),
+            description=payload.get('description'),
+            priority=payload.get('priority', 'medium'),
+            due_date=payload.get('due_date'),
+            tags=payload.get('tags', []),
+            estimated_hours=payload.get('estimated_hours'),
+            dependencies=payload.get('dependencies')
+        )
+        return {'status': 'created', 'task': task.to_dict()}
+    
+    async def _on_task_complete(self, payload: dict) -> dict:
+        task = await self.complete_task(
+            task_id=payload.get('task_id'),
+            actual_hours=payload.get('actual_hours')
+        )
+        return {'status': 'completed', 'task': task.to_dict() if task else None}
+    
+    async def _on_task_error(self, payload: dict) -> dict:
+        task = await self.mark_task_error(
+            task_id=payload.get('task_id'),
+            error_message=payload.get('error_message')
+        )
+        return {'status': 'failed', 'task': task.to_dict() if task else None}
+    
+    async def _on_task_status(self, payload: dict) -> dict:
+        task = await self.update_task_status(
+            task_id=payload.get('task_id'),
+            status=payload.get('status')
+        )
+        return {'status': 'updated', 'task': task.to_dict() if task else None}
+    
+    async def _on_report_generate(self, payload: dict) -> dict:
+        markdown = await self.generate_markdown_report(payload.get('plan_id'))
+        return {'status': 'generated', 'report': markdown}
 
@@ -0,0 +1,172 @@
+"""
+Incremental report cache
+Rendered report sections kept per (plan ID, format, filters), patched on task mutations
+"""
+
+from __future__ import annotations
+import logging
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# (plan_id or None for all tasks, format, filters)
+ReportKey = tuple[str | None, str, Hashable]
+
+@dataclass
+class _CachedReport:
+    """Rendered report body, split by status section"""
+    version: int
+    prefix: str
+    sections: dict[Any, str]
+    summary: str
+    dirty: set[Any] = field(default_factory=set)
+
+class ReportCache:
+    """Report cache with per-plan version counters and section-level patching
+    
+    Wire on_mutation to the storage listener hook. A task save marks only the
+    status sections it left and entered as dirty; a plan save drops that
+    plan's entries (its header and task list may have changed).
+    """
+    
+    def __init__(
+        self,
+        render_section: Callable[[Any, list, int], str],
+        render_summary: Callable[[Counter, int], str],
+        section_order: Iterable[Any],
+        max_entries: int = 256
+    ):
+        self._render_section = render_section
+        self._render_summary = render_summary
+        self._section_order = tuple(section_order)
+        self.max_entries = max_entries
+        
+        self.versions: dict[str | None, int] = defaultdict(int)
+        self._entries: OrderedDict[ReportKey, _CachedReport] = OrderedDict()
+        self._keys_by_plan: dict[str | None, set[ReportKey]] = defaultdict(set)
+        self._task_plans: dict[str, set[str]] = defaultdict(set)
+        self._task_status: dict[str, Any] = {}
+        
+        self.hits = 0
+        self.misses = 0
+        self.patches = 0
+    
+    def stats(self) -> dict:
+        """Cache counters"""
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'patches': self.patches
+        }
+    
+    def on_mutation(self, event: str, payload: Any) -> None:
+        """Storage listener: bump versions and mark affected sections dirty"""
+        if event == 'plan.saved':
+            for task in payload.tasks:
+                self._task_plans[task.id].add(payload.id)
+            self.versions[payload.id] += 1
+            for key in list(self._keys_by_plan.get(payload.id, ())):
+                self._drop(key)
+            return
+        
+        if event == 'task.saved':
+            task_id, status = payload.id, payload.status
+        elif event == 'task.deleted':
+            task_id, status = payload, None
+        else:
+            return
+        
+        old_status = self._task_status.pop(task_id, None)
+        if status is not None:
+            self._task_status[task_id] = status
+        affected = {s for s in (old_status, status) if s is not None}
+        
+        for plan_id in (None, *self._task_plans.get(task_id, ())):
+            self.versions[plan_id] += 1
+            for key in self._keys_by_plan.get(plan_id, ()):
+                self._entries[key].dirty |= affected
+    
+    def get(self, key: ReportKey) -> str | None:
+        """Cached report body if the plan has not changed since it was rendered"""
+        entry = self._entries.get(key)
+        if entry is None or entry.version != self.versions[key[0]]:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return self._body(entry)
+    
+    def version(self, plan_id: str | None) -> int:
+        """Current version of a plan's reports; read it before loading the tasks to render"""
+        return self.versions[plan_id]
+    
+    def render(self, key: ReportKey, prefix: str, tasks: list, version: int) -> str:
+        """Render report body, re-rendering only dirty sections of a cached entry
+        
+        `version` is the plan's version from before `tasks` were loaded. If a
+        mutation landed during the load, the entry is stored under that older
+        version and keeps its dirty marks (or all sections, for a new entry),
+        so the next call renders the affected sections again.
+        """
+        entry = self._entries.get(key)
+        counts = Counter(task.status for task in tasks)
+        plan_id = key[0]
+        for task in tasks:
+            self._task_status.setdefault(task.id, task.status)
+            # Membership from plan.saved alone is missing for plans loaded
+            # from a persistent storage after a restart
+            if plan_id is not None:
+                self._task_plans[task.id].add(plan_id)
+        
+        if entry is None or entry.prefix != prefix:
+            self.misses += 1
+            stale = set(self._section_order)
+        else:
+            self.patches += 1
+            stale = entry.dirty & set(self._section_order)
+        
+        sections = dict(entry.sections) if entry is not None else {}
+        for status in stale:
+            if counts[status]:
+                section_tasks = [task for task in tasks if task.status == status]
+                sections[status] = self._render_section(status, section_tasks, counts[status])
+            else:
+                sections.pop(status, None)
+        
+        if version == self.versions[plan_id]:
+            dirty = set()
+        elif entry is not None:
+            dirty = set(entry.dirty)
+        else:
+            dirty = set(self._section_order)
+        
+        entry = _CachedReport(
+            version=version,
+            prefix=prefix,
+            sections=sections,
+            summary=self._render_summary(counts, len(tasks)),
+            dirty=dirty
+        )
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._keys_by_plan[plan_id].add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        
+        return self._body(entry)
+    
+    def _body(self, entry: _CachedReport) -> str:
+        parts = [entry.prefix]
+        parts.extend(entry.sections[s] for s in self._section_order if s in entry.sections)
+        parts.append(entry.summary)
+        return "".join(parts)
+    
+    def _drop(self, key: ReportKey) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_plan.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_plan[key[0]]
@@ -0,0 +1,66 @@
+"""
+Local memo of chat replies
+Identical requests (model, system prompt, history, message) within the TTL reuse the reply
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+class ResponseMemo:
+    """LRU memo of reply text by request hash, with TTL expiry
+    
+    max_entries=0 disables it.
+    """
+    
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+    
+    @staticmethod
+    def key(request: dict) -> str:
+        """Hash of messages.create arguments"""
+        data = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+    
+    def get(self, key: str) -> str | None:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, key: str, reply: str) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic(), reply)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
@@ -0,0 +1,551 @@
+"""
+Task scheduler
+Incremental dependency DAG over tasks, kept in sync through storage listeners
+"""
+
+from __future__ import annotations
+import asyncio
+import heapq
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Iterable, Mapping
+
+if TYPE_CHECKING:
+    from agents.planner.planner_agent import Task, TaskPriority
+
+logger = logging.getLogger(__name__)
+
+# TaskStatus values (a str Enum, so these compare equal to its members)
+_PENDING = "pending"
+_COMPLETED = "completed"
+_BLOCKED = "blocked"
+
+# Slack is rounded to this many decimals, so float noise does not hide critical tasks
+SLACK_PRECISION = 6
+
+@dataclass(slots=True)
+class _Node:
+    status: str
+    rank: int
+    created_at: str
+    hours: float
+    stored: bool  # saved in storage itself, not only embedded as a subtask
+    
+    def sort_key(self, task_id: str) -> tuple[int, str, str]:
+        """Highest priority, then oldest, first"""
+        return (-self.rank, self.created_at, task_id)
+
+@dataclass
+class ScheduleAnalysis:
+    """Critical path analysis of the remaining work
+    
+    Durations are estimated_hours (0 when unset or completed). Times are
+    hours from now, assuming unlimited parallelism.
+    """
+    order: list[str]
+    earliest_start: dict[str, float]
+    earliest_finish: dict[str, float]
+    slack: dict[str, float]
+    critical_path: list[str]
+    total_hours: float
+
+class TaskScheduler:
+    """Dependency DAG of tasks with ready-set tracking and automatic blocking
+    
+    Wire on_mutation to the storage listener hook. A task depends on its
+    dependencies and its subtasks. Edges are updated per save, and a
+    completion only revisits the tasks depending on it. A topological order
+    is maintained as edges arrive (Pearce-Kelly), so a cycle check only
+    searches the tasks between the two ends of a misordered edge.
+    Dependencies that would close a cycle are rejected (logged, and retried
+    on the next save).
+    
+    Pending tasks with unfinished dependencies are moved to BLOCKED, and back
+    to PENDING once those complete; tasks blocked by hand are left alone.
+    """
+    
+    def __init__(self, storage: Any, priority_rank: Mapping[TaskPriority, int]):
+        self.storage = storage
+        self.priority_rank = priority_rank
+        
+        self._nodes: dict[str, _Node] = {}
+        self._deps: dict[str, set[str]] = {}  # task -> accepted prerequisites
+        self._dependents: dict[str, set[str]] = {}  # prerequisite (possibly unknown) -> tasks
+        self._rejected: dict[str, set[str]] = {}  # task -> prerequisites that closed a cycle
+        self._embedded: dict[str, set[str]] = {}  # task -> IDs of its embedded subtasks
+        self._unmet: dict[str, int] = {}  # task -> unfinished prerequisites, when any
+        self._ready: set[str] = set()
+        self._auto_blocked: set[str] = set()
+        self._ord: dict[str, int] = {}  # topological position of every task ID in the graph
+        self._next_ord = 0  # new tasks go after all others
+        self._first_ord = 0  # unknown prerequisites go before all others
+        
+        self._transitions: set[str] = set()  # tasks whose status needs writing
+        self._apply_task: asyncio.Task | None = None
+        self._load_task: asyncio.Task | None = None
+        self._loaded = False
+        self._deleted: set[str] | None = None  # tasks deleted while loading
+        self._version = 0
+        self._analysis: tuple[int, ScheduleAnalysis] | None = None
+    
+    def __len__(self) -> int:
+        return len(self._nodes)
+    
+    def on_mutation(self, event: str, payload: Any) -> None:
+        """Storage listener: update the graph on saves and deletes"""
+        if event == 'task.saved':
+            self._update(payload, stored=True)
+        elif event == 'task.deleted':
+            if self._deleted is not None:
+                self._deleted.add(payload)
+            self._remove(payload)
+        else:
+            return
+        if not self._loaded:
+            self._schedule_load()
+        if self._transitions:
+            self._schedule_apply()
+    
+    # -- graph maintenance --
+    
+    @staticmethod
+    def _wanted_deps(task: Task) -> set[str]:
+        deps = set(task.dependencies)
+        deps.update(subtask.id for subtask in task.subtasks)
+        return deps
+    
+    def _is_done(self, task_id: str) -> bool:
+        node = self._nodes.get(task_id)
+        return node is not None and node.status == _COMPLETED
+    
+    def _update(self, task: Task, stored: bool, bulk: bool = False) -> None:
+        """Add or refresh a task's node and edges
+        
+        bulk skips cycle checks and counting, which _load does in one pass.
+        """
+        old = self._nodes.get(task.id)
+        if not stored and old is not None and old.stored:
+            return  # the stored copy of a subtask is authoritative
+        
+        subtask_ids = set()
+        for subtask in task.subtasks:
+            subtask_ids.add(subtask.id)
+            self._update(subtask, stored=False, bulk=bulk)
+        for stale in self._embedded.pop(task.id, set()) - subtask_ids:
+            if stale in self._nodes and not self._nodes[stale].stored:
+                self._remove(stale)
+        if subtask_ids:
+            self._embedded[task.id] = subtask_ids
+        
+        node = _Node(
+            status=task.status,
+            rank=self.priority_rank[task.priority],
+            created_at=task.created_at,
+            hours=float(task.estimated_hours or 0),
+            stored=stored or (old is not None and old.stored)
+        )
+        self._nodes[task.id] = node
+        if task.id not in self._ord:
+            self._next_ord += 1
+            self._ord[task.id] = self._next_ord
+        edges_changed = self._set_deps(task.id, self._wanted_deps(task), bulk)
+        if old != node or edges_changed:
+            self._version += 1
+        if bulk:
+            return
+        
+        self._count_unmet(task.id)
+        if old is None or (old.status == _COMPLETED) != (node.status == _COMPLETED):
+            for dependent in self._dependents.get(task.id, ()):
+                self._count_unmet(dependent)
+    
+    def _set_deps(self, task_id: str, wanted: set[str], bulk: bool) -> bool:
+        """Replace a task's prerequisites; True if the accepted edges changed"""
+        accepted = self._deps.get(task_id, set())
+        changed = False
+        for dep in accepted - wanted:
+            self._unlink(task_id, dep)
+            changed = True
+        
+        rejected = set()
+        for dep in wanted - accepted:
+            if dep not in self._ord:
+                self._first_ord -= 1
+                self._ord[dep] = self._first_ord
+            if dep == task_id or not (bulk or self._reorder(dep, task_id)):
+                rejected.add(dep)
+                continue
+            self._deps.setdefault(task_id, set()).add(dep)
+            self._dependents.setdefault(dep, set()).add(task_id)
+            changed = True
+        
+        if rejected:
+            if rejected != self._rejected.get(task_id):
+                logger.warning(f"Ignoring dependencies of {task_id} that form a cycle: {sorted(rejected)}")
+            self._rejected[task_id] = rejected
+        else:
+            self._rejected.pop(task_id, None)
+        return changed
+    
+    def _unlink(self, task_id: str, dep: str) -> None:
+        deps = self._deps[task_id]
+        deps.discard(dep)
+        if not deps:
+            del self._deps[task_id]
+        dependents = self._dependents[dep]
+        dependents.discard(task_id)
+        if not dependents:
+            del self._dependents[dep]
+            if dep not in self._nodes:
+                self._ord.pop(dep, None)
+    
+    def _reorder(self, before: str, after: str) -> bool:
+        """Make the order allow an edge before -> after; False if it closes a cycle
+        
+        Only tasks positioned between the two ends are searched: those
+        reachable forward from after, and backward from before.
+        """
+        ord = self._ord
+        lower, upper = ord[after], ord[before]
+        if lower > upper:
+            return True
+        
+        forward = []
+        seen = {after}
+        stack = [after]
+        while stack:
+            task_id = stack.pop()
+            forward.append(task_id)
+            for dependent in self._dependents.get(task_id, ()):
+                if dependent == before:
+                    return False
+                if dependent not in seen and ord[dependent] < upper:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        
+        backward = []
+        seen = {before}
+        stack = [before]
+        while stack:
+            task_id = stack.pop()
+            backward.append(task_id)
+            for dep in self._deps.get(task_id, ()):
+                if dep not in seen and ord[dep] > lower:
+                    seen.add(dep)
+                    stack.append(dep)
+        
+        # Reuse the affected positions: prerequisites side first, each side in its old order
+        forward.sort(key=ord.get)
+        backward.sort(key=ord.get)
+        moved = backward + forward
+        for task_id, position in zip(moved, sorted(ord[task_id] for task_id in moved)):
+            ord[task_id] = position
+        return True
+    
+    def _reaches(self, start: str, target: str) -> bool:
+        """Whether target is start or one of its (transitive) prerequisites"""
+        ord = self._ord
+        if target not in ord:
+            return False
+        floor = ord[target]  # prerequisites are positioned before their dependents
+        seen = {start}
+        stack = [start]
+        while stack:
+            task_id = stack.pop()
+            if task_id == target:
+                return True
+            for dep in self._deps.get(task_id, ()):
+                if dep not in seen and ord[dep] >= floor:
+                    seen.add(dep)
+                    stack.append(dep)
+        return False
+    
+    def _remove(self, task_id: str) -> None:
+        node = self._nodes.pop(task_id, None)
+        for subtask_id in self._embedded.pop(task_id, ()):
+            subtask = self._nodes.get(subtask_id)
+            if subtask is not None and not subtask.stored:
+                self._remove(subtask_id)
+        for dep in list(self._deps.get(task_id, ())):
+            self._unlink(task_id, dep)
+        self._rejected.pop(task_id, None)
+        self._unmet.pop(task_id, None)
+        self._ready.discard(task_id)
+        self._auto_blocked.discard(task_id)
+        self._transitions.discard(task_id)
+        if task_id not in self._dependents:
+            self._ord.pop(task_id, None)
+        if node is None:
+            return
+        self._version += 1
+        # Dependents keep their edge: the task counts as unfinished until it is saved again
+        if node.status == _COMPLETED:
+            for dependent in self._dependents.get(task_id, ()):
+                self._count_unmet(dependent)
+    
+    def _count_unmet(self, task_id: str) -> None:
+        """Recount a task's unfinished prerequisites and refresh its state"""
+        unmet = sum(1 for dep in self._deps.get(task_id, ()) if not self._is_done(dep))
+        if unmet:
+            self._unmet[task_id] = unmet
+        else:
+            self._unmet.pop(task_id, None)
+        self._refresh(task_id)
+    
+    def _desired_status(self, task_id: str) -> str | None:
+        """PENDING or BLOCKED for tasks under automatic blocking, else None"""
+        node = self._nodes.get(task_id)
+        if node is None or not node.stored:
+            return None
+        if node.status == _PENDING or (node.status == _BLOCKED and task_id in self._auto_blocked):
+            return _BLOCKED if task_id in self._unmet else _PENDING
+        return None
+    
+    def _refresh(self, task_id: str) -> None:
+        desired = self._desired_status(task_id)
+        if desired is None:
+            self._ready.discard(task_id)
+            self._auto_blocked.discard(task_id)
+            self._transitions.discard(task_id)
+            return
+        
+        if desired == _PENDING:
+            self._ready.add(task_id)
+        else:
+            self._ready.discard(task_id)
+            self._auto_blocked.add(task_id)
+        if desired == self._nodes[task_id].status:
+            self._transitions.discard(task_id)
+            if desired == _PENDING:
+                self._auto_blocked.discard(task_id)
+        else:
+            self._transitions.add(task_id)
+    
+    # -- loading and status writes --
+    
+    @staticmethod
+    def _live(task: asyncio.Task | None, loop: asyncio.AbstractEventLoop) -> bool:
+        """Whether a background task can still be awaited on loop
+        
+        The storage may be shared by several event loops, and a loop that
+        shuts down cancels the tasks it was running.
+        """
+        return task is not None and not task.cancelled() and task.get_loop() is loop
+    
+    def _schedule_load(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if not self._live(self._load_task, loop):
+            self._load_task = loop.create_task(self._load())
+    
+    async def ensure_loaded(self) -> None:
+        """Add the tasks the storage held before the listener was attached"""
+        if self._loaded:
+            return
+        loop = asyncio.get_running_loop()
+        if not self._live(self._load_task, loop):
+            self._load_task = loop.create_task(self._load())
+        await self._load_task
+    
+    async def _load(self) -> None:
+        self._deleted = set()
+        try:
+            for task in await self.storage.list_tasks():
+                # Saves and deletes seen during the load are newer than the listing
+                node = self._nodes.get(task.id)
+                if (node is None or not node.stored) and task.id not in self._deleted:
+                    self._update(task, stored=True, bulk=True)
+        except Exception:
+            self._load_task = None  # retried by the next ensure_loaded
+            raise
+        finally:
+            self._deleted = None
+        self._break_cycles()
+        for task_id in self._nodes:
+            self._count_unmet(task_id)
+        self._loaded = True
+        logger.debug(f"Scheduler loaded {len(self._nodes)} tasks")
+        if self._transitions:
+            self._schedule_apply()
+    
+    def _break_cycles(self) -> None:
+        """Reject the back edges of a depth-first walk, leaving a DAG
+        
+        The walk's finishing order (prerequisites first) becomes the
+        topological order.
+        """
+        state: dict[str, int] = {}  # 1 on the walk's stack, 2 finished
+        ord = self._ord
+        position = 0
+        for root in list(ord):
+            if root in state:
+                continue
+            state[root] = 1
+            stack = [(root, iter(list(self._deps.get(root, ()))))]
+            while stack:
+                task_id, deps = stack[-1]
+                for dep in deps:
+                    seen = state.get(dep)
+                    if seen == 1:
+                        self._unlink(task_id, dep)
+                        self._rejected.setdefault(task_id, set()).add(dep)
+                        logger.warning(f"Ignoring dependency {task_id} -> {dep}: it forms a cycle")
+                    elif seen is None:
+                        state[dep] = 1
+                        stack.append((dep, iter(list(self._deps.get(dep, ())))))
+                        break
+                else:
+                    state[task_id] = 2
+                    position += 1
+                    ord[task_id] = position
+                    stack.pop()
+        self._next_ord = position
+        self._first_ord = 0
+        self._version += 1
+    
+    def _schedule_apply(self) -> None:
+        if not self._loaded:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # written on the next flush()
+        if self._live(self._apply_task, loop) and not self._apply_task.done():
+            return
+        self._apply_task = loop.create_task(self._apply_transitions())
+    
+    async def _apply_transitions(self) -> None:
+        from agents.planner.planner_agent import TaskStatus
+        
+        while self._transitions:
+            batch = list(self._transitions)
+            self._transitions.clear()
+            changes = {}
+            for task_id in batch:
+                desired = self._desired_status(task_id)
+                if desired is not None and desired != self._nodes[task_id].status:
+                    changes[task_id] = (TaskStatus(self._nodes[task_id].status), TaskStatus(desired))
+            if not changes:
+                continue
+            try:
+                # Written only where the stored status is still the one the graph
+                # has, so a save landing meanwhile is not overwritten; its
+                # task.saved event refreshes the graph instead
+                changed = await self.storage.set_statuses_if(changes)
+            except asyncio.CancelledError:
+                self._transitions.update(changes)  # e.g. its loop shutting down
+                raise
+            if changed:
+                logger.info(f"Scheduler updated blocked state of {len(changed)} tasks")
+    
+    async def flush(self) -> None:
+        """Load the graph if needed and write pending status changes"""
+        await self.ensure_loaded()
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._live(self._apply_task, loop) and not self._apply_task.done():
+                await self._apply_task
+            elif self._transitions:
+                await self._apply_transitions()
+            else:
+                return
+    
+    # -- queries --
+    
+    def ready(self, limit: int | None = None) -> list[str]:
+        """Tasks that can start now (pending, all prerequisites completed)
+        
+        Highest priority, then oldest, first. Maintained incrementally, so
+        this costs only the size of the ready set.
+        """
+        key = lambda task_id: self._nodes[task_id].sort_key(task_id)
+        if limit is not None:
+            return heapq.nsmallest(limit, self._ready, key=key)
+        return sorted(self._ready, key=key)
+    
+    def blocked_by(self, task_id: str) -> list[str]:
+        """Unfinished prerequisites of a task"""
+        return sorted(dep for dep in self._deps.get(task_id, ()) if not self._is_done(dep))
+    
+    def rejected(self, task_id: str) -> list[str]:
+        """Dependencies of a task ignored because they would close a cycle"""
+        return sorted(self._rejected.get(task_id, ()))
+    
+    def would_cycle(self, task_id: str, depends_on: Iterable[str]) -> bool:
+        """Whether making task_id depend on these tasks would close a cycle"""
+        return any(self._reaches(dep, task_id) for dep in depends_on)
+    
+    def topological_order(self) -> list[str]:
+        """All tasks, prerequisites first; ties by priority, then age"""
+        return self.analyze().order
+    
+    def analyze(self) -> ScheduleAnalysis:
+        """Critical path and slack of the remaining work, cached until the graph changes"""
+        if self._analysis is not None and self._analysis[0] == self._version:
+            return self._analysis[1]
+        
+        nodes = self._nodes
+        deps_of = self._deps
+        dependents_of = self._dependents  # dependents are always known tasks
+        keys = {task_id: node.sort_key(task_id) for task_id, node in nodes.items()}
+        indegree = {}
+        for task_id, deps in deps_of.items():
+            count = sum(dep in nodes for dep in deps)
+            if count:
+                indegree[task_id] = count
+        heap = [key for task_id, key in keys.items() if task_id not in indegree]
+        heapq.heapify(heap)
+        order = []
+        while heap:
+            task_id = heapq.heappop(heap)[2]
+            order.append(task_id)
+            for dependent in dependents_of.get(task_id, ()):
+                count = indegree[dependent] - 1
+                indegree[dependent] = count
+                if not count:
+                    heapq.heappush(heap, keys[dependent])
+        
+        duration = {
+            task_id: 0.0 if node.status == _COMPLETED else node.hours
+            for task_id, node in nodes.items()
+        }
+        earliest_start: dict[str, float] = {}
+        earliest_finish: dict[str, float] = {}
+        for task_id in order:
+            deps = deps_of.get(task_id)
+            start = max([earliest_finish.get(dep, 0.0) for dep in deps]) if deps else 0.0
+            earliest_start[task_id] = start
+            earliest_finish[task_id] = start + duration[task_id]
+        total = max(earliest_finish.values(), default=0.0)
+        
+        latest_start: dict[str, float] = {}
+        slack: dict[str, float] = {}
+        for task_id in reversed(order):
+            dependents = dependents_of.get(task_id)
+            finish = min([latest_start[dependent] for dependent in dependents]) if dependents else total
+            latest_start[task_id] = start = finish - duration[task_id]
+            slack[task_id] = round(start - earliest_start[task_id], SLACK_PRECISION)
+        
+        critical_path = []
+        if total > 0:
+            task_id = max(order, key=lambda task_id: earliest_finish[task_id])
+            while task_id is not None:
+                critical_path.append(task_id)
+                task_id = next((
+                    dep for dep in self._deps.get(task_id, ())
+                    if dep in nodes and earliest_finish[dep] == earliest_start[task_id] and slack[dep] == 0
+                ), None)
+            critical_path.reverse()
+        
+        analysis = ScheduleAnalysis(
+            order=order,
+            earliest_start=earliest_start,
+            earliest_finish=earliest_finish,
+            slack=slack,
+            critical_path=critical_path,
+            total_hours=total
+        )
+        self._analysis = (self._version, analysis)
+        return analysis
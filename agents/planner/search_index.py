@@ -0,0 +1,252 @@
+"""
+Task search index
+Inverted token index and trigram index over task titles and descriptions
+"""
+
+from __future__ import annotations
+import fnmatch
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Any, Iterable
+
+if TYPE_CHECKING:
+    from agents.planner.planner_agent import Task, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Relevance boost for a glob match on the title rather than the description
+TITLE_MATCH_BOOST = 2.0
+
+# Stop narrowing glob candidates once a piece's postings exceed this many
+# times the candidate count (matching the candidates is cheaper then)
+UNION_TO_FILTER_RATIO = 4
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def glob_literals(pattern: str) -> list[str]:
+    """Literal substrings every match of a glob pattern must contain
+    
+    Splits on *, ? and [...] character classes the way fnmatch parses them.
+    """
+    literals = []
+    current = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        i += 1
+        if char in "*?":
+            literals.append("".join(current))
+            current = []
+        elif char == "[":
+            j = i
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                current.append(char)  # unclosed bracket is a literal "["
+            else:
+                literals.append("".join(current))
+                current = []
+                i = j + 1
+        else:
+            current.append(char)
+    literals.append("".join(current))
+    return [literal for literal in literals if literal]
+
+class TaskSearchIndex:
+    """Search index over task titles and descriptions
+    
+    Wire on_mutation to the storage listener hook. Tokens map to the tasks
+    containing them, and trigrams map to the tokens of the vocabulary. A glob
+    pattern is resolved by finding the tokens its literal parts can match
+    (through the trigrams), intersecting their task postings, and matching
+    only those candidates; token postings also rank the results.
+    """
+    
+    def __init__(self):
+        self._fields: dict[str, tuple[str, str]] = {}  # lowercased title, description
+        self._status: dict[str, TaskStatus] = {}
+        self._tokens: dict[str, dict[str, int]] = {}  # token -> {task_id: count}
+        self._trigrams: dict[str, set[str]] = defaultdict(set)  # trigram -> tokens
+        self._loaded = False
+        self._deleted: set[str] | None = None  # tasks deleted while a rebuild is running
+    
+    def __len__(self) -> int:
+        return len(self._fields)
+    
+    def on_mutation(self, event: str, payload: Any) -> None:
+        """Storage listener: keep the index in sync with saves and deletes"""
+        if event == 'task.saved':
+            self.add(payload)
+        elif event == 'task.deleted':
+            self.remove(payload)
+    
+    async def ensure_loaded(self, storage: Any) -> None:
+        """Index the tasks a storage held before the listener was attached"""
+        if self._loaded:
+            return
+        self._deleted = set()
+        try:
+            for task in await storage.list_tasks():
+                # Saves and deletes seen during the load are newer than the listing
+                if task.id not in self._fields and task.id not in self._deleted:
+                    self.add(task)
+        finally:
+            self._deleted = None
+        self._loaded = True
+        logger.debug(f"Search index loaded {len(self._fields)} tasks")
+    
+    def add(self, task: Task) -> None:
+        """Add or refresh a task; text is re-indexed only when it changed"""
+        self._status[task.id] = task.status
+        fields = (task.title.lower(), (task.description or "").lower())
+        previous = self._fields.get(task.id)
+        if previous == fields:
+            return
+        if previous is not None:
+            self._unindex(task.id, previous)
+        
+        self._fields[task.id] = fields
+        for token, count in Counter(_TOKEN_RE.findall(f"{fields[0]} {fields[1]}")).items():
+            postings = self._tokens.get(token)
+            if postings is None:
+                postings = self._tokens[token] = {}
+                for trigram in _trigrams(token):
+                    self._trigrams[trigram].add(token)
+            postings[task.id] = count
+    
+    def remove(self, task_id: str) -> None:
+        if self._deleted is not None:
+            self._deleted.add(task_id)
+        self._status.pop(task_id, None)
+        fields = self._fields.pop(task_id, None)
+        if fields is not None:
+            self._unindex(task_id, fields)
+    
+    def _unindex(self, task_id: str, fields: tuple[str, str]) -> None:
+        for token in set(_TOKEN_RE.findall(f"{fields[0]} {fields[1]}")):
+            postings = self._tokens[token]
+            postings.pop(task_id, None)
+            if postings:
+                continue
+            del self._tokens[token]
+            for trigram in _trigrams(token):
+                tokens = self._trigrams[trigram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[trigram]
+    
+    def _matching_tokens(self, piece: str, prefix: bool, suffix: bool) -> list[str]:
+        """Vocabulary tokens that can contain a word piece of a literal
+        
+        prefix/suffix mean the piece must start/end its token, because the
+        literal continues with a non-word character on that side.
+        """
+        if prefix and suffix:
+            return [piece] if piece in self._tokens else []
+        trigrams = _trigrams(piece)
+        if trigrams:
+            candidates = set.intersection(*(self._trigrams.get(trigram, set()) for trigram in trigrams))
+        else:
+            candidates = self._tokens.keys()
+        if prefix:
+            return [token for token in candidates if token.startswith(piece)]
+        if suffix:
+            return [token for token in candidates if token.endswith(piece)]
+        return [token for token in candidates if piece in token]
+    
+    def _candidates(self, literals: list[str]) -> Iterable[str]:
+        """Task IDs that may match: those with tokens matching the literals' word pieces
+        
+        Pieces are applied from the most selective; once the candidate set is
+        smaller than the next piece's postings, verifying the candidates is
+        cheaper than narrowing further. All tasks if no piece has postings
+        smaller than the index.
+        """
+        pieces = []
+        for literal in literals:
+            for found in _TOKEN_RE.finditer(literal):
+                tokens = self._matching_tokens(
+                    found.group(),
+                    prefix=found.start() > 0,
+                    suffix=found.end() < len(literal)
+                )
+                pieces.append((sum(len(self._tokens[token]) for token in tokens), tokens))
+        pieces.sort(key=lambda piece: piece[0])
+        
+        result = None
+        for size, tokens in pieces:
+            if result is not None and size > len(result) * UNION_TO_FILTER_RATIO:
+                break
+            if result is None and size >= len(self._fields):
+                break
+            posting = self._tokens[tokens[0]] if len(tokens) == 1 else set().union(*map(self._tokens.get, tokens))
+            if result is None:
+                result = set(posting)
+            else:
+                result.intersection_update(posting)
+            if not result:
+                break
+        return self._fields if result is None else result
+    
+    def _token_weights(self, tokens: Iterable[str]) -> list[tuple[dict[str, int], float]]:
+        """(postings, idf) of the query tokens present in the index"""
+        total = len(self._fields)
+        return [
+            (postings, math.log(1 + total / len(postings)))
+            for postings in map(self._tokens.get, tokens)
+            if postings
+        ]
+    
+    @staticmethod
+    def _token_score(task_id: str, weights: list[tuple[dict[str, int], float]]) -> float:
+        """tf-idf score of a task"""
+        score = 0.0
+        for postings, idf in weights:
+            count = postings.get(task_id)
+            if count:
+                score += (1 + math.log(count)) * idf
+        return score
+    
+    def match(self, pattern: str, status: TaskStatus | None = None) -> dict[str, float]:
+        """Scores of tasks whose title or description matches a glob pattern
+        
+        Same semantics as fnmatch on the lowercased title or description.
+        Title matches and matches on rarer words of the pattern score higher.
+        """
+        pattern = pattern.lower()
+        literals = glob_literals(pattern)
+        regex = re.compile(fnmatch.translate(pattern))
+        weights = self._token_weights(set(_TOKEN_RE.findall(" ".join(literals))))
+        
+        scores = {}
+        for task_id in self._candidates(literals):
+            if status is not None and self._status.get(task_id) != status:
+                continue
+            title, description = self._fields[task_id]
+            if regex.match(title):
+                boost = TITLE_MATCH_BOOST
+            elif regex.match(description):
+                boost = 1.0
+            else:
+                continue
+            scores[task_id] = boost + self._token_score(task_id, weights)
+        return scores
+    
+    def search(self, query: str, status: TaskStatus | None = None) -> dict[str, float]:
+        """tf-idf scores of tasks containing any word of a free-text query"""
+        weights = self._token_weights(set(_TOKEN_RE.findall(query.lower())))
+        task_ids = set().union(*(postings.keys() for postings, _ in weights))
+        return {
+            task_id: self._token_score(task_id, weights)
+            for task_id in task_ids
+            if status is None or self._status.get(task_id) == status
+        }
@@ -0,0 +1,285 @@
+"""
+Semantic task search
+Task embeddings in a memory-mapped float32 matrix, kept in sync through storage listeners
+"""
+
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+import numpy as np
+
+from agents.planner.embeddings import Embedder
+
+if TYPE_CHECKING:
+    from agents.planner.planner_agent import Task
+
+logger = logging.getLogger(__name__)
+
+class VectorStore:
+    """Unit-normalized float32 vectors by task ID, one row each
+    
+    With a path, the matrix is a memory-mapped .npy file that grows by
+    doubling, and the row map (with each row's text hash) is kept in
+    <path>.json, written by save(). Rows of removed tasks are reused.
+    """
+    
+    def __init__(self, dimension: int, path: str | Path | None = None, capacity: int = 1024):
+        self.dimension = dimension
+        self.path = Path(path) if path else None
+        self._rows: dict[str, int] = {}
+        self._hashes: dict[str, str] = {}
+        self._ids: list[str | None] = []  # row -> task ID, up to the high-water mark
+        self._free: list[int] = []
+        
+        if self.path and self.path.exists() and self._meta_path.exists():
+            self._load()
+        else:
+            self._matrix = self._allocate(self.path, capacity)
+        self._valid = np.zeros(len(self._matrix), dtype=bool)
+        self._valid[list(self._rows.values())] = True
+    
+    @property
+    def _meta_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".json")
+    
+    def _allocate(self, path: Path | None, capacity: int) -> np.ndarray:
+        if path is None:
+            return np.zeros((capacity, self.dimension), dtype=np.float32)
+        return np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(capacity, self.dimension))
+    
+    def _load(self) -> None:
+        self._matrix = np.load(self.path, mmap_mode="r+")
+        meta = json.loads(self._meta_path.read_text())
+        if meta["dimension"] != self.dimension:
+            raise ValueError(f"{self.path} holds {meta['dimension']}-d vectors, expected {self.dimension}")
+        self._ids = [None] * meta["size"]
+        for task_id, (row, text_hash) in meta["rows"].items():
+            self._rows[task_id] = row
+            self._hashes[task_id] = text_hash
+            self._ids[row] = task_id
+        self._free = [row for row, task_id in enumerate(self._ids) if task_id is None]
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def text_hash(self, task_id: str) -> str | None:
+        """Hash of the text the task's vector was computed from"""
+        return self._hashes.get(task_id)
+    
+    def _grow(self) -> None:
+        capacity = len(self._matrix) * 2
+        if self.path is None:
+            matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+            matrix[:len(self._matrix)] = self._matrix
+        else:
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            matrix = self._allocate(tmp, capacity)
+            matrix[:len(self._matrix)] = self._matrix
+            matrix.flush()
+            del self._matrix
+            os.replace(tmp, self.path)
+            matrix = np.load(self.path, mmap_mode="r+")
+        self._matrix = matrix
+        self._valid = np.concatenate([self._valid, np.zeros(capacity - len(self._valid), dtype=bool)])
+    
+    def put(self, task_ids: list[str], vectors: np.ndarray, text_hashes: list[str]) -> None:
+        """Store vectors (normalized here) for tasks, replacing earlier ones"""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        rows = []
+        for task_id in task_ids:
+            row = self._rows.get(task_id)
+            if row is None:
+                if self._free:
+                    row = self._free.pop()
+                else:
+                    if len(self._ids) == len(self._matrix):
+                        self._grow()
+                    row = len(self._ids)
+                    self._ids.append(None)
+                self._rows[task_id] = row
+                self._ids[row] = task_id
+                self._valid[row] = True
+            rows.append(row)
+        self._matrix[rows] = vectors
+        self._hashes.update(zip(task_ids, text_hashes))
+    
+    def remove(self, task_id: str) -> None:
+        row = self._rows.pop(task_id, None)
+        if row is None:
+            return
+        self._hashes.pop(task_id, None)
+        self._ids[row] = None
+        self._valid[row] = False
+        self._free.append(row)
+    
+    def top_k(self, query: np.ndarray, k: int, task_ids: Iterable[str] | None = None) -> list[tuple[str, float]]:
+        """(task ID, cosine similarity) of the k nearest vectors, best first
+        
+        task_ids restricts the search to those tasks.
+        """
+        size = len(self._ids)
+        if task_ids is None:
+            mask = self._valid[:size]
+        else:
+            mask = np.zeros(size, dtype=bool)
+            mask[[self._rows[task_id] for task_id in task_ids if task_id in self._rows]] = True
+        candidates = np.flatnonzero(mask)
+        k = min(k, len(candidates))
+        if k <= 0:
+            return []
+        
+        norm = np.linalg.norm(query)
+        query = (query / norm if norm else query).astype(np.float32, copy=False)
+        if len(candidates) == size:
+            scores = self._matrix[:size] @ query
+        else:
+            scores = np.full(size, -np.inf, dtype=np.float32)
+            scores[candidates] = self._matrix[candidates] @ query
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[row], float(scores[row])) for row in top]
+    
+    def save(self) -> None:
+        """Flush the memory map and write the row map"""
+        if self.path is None:
+            return
+        self._matrix.flush()
+        meta = {
+            "dimension": self.dimension,
+            "size": len(self._ids),
+            "rows": {task_id: [row, self._hashes[task_id]] for task_id, row in self._rows.items()}
+        }
+        tmp = self._meta_path.with_name(self._meta_path.name + ".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self._meta_path)
+
+class SemanticIndex:
+    """Task embeddings kept in sync with storage, searched by cosine similarity
+    
+    Wire on_mutation to the storage listener hook. Tasks whose title or
+    description changed are queued and embedded in batches in the
+    background; unchanged text is never re-embedded.
+    """
+    
+    def __init__(
+        self,
+        embedder: Embedder,
+        store: VectorStore | None = None,
+        batch_size: int = 64,
+        flush_interval: float = 0.05
+    ):
+        self.embedder = embedder
+        self.store = store if store is not None else VectorStore(embedder.dimension)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        
+        self._pending: dict[str, tuple[str, str]] = {}  # task ID -> (text, text hash)
+        self._versions: dict[str, int] = {}  # bumped per mutation, to drop stale embeddings
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._loaded = False
+    
+    @staticmethod
+    def task_text(task: Task) -> str:
+        return f"{task.title}\n{task.description or ''}"
+    
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+    
+    def on_mutation(self, event: str, payload: Any) -> None:
+        """Storage listener: queue changed tasks for embedding, drop deleted ones"""
+        if event == 'task.saved':
+            text = self.task_text(payload)
+            text_hash = self.text_hash(text)
+            queued = self._pending.get(payload.id)
+            if (queued[1] if queued else self.store.text_hash(payload.id)) == text_hash:
+                return
+            self._versions[payload.id] = self._versions.get(payload.id, 0) + 1
+            self._pending[payload.id] = (text, text_hash)
+            self._schedule()
+        elif event == 'task.deleted':
+            self._versions.pop(payload, None)
+            self._pending.pop(payload, None)
+            self.store.remove(payload)
+    
+    def _schedule(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # embedded on the next flush()
+        if len(self._pending) >= self.batch_size:
+            if self._flush_task is None or self._flush_task.done():
+                self._start_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, self._start_flush)
+    
+    def _start_flush(self) -> None:
+        """Kick off a background flush of the queue"""
+        self._flush_handle = None
+        self._flush_task = asyncio.ensure_future(self.flush())
+    
+    async def flush(self) -> None:
+        """Embed all queued tasks"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        async with self._lock:
+            while self._pending:
+                batch = []
+                for task_id in list(self._pending)[:self.batch_size]:
+                    text, text_hash = self._pending.pop(task_id)
+                    batch.append((task_id, text, text_hash, self._versions.get(task_id)))
+                try:
+                    vectors = await self.embedder.embed([text for _, text, _, _ in batch])
+                except Exception as e:
+                    logger.error(f"Embedding failed ({len(batch)} tasks): {e}")
+                    for task_id, text, text_hash, version in batch:
+                        if self._versions.get(task_id) == version:
+                            self._pending.setdefault(task_id, (text, text_hash))
+                    return
+                
+                # Skip tasks saved again or deleted while the batch was embedding
+                keep = [i for i, (task_id, _, _, version) in enumerate(batch) if self._versions.get(task_id) == version]
+                self.store.put(
+                    [batch[i][0] for i in keep],
+                    vectors[keep],
+                    [batch[i][2] for i in keep]
+                )
+                logger.debug(f"Embedded {len(keep)} tasks")
+    
+    async def ensure_loaded(self, storage: Any) -> None:
+        """Queue the tasks a storage held before the listener was attached
+        
+        Tasks whose vectors were loaded from disk with the same text are skipped.
+        """
+        if self._loaded:
+            return
+        for task in await storage.list_tasks():
+            self.on_mutation('task.saved', task)
+        self._loaded = True
+    
+    async def search(
+        self,
+        query: str,
+        k: int = 10,
+        task_ids: Iterable[str] | None = None
+    ) -> list[tuple[str, float]]:
+        """(task ID, similarity) of the k tasks closest to a query, best first"""
+        await self.flush()
+        vector = (await self.embedder.embed([query], input_type="query"))[0]
+        return self.store.top_k(vector, k, task_ids)
+    
+    async def close(self) -> None:
+        """Embed queued tasks and save the vector store"""
+        await self.flush()
+        self.store.save()
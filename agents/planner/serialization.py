@@ -0,0 +1,239 @@
+"""
+Task serialization
+Generated per-class encoders and decoders for dataclasses such as Task and TaskPlan,
+with JSON, orjson and msgpack back ends
+"""
+
+from __future__ import annotations
+import dataclasses
+import json
+import threading
+import typing
+from enum import Enum
+from typing import Any, Callable
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON back end
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: binary back end
+    msgpack = None
+
+FORMATS = ("json", "orjson", "msgpack")
+DEFAULT_FORMAT = "orjson" if orjson is not None else "json"
+
+# Field kinds, from the resolved type hints
+_SCALAR = "scalar"
+_ENUM = "enum"
+_DATACLASS = "dataclass"
+_DATACLASS_LIST = "dataclass_list"
+_LIST = "list"
+_PLAIN = "plain"
+
+_SCALAR_TYPES = (str, int, float, bool)
+
+_encoders: dict[tuple[type, tuple[str, ...]], Callable[[Any], dict]] = {}
+_decoders: dict[tuple[type, bool], Callable[[dict], Any]] = {}
+_views: dict[type, Callable[[Any], dict]] = {}
+_building: dict[Any, Callable] = {}  # compiled, nested references not yet bound
+_lock = threading.RLock()
+
+def _plain(value: Any) -> Any:
+    """Copy of nested dicts and lists, so results share no containers with the source"""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return to_dict(value)
+    return value
+
+def _kind(hint: Any) -> tuple[str, bool, type | None]:
+    """(kind, nullable, class) of a field's type hint"""
+    nullable = False
+    args = typing.get_args(hint)
+    if type(None) in args:
+        nullable = True
+        rest = [arg for arg in args if arg is not type(None)]
+        if len(rest) != 1:
+            return _PLAIN, nullable, None
+        hint = rest[0]
+    
+    origin = typing.get_origin(hint)
+    if origin in (list, tuple):
+        item = typing.get_args(hint)[0] if typing.get_args(hint) else Any
+        if isinstance(item, type) and dataclasses.is_dataclass(item):
+            return _DATACLASS_LIST, nullable, item
+        if isinstance(item, type) and issubclass(item, _SCALAR_TYPES):
+            return _LIST, nullable, None
+        return _PLAIN, nullable, None
+    if isinstance(hint, type):
+        if issubclass(hint, Enum):
+            return _ENUM, nullable, hint
+        if dataclasses.is_dataclass(hint):
+            return _DATACLASS, nullable, hint
+        if issubclass(hint, _SCALAR_TYPES):
+            return _SCALAR, nullable, None
+    return _PLAIN, nullable, None
+
+def _fields(cls: type) -> list[tuple[str, str, bool, type | None]]:
+    """(name, kind, nullable, class) for each init field of a dataclass"""
+    if not dataclasses.is_dataclass(cls):
+        raise TypeError(f"{cls.__name__} is not a dataclass")
+    hints = typing.get_type_hints(cls)
+    return [(f.name, *_kind(hints.get(f.name, Any))) for f in dataclasses.fields(cls) if f.init]
+
+def _compile(source: str, name: str, namespace: dict) -> Callable:
+    exec(compile(source, f"<serialization {name}>", "exec"), namespace)
+    return namespace[name]
+
+def _encoder(cls: type, exclude: tuple[str, ...] = ()) -> Callable[[Any], dict]:
+    """Generated function building a dict of the object's fields in one pass"""
+    encoder = _encoders.get((cls, exclude))
+    if encoder is not None:
+        return encoder
+    with _lock:
+        if (cls, exclude) in _encoders:
+            return _encoders[(cls, exclude)]
+        if ("encode", cls, exclude) in _building:
+            return _building[("encode", cls, exclude)]
+        namespace: dict[str, Any] = {"_plain": _plain}
+        nested: dict[str, type] = {}
+        items = []
+        for name, kind, nullable, sub in _fields(cls):
+            if name in exclude:
+                continue
+            value = f"obj.{name}"
+            if kind == _ENUM:
+                expr = f"{value}.value"
+            elif kind == _DATACLASS:
+                nested[f"_enc_{name}"] = sub
+                expr = f"_enc_{name}({value})"
+            elif kind == _DATACLASS_LIST:
+                nested[f"_enc_{name}"] = sub
+                expr = f"[_enc_{name}(item) for item in {value}]"
+            elif kind == _LIST:
+                expr = f"list({value})"
+            elif kind == _PLAIN:
+                expr = f"_plain({value})"
+            else:
+                expr = value
+            if nullable and kind != _SCALAR and kind != _PLAIN:
+                expr = f"None if {value} is None else {expr}"
+            items.append(f"        {name!r}: {expr},")
+        source = "def encode(obj):\n    return {\n" + "\n".join(items) + "\n    }\n"
+        encoder = _building[("encode", cls, exclude)] = _compile(source, "encode", namespace)
+        # Bound after compiling, so self-referencing classes (Task.subtasks) resolve to it
+        for name, sub in nested.items():
+            namespace[name] = _encoder(sub)
+        _encoders[(cls, exclude)] = _building.pop(("encode", cls, exclude))
+        return encoder
+
+def _decoder(cls: type, copy: bool = True) -> Callable[[dict], Any]:
+    """Generated function building an instance from a dict
+    
+    With copy, the dict and its containers are left untouched; without, they
+    are converted in place (for dicts freshly parsed by loads).
+    """
+    decoder = _decoders.get((cls, copy))
+    if decoder is not None:
+        return decoder
+    with _lock:
+        if (cls, copy) in _decoders:
+            return _decoders[(cls, copy)]
+        if ("decode", cls, copy) in _building:
+            return _building[("decode", cls, copy)]
+        namespace: dict[str, Any] = {"_cls": cls, "_plain": _plain}
+        nested: dict[str, type] = {}
+        lines = ["def decode(data):", "    kw = dict(data)" if copy else "    kw = data"]
+        for name, kind, nullable, sub in _fields(cls):
+            if kind == _SCALAR or (not copy and kind in (_LIST, _PLAIN)):
+                continue
+            value = f"kw[{name!r}]"
+            if kind == _ENUM:
+                namespace[f"_enum_{name}"] = sub
+                expr = f"_enum_{name}({value})"
+            elif kind == _DATACLASS:
+                nested[f"_dec_{name}"] = sub
+                expr = f"_dec_{name}({value})"
+            elif kind == _DATACLASS_LIST:
+                nested[f"_dec_{name}"] = sub
+                expr = f"[_dec_{name}(item) for item in {value}]"
+            elif kind == _LIST:
+                expr = f"list({value})"
+            else:
+                expr = f"_plain({value})"
+            if nullable and kind != _PLAIN:
+                expr = f"None if {value} is None else {expr}"
+            lines.append(f"    if {name!r} in kw:")
+            lines.append(f"        {value} = {expr}")
+        lines.append("    return _cls(**kw)")
+        decoder = _building[("decode", cls, copy)] = _compile("\n".join(lines) + "\n", "decode", namespace)
+        for name, sub in nested.items():
+            namespace[name] = _decoder(sub, copy)
+        _decoders[(cls, copy)] = _building.pop(("decode", cls, copy))
+        return decoder
+
+def _view(cls: type) -> Callable[[Any], dict]:
+    """Generated function returning the object's fields without converting them"""
+    view = _views.get(cls)
+    if view is None:
+        names = [f.name for f in dataclasses.fields(cls)]
+        source = "def view(obj):\n    return {" + ", ".join(f"{n!r}: obj.{n}" for n in names) + "}\n"
+        view = _views[cls] = _compile(source, "view", {})
+    return view
+
+def fields_view(obj: Any) -> Any:
+    """Encoder hook: dataclasses as shallow dicts, enums as their values, else str
+    
+    The encoders recurse into the returned dict themselves, so a tree is
+    converted once, on its way to bytes.
+    """
+    cls = type(obj)
+    if dataclasses.is_dataclass(cls):
+        return _view(cls)(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    return str(obj)
+
+def to_dict(obj: Any, exclude: tuple[str, ...] = ()) -> dict:
+    """Dict of a dataclass, with enums as values and nested dataclasses converted"""
+    return _encoder(type(obj), tuple(exclude))(obj)
+
+def from_dict(cls: type, data: dict) -> Any:
+    """Instance of cls from a to_dict() dict; data is not modified"""
+    return _decoder(cls)(data)
+
+def dumps(obj: Any, format: str = DEFAULT_FORMAT) -> bytes:
+    """Serialize dataclasses, lists and dicts of them in a single pass"""
+    if format == "orjson" and orjson is not None:
+        return orjson.dumps(obj, default=fields_view, option=orjson.OPT_NON_STR_KEYS)
+    if format in ("json", "orjson"):
+        return json.dumps(obj, default=fields_view, separators=(",", ":")).encode()
+    if format == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack format requires the msgpack package")
+        return msgpack.packb(obj, default=fields_view, use_bin_type=True)
+    raise ValueError(f"Unknown serialization format: {format}")
+
+def loads(data: bytes | str, cls: type | None = None, format: str = DEFAULT_FORMAT) -> Any:
+    """Parse serialized data; with cls, decode the object (or each item of a list) into it"""
+    if format == "orjson" and orjson is not None:
+        value = orjson.loads(data)
+    elif format in ("json", "orjson"):
+        value = json.loads(data)
+    elif format == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("msgpack format requires the msgpack package")
+        value = msgpack.unpackb(data, raw=False, strict_map_key=False)
+    else:
+        raise ValueError(f"Unknown serialization format: {format}")
+    if cls is None:
+        return value
+    decode = _decoder(cls, copy=False)  # the parsed value is ours to convert in place
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    return decode(value)
@@ -0,0 +1,420 @@
+"""
+SQLite-backed task storage
+Drop-in replacement for the in-memory TaskStorage
+"""
+
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from itertools import groupby
+from pathlib import Path
+from typing import Any
+
+from agents.planner import serialization
+from agents.planner.planner_agent import (
+    PRIORITY_RANK,
+    StorageListeners,
+    Task,
+    TaskPlan,
+    TaskPriority,
+    TaskStatus,
+    TaskStorage,
+)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    priority_rank INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    assigned_to TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_rank_order ON tasks(priority_rank, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_assigned_to ON tasks(assigned_to);
+CREATE TABLE IF NOT EXISTS task_tags (
+    task_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (tag, task_id)
+);
+CREATE INDEX IF NOT EXISTS idx_task_tags_task ON task_tags(task_id);
+CREATE TABLE IF NOT EXISTS plans (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    task_ids TEXT NOT NULL
+);
+"""
+
+# Constant statement strings so sqlite3's statement cache reuses the
+# prepared statements across calls
+_UPSERT_TASK = (
+    "INSERT OR REPLACE INTO tasks (id, status, priority, priority_rank, created_at, assigned_to, data) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_DELETE_TAGS = "DELETE FROM task_tags WHERE task_id = ?"
+_INSERT_TAG = "INSERT OR IGNORE INTO task_tags (task_id, tag) VALUES (?, ?)"
+_DELETE_TASK = "DELETE FROM tasks WHERE id = ?"
+_UPSERT_PLAN = "INSERT OR REPLACE INTO plans (id, data, task_ids) VALUES (?, ?, ?)"
+_SELECT_TASK = "SELECT data FROM tasks WHERE id = ?"
+_SELECT_TASK_STATUS = "SELECT status, data FROM tasks WHERE id = ?"
+_UPDATE_TASK_STATUS = "UPDATE tasks SET status = ?, data = ? WHERE id = ?"
+_SELECT_PLAN = "SELECT data, task_ids FROM plans WHERE id = ?"
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER for IN (...) lookups
+_IN_CHUNK = 500
+
+def _settle(future: asyncio.Future, error: BaseException | None) -> None:
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+
+class SqliteTaskStorage(StorageListeners):
+    """Persistent task storage on SQLite (WAL mode, group commits)
+    
+    Can be shared by callers on different event loops (e.g. server
+    threads): each write future is settled on its caller's loop, and the
+    flush timer runs on the storage's own loop thread.
+    """
+    
+    def __init__(
+        self,
+        path: str | Path = "tasks.db",
+        batch_size: int = 256,
+        flush_interval: float = 0.005
+    ):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        
+        # sqlite3 connections are not thread-safe, so every statement runs
+        # on this single worker thread, off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-storage")
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        
+        self._pending: list[tuple[tuple, asyncio.Future]] = []
+        self._pending_lock = threading.Lock()
+        self._writing: Future | None = None  # last batch handed to the storage thread
+        self._listeners = []
+        
+        # Flush timer loop, independent of the callers' loops
+        self._timer_loop = asyncio.new_event_loop()
+        self._timer_handle: asyncio.TimerHandle | None = None
+        self._timer_thread = threading.Thread(
+            target=self._timer_loop.run_forever, name="sqlite-storage-flush", daemon=True
+        )
+        self._timer_thread.start()
+    
+    async def __aenter__(self) -> SqliteTaskStorage:
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    async def _run(self, fn, *args) -> Any:
+        """Run blocking database call on the storage thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+    
+    def _write_batch(self, ops: list[tuple]) -> None:
+        """Apply queued write operations in a single transaction"""
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            for kind, group in groupby(ops, key=lambda op: op[0]):
+                group = list(group)
+                if kind == "task":
+                    conn.executemany(_UPSERT_TASK, [op[1] for op in group])
+                    conn.executemany(_DELETE_TAGS, [(op[1][0],) for op in group])
+                    conn.executemany(_INSERT_TAG, [tag for op in group for tag in op[2]])
+                elif kind == "delete":
+                    conn.executemany(_DELETE_TAGS, [(op[1],) for op in group])
+                    conn.executemany(_DELETE_TASK, [(op[1],) for op in group])
+                elif kind == "plan":
+                    conn.executemany(_UPSERT_PLAN, [op[1] for op in group])
+                elif kind == "status":
+                    for _, (task_id, expected, status, now), changed in group:
+                        row = conn.execute(_SELECT_TASK_STATUS, (task_id,)).fetchone()
+                        if row is None or row[0] not in (expected, status):
+                            continue
+                        task = serialization.loads(row[1], Task)
+                        task.status = TaskStatus(status)
+                        task.updated_at = now
+                        conn.execute(_UPDATE_TASK_STATUS, (status, serialization.dumps(task).decode(), task_id))
+                        changed.append(task)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    async def _enqueue(self, *ops: tuple) -> None:
+        """Queue write operations and wait for their group commit"""
+        future = asyncio.get_running_loop().create_future()
+        with self._pending_lock:
+            first = not self._pending
+            self._pending.extend((op, future) for op in ops)
+            full = len(self._pending) >= self.batch_size
+        
+        if full:
+            self._submit_pending()
+        elif first:
+            self._timer_loop.call_soon_threadsafe(self._arm_flush_timer)
+        
+        await future
+    
+    def _arm_flush_timer(self) -> None:
+        if self._timer_handle is None:
+            self._timer_handle = self._timer_loop.call_later(self.flush_interval, self._on_flush_timer)
+    
+    def _on_flush_timer(self) -> None:
+        self._timer_handle = None
+        self._submit_pending()
+    
+    def _submit_pending(self) -> Future | None:
+        """Hand the pending batch to the storage thread; returns the last submitted write
+        
+        Batches are submitted under the lock, so the single storage thread
+        commits them (and any read queued after them) in order.
+        """
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return self._writing
+            write = self._writing = self._executor.submit(self._write_batch, [op for op, _ in batch])
+        write.add_done_callback(lambda done: self._settle_batch(batch, done))
+        return write
+    
+    @staticmethod
+    def _settle_batch(batch: list[tuple[tuple, asyncio.Future]], write: Future) -> None:
+        """Settle each waiting future on its own event loop"""
+        error = write.exception()
+        if error is not None:
+            logger.error(f"SQLite batch write failed ({len(batch)} ops): {error}")
+        for future in dict.fromkeys(future for _, future in batch):
+            try:
+                future.get_loop().call_soon_threadsafe(_settle, future, error)
+            except RuntimeError:
+                pass  # the caller's loop is closed; nobody is waiting
+    
+    async def flush(self) -> None:
+        """Commit all pending writes"""
+        write = self._submit_pending()
+        if write is None or write.done():
+            return
+        try:
+            await asyncio.wrap_future(write)
+        except Exception:
+            pass  # reported to the writers by _settle_batch
+    
+    async def close(self) -> None:
+        """Flush pending writes and close the database"""
+        await self.flush()
+        self._timer_loop.call_soon_threadsafe(self._timer_loop.stop)
+        self._timer_thread.join()
+        self._timer_loop.close()
+        await self._run(self._conn.close)
+        self._executor.shutdown(wait=True)
+    
+    @staticmethod
+    def _task_op(task: Task) -> tuple:
+        row = (
+            task.id,
+            task.status.value,
+            task.priority.value,
+            PRIORITY_RANK[task.priority],
+            task.created_at,
+            task.assigned_to,
+            serialization.dumps(task).decode()
+        )
+        tags = [(task.id, tag) for tag in set(task.tags)]
+        return ("task", row, tags)
+    
+    @staticmethod
+    def _plan_op(plan: TaskPlan) -> tuple:
+        data = serialization.to_dict(plan, exclude=('tasks',))
+        task_ids = [t.id for t in plan.tasks]
+        return ("plan", (plan.id, json.dumps(data), json.dumps(task_ids)))
+    
+    def _select_tasks(self, sql: str, params: tuple) -> list[Task]:
+        rows = self._conn.execute(sql, params).fetchall()
+        return [serialization.loads(row[0], Task) for row in rows]
+    
+    def _select_tasks_by_ids(self, task_ids: list[str]) -> list[Task]:
+        found: dict[str, Task] = {}
+        for start in range(0, len(task_ids), _IN_CHUNK):
+            chunk = task_ids[start:start + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for task in self._select_tasks(
+                f"SELECT data FROM tasks WHERE id IN ({placeholders})", tuple(chunk)
+            ):
+                found[task.id] = task
+        return [found[task_id] for task_id in task_ids if task_id in found]
+    
+    def _select_plan(self, plan_id: str) -> TaskPlan | None:
+        row = self._conn.execute(_SELECT_PLAN, (plan_id,)).fetchone()
+        if row is None:
+            return None
+        plan = TaskPlan.from_dict(json.loads(row[0]))
+        plan.tasks = self._select_tasks_by_ids(json.loads(row[1]))
+        return plan
+    
+    async def save_task(self, task: Task) -> None:
+        """Save task"""
+        task.updated_at = datetime.now().isoformat()
+        await self._enqueue(self._task_op(task))
+        self._notify('task.saved', task)
+    
+    async def save_tasks(self, tasks: list[Task]) -> None:
+        """Save many tasks in one group commit"""
+        if not tasks:
+            return
+        now = datetime.now().isoformat()
+        for task in tasks:
+            task.updated_at = now
+        await self._enqueue(*(self._task_op(task) for task in tasks))
+        for task in tasks:
+            self._notify('task.saved', task)
+    
+    async def set_statuses_if(self, changes: dict[str, tuple[TaskStatus, TaskStatus]]) -> list[Task]:
+        """Move tasks from an expected status to a new one; returns the tasks updated
+        
+        The stored status is compared inside the write transaction, so a
+        task saved by someone else since the caller looked is left alone.
+        Tasks already in the new status count as updated, so retrying a
+        cancelled call is harmless.
+        """
+        if not changes:
+            return []
+        now = datetime.now().isoformat()
+        changed: list[Task] = []
+        await self._enqueue(*(
+            ("status", (task_id, expected.value, status.value, now), changed)
+            for task_id, (expected, status) in changes.items()
+        ))
+        for task in changed:
+            self._notify('task.saved', task)
+        return changed
+    
+    async def get_task(self, task_id: str) -> Task | None:
+        """Get task by ID"""
+        await self.flush()
+        tasks = await self._run(self._select_tasks, _SELECT_TASK, (task_id,))
+        return tasks[0] if tasks else None
+    
+    async def get_tasks(self, task_ids: list[str]) -> list[Task | None]:
+        """Get many tasks by ID, None for missing ones"""
+        await self.flush()
+        found = await self._run(self._select_tasks_by_ids, list(dict.fromkeys(task_ids)))
+        by_id = {task.id: task for task in found}
+        return [by_id.get(task_id) for task_id in task_ids]
+    
+    async def list_tasks(
+        self,
+        status: TaskStatus | None = None,
+        priority: TaskPriority | None = None,
+        tag: str | None = None,
+        assigned_to: str | None = None
+    ) -> list[Task]:
+        """List tasks with filters, ordered by (priority, created_at) descending"""
+        await self.flush()
+        
+        clauses = []
+        params: list[str] = []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status.value)
+        if priority is not None:
+            clauses.append("priority = ?")
+            params.append(priority.value)
+        if tag is not None:
+            clauses.append("id IN (SELECT task_id FROM task_tags WHERE tag = ?)")
+            params.append(tag)
+        if assigned_to is not None:
+            clauses.append("assigned_to = ?")
+            params.append(assigned_to)
+        
+        sql = "SELECT data FROM tasks"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY priority_rank DESC, created_at DESC, id DESC"
+        return await self._run(self._select_tasks, sql, tuple(params))
+    
+    async def list_tasks_in_range(
+        self,
+        start_id: str | None = None,
+        end_id: str | None = None,
+        limit: int | None = None
+    ) -> list[Task]:
+        """List tasks with start_id <= id < end_id in ID order"""
+        await self.flush()
+        
+        clauses = []
+        params: list[Any] = []
+        if start_id is not None:
+            clauses.append("id >= ?")
+            params.append(start_id)
+        if end_id is not None:
+            clauses.append("id < ?")
+            params.append(end_id)
+        
+        sql = "SELECT data FROM tasks"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return await self._run(self._select_tasks, sql, tuple(params))
+    
+    async def delete_task(self, task_id: str) -> bool:
+        """Delete task"""
+        if await self.get_task(task_id) is None:
+            return False
+        await self._enqueue(("delete", task_id))
+        self._notify('task.deleted', task_id)
+        return True
+    
+    async def save_plan(self, plan: TaskPlan) -> None:
+        """Save plan (and the tasks it contains)"""
+        plan.updated_at = datetime.now().isoformat()
+        ops = [self._task_op(task) for task in plan.tasks]
+        ops.append(self._plan_op(plan))
+        await self._enqueue(*ops)
+        for task in plan.tasks:
+            self._notify('task.saved', task)
+        self._notify('plan.saved', plan)
+    
+    async def get_plan(self, plan_id: str) -> TaskPlan | None:
+        """Get plan"""
+        await self.flush()
+        return await self._run(self._select_plan, plan_id)
+    
+    async def migrate_from(self, source: TaskStorage) -> int:
+        """Copy every task and plan from an in-memory TaskStorage
+        
+        Returns the number of tasks written. Runs as a single transaction
+        and preserves the source's updated_at timestamps.
+        """
+        ops = [self._task_op(task) for task in source.tasks.values()]
+        ops.extend(self._plan_op(plan) for plan in source.plans.values())
+        if not ops:
+            return 0
+        
+        await self.flush()
+        await self._run(self._write_batch, ops)
+        logger.info(f"Migrated {len(source.tasks)} tasks and {len(source.plans)} plans to {self.path}")
+        return len(source.tasks)
@@ -0,0 +1,36 @@
+"""Shared fixtures for the agents tests"""
+
+from __future__ import annotations
+
+import pytest
+from flask import Flask
+
+from agents.benchmarks.mock_anthropic import MockAnthropicServer
+from agents.planner.planner_agent import TaskPlannerAgent
+from agents.webhooks import webhook_handler
+from agents.webhooks.idempotency import IdempotencyCache
+
+@pytest.fixture
+def agent() -> TaskPlannerAgent:
+    """Planner with in-memory storage and a client that is never called"""
+    return TaskPlannerAgent(client=object())
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    """Local Messages API replying "Hello" after 0.2s, used by the shared client"""
+    with MockAnthropicServer(latency=0.2, reply="Hello") as server:
+        # The shared client picks up the mock through the SDK's environment variables
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", server.url)
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+        yield server
+
+@pytest.fixture
+def client(monkeypatch):
+    """Flask test client for the webhook blueprint, with fresh callback tables and caches"""
+    for name in ('webhook_callbacks', 'webhook_bulk_callbacks', 'webhook_stream_callbacks', '_registered_callbacks'):
+        monkeypatch.setattr(webhook_handler, name, {})
+    monkeypatch.setattr(webhook_handler, 'idempotency_cache', IdempotencyCache())
+    monkeypatch.setattr(webhook_handler, 'job_queue', None)
+    app = Flask(__name__)
+    app.register_blueprint(webhook_handler.webhook_bp)
+    return app.test_client()
@@ -0,0 +1,63 @@
+"""Tests for the bulk operations of TaskPlannerAgent"""
+
+from __future__ import annotations
+import asyncio
+
+from agents.planner.planner_agent import TaskStatus
+
+def test_create_tasks_reports_errors_per_item(agent):
+    async def scenario():
+        results = await agent.create_tasks([
+            {'title': "First", 'priority': 'high'},
+            {'description': "no title"},
+            {'title': "Bad priority", 'priority': 'urgent'},
+            {'title': "Second", 'estimated_hours': "2.5"},
+        ])
+        return agent, results
+    
+    agent, results = asyncio.run(scenario())
+    assert [r.ok for r in results] == [True, False, False, True]
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert results[3].task.estimated_hours == 2.5
+    assert set(agent.storage.tasks) == {results[0].task.id, results[3].task.id}
+
+def test_create_items_cannot_overwrite_existing_tasks(agent):
+    async def scenario():
+        existing = await agent.create_task("Existing", "keep me")
+        results = await agent.process_batch_webhook('create', [{'id': existing.id, 'title': "Overwrite"}])
+        return agent, existing, results
+    
+    agent, existing, results = asyncio.run(scenario())
+    assert results[0]['status'] == 'error'
+    assert "id" in results[0]['error']
+    assert agent.storage.tasks[existing.id].title == "Existing"
+
+def test_keep_ids_is_explicit(agent):
+    async def scenario():
+        results = await agent.create_tasks([{'id': "fixed-1", 'title': "Imported"}], keep_ids=True)
+        plan = await agent.plan_from_analysis({'tasks': [{'title': "Fix bug"}]}, "https://example.com/repo")
+        again = await agent.plan_from_analysis({'tasks': [{'title': "Fix bug"}]}, "https://example.com/repo")
+        return results, plan, again
+    
+    results, plan, again = asyncio.run(scenario())
+    assert results[0].task.id == "fixed-1"
+    assert [t.id for t in plan.tasks] == [t.id for t in again.tasks]
+
+def test_batch_status_updates_in_one_call(agent):
+    async def scenario():
+        created = await agent.create_tasks([{'title': f"Task {i}"} for i in range(3)])
+        ids = [r.task.id for r in created]
+        results = await agent.process_batch_webhook('status', [
+            {'task_id': ids[0], 'status': 'in_progress'},
+            {'task_id': ids[1], 'status': 'done'},
+            {'task_id': "missing", 'status': 'completed'},
+        ])
+        completed = await agent.process_batch_webhook('complete', [{'task_id': ids[2], 'actual_hours': 3}])
+        return agent, ids, results, completed
+    
+    agent, ids, results, completed = asyncio.run(scenario())
+    assert [r['status'] for r in results] == ['success', 'error', 'error']
+    assert agent.storage.tasks[ids[0]].status == TaskStatus.IN_PROGRESS
+    assert agent.storage.tasks[ids[1]].status == TaskStatus.PENDING
+    assert completed[0]['status'] == 'success'
+    assert agent.storage.tasks[ids[2]].actual_hours == 3
@@ -0,0 +1,75 @@
+"""Tests for the pooled async Anthropic client, against the local mock API"""
+
+from __future__ import annotations
+import asyncio
+import threading
+
+from agents.planner.planner_agent import TaskPlannerAgent, shared_anthropic_client
+from agents.planner.response_memo import ResponseMemo
+
+def make_agent(**options) -> TaskPlannerAgent:
+    return TaskPlannerAgent(response_memo=ResponseMemo(ttl=0), **options)
+
+def test_concurrent_calls_are_capped_by_max_concurrency(mock_api):
+    agent = make_agent(max_concurrency=3)
+    
+    async def scenario():
+        return await asyncio.gather(*(
+            agent.chat(f"message {i}", session_id=f"s{i}", use_tools=False) for i in range(9)
+        ))
+    
+    assert asyncio.run(scenario()) == ["Hello"] * 9
+    assert len(mock_api.requests) == 9
+    assert 2 <= mock_api.max_inflight <= 3
+
+def test_agent_serves_several_event_loops(mock_api):
+    agent = make_agent(max_concurrency=1)
+    clients = {}
+    errors = []
+    
+    def worker(n: int) -> None:
+        async def chats():
+            clients[n] = shared_anthropic_client()
+            return await asyncio.gather(*(
+                agent.chat(f"thread {n} message {i}", session_id=f"t{n}-{i}", use_tools=False) for i in range(3)
+            ))
+        try:
+            assert asyncio.run(asyncio.wait_for(chats(), timeout=30)) == ["Hello"] * 3
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert len({id(client) for client in clients.values()}) == 3
+    assert len(mock_api.requests) == 9
+
+def test_retries_retryable_errors(mock_api):
+    mock_api.error_rate = 1.0
+    agent = make_agent(max_retries=2)
+    
+    reply = asyncio.run(agent.chat("fails", use_tools=False))
+    assert reply.startswith("Sorry, I encountered an error")
+    assert len(mock_api.requests) == 3
+    assert agent.conversation_history == []
+
+def test_identical_requests_on_other_loops_share_one_call(mock_api):
+    mock_api.latency = 0.5
+    agent = TaskPlannerAgent(response_memo=ResponseMemo(ttl=60))
+    replies = []
+    
+    def worker() -> None:
+        replies.append(asyncio.run(asyncio.wait_for(agent.chat("same question", use_tools=False), timeout=30)))
+    
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert replies == ["Hello"] * 4
+    assert len(mock_api.requests) == 1
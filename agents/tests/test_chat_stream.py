@@ -0,0 +1,76 @@
+"""Tests for streamed chat replies and the SSE webhook"""
+
+from __future__ import annotations
+import asyncio
+import json
+
+from agents.planner.planner_agent import TaskPlannerAgent
+from agents.planner.response_memo import ResponseMemo
+from agents.webhooks import webhook_handler
+
+REPLY = "Three tasks are pending today"
+
+def make_agent(**options) -> TaskPlannerAgent:
+    return TaskPlannerAgent(response_memo=ResponseMemo(ttl=0), **options)
+
+def sse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+def test_chat_stream_yields_deltas_then_commits_the_turn(mock_api):
+    mock_api.reply = REPLY
+    agent = make_agent()
+    
+    async def scenario():
+        return [delta async for delta in agent.chat_stream("What is pending?", session_id="s")]
+    
+    deltas = asyncio.run(scenario())
+    assert len(deltas) == len(REPLY.split())
+    assert "".join(deltas) == REPLY
+    assert mock_api.requests[0]["stream"] is True
+    assert agent.conversations.get("s").to_messages() == [
+        {"role": "user", "content": "What is pending?"},
+        {"role": "assistant", "content": REPLY}
+    ]
+    assert agent.chat_metrics.stats()["streamed"] == 1
+
+def test_abandoned_and_failed_streams_leave_the_history_unchanged(mock_api):
+    mock_api.reply = REPLY
+    agent = make_agent(max_retries=0)
+    
+    async def first_delta():
+        stream = agent.chat_stream("Hello?", session_id="s")
+        delta = await anext(stream)
+        await stream.aclose()
+        return delta
+    
+    async def failed():
+        mock_api.error_rate = 1.0
+        return [delta async for delta in agent.chat_stream("Hello?", session_id="s")]
+    
+    assert asyncio.run(first_delta()) == "Three "
+    deltas = asyncio.run(failed())
+    assert len(deltas) == 1 and deltas[0].startswith("Sorry, I encountered an error")
+    assert agent.conversations.get("s").to_messages() == []
+
+def test_chat_webhook_streams_server_sent_events(mock_api, client):
+    mock_api.reply = REPLY
+    agent = make_agent()
+    webhook_handler.register_callback('chat', lambda p: agent.chat(p['message'], p.get('session_id', 'default'), use_tools=False))
+    webhook_handler.register_stream_callback('chat', lambda p: agent.chat_stream(p['message'], p.get('session_id', 'default')))
+    
+    streamed = client.post('/webhooks/chat', json={'message': "Hi", 'session_id': "a", 'stream': True})
+    by_accept = client.post('/webhooks/chat', json={'message': "Hi", 'session_id': "b"}, headers={'Accept': 'text/event-stream'})
+    plain = client.post('/webhooks/chat', json={'message': "Hi", 'session_id': "c"})
+    
+    for response in (streamed, by_accept):
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        events = sse_events(response.get_data(as_text=True))
+        assert events[-1] == ("done", {})
+        assert "".join(data['delta'] for _, data in events[:-1]) == REPLY
+    assert plain.get_json()['result'] == REPLY
+    assert client.post('/webhooks/chat', json={'stream': True}).status_code == 400
@@ -0,0 +1,77 @@
+"""Tests for the chat tool runner"""
+
+from __future__ import annotations
+import asyncio
+from types import SimpleNamespace
+
+from agents.planner.chat_tools import ChatToolRunner
+from agents.planner.planner_agent import TaskPlannerAgent, TaskStatus
+from agents.planner.response_memo import ResponseMemo
+
+def call(call_id: str, name: str, **args) -> SimpleNamespace:
+    return SimpleNamespace(id=call_id, name=name, input=args)
+
+def recording_runner(agent, events: list) -> ChatToolRunner:
+    """Runner whose tools log their start and end around a short sleep"""
+    runner = ChatToolRunner(agent)
+    
+    def tool(name: str, delay: float):
+        async def run(**args):
+            label = f"{name}:{args.get('task_id') or args.get('pattern')}"
+            events.append(("start", label))
+            await asyncio.sleep(delay)
+            events.append(("end", label))
+            if args.get('task_id') == "missing":
+                raise ValueError("Task not found: missing")
+            return {"tool": name, **args}
+        return run
+    
+    runner._handlers = {
+        "update_task_status": tool("status", 0.02),
+        "complete_task": tool("complete", 0.01),
+        "list_tasks_by_pattern": tool("list", 0.0),
+    }
+    return runner
+
+def test_writes_to_one_task_run_in_order_and_reads_run_last(agent):
+    events = []
+    runner = recording_runner(agent, events)
+    calls = [
+        call("1", "list_tasks_by_pattern", pattern="*"),
+        call("2", "update_task_status", task_id="a", status="in_progress"),
+        call("3", "update_task_status", task_id="b", status="in_progress"),
+        call("4", "complete_task", task_id="a"),
+        call("5", "complete_task", task_id="missing"),
+        call("6", "unknown_tool"),
+    ]
+    results = asyncio.run(runner.run_all(calls))
+    
+    assert [result["tool_use_id"] for result in results] == ["1", "2", "3", "4", "5", "6"]
+    assert [result.get("is_error", False) for result in results] == [False, False, False, False, True, True]
+    assert "Unknown tool" in results[5]["content"]
+    
+    starts = [label for kind, label in events if kind == "start"]
+    # Lanes for a, b and missing start together; a's second write waits for its first
+    assert starts[:3] == ["status:a", "status:b", "complete:missing"]
+    assert events.index(("end", "status:a")) < events.index(("start", "complete:a"))
+    # The read starts after every write has finished
+    last_write = max(i for i, (kind, label) in enumerate(events) if kind == "end" and not label.startswith("list"))
+    assert events.index(("start", "list:*")) > last_write
+
+def test_tool_calls_from_the_model_act_on_tasks(mock_api):
+    agent = TaskPlannerAgent(response_memo=ResponseMemo(ttl=0))
+    task = asyncio.run(agent.create_task("Deploy", ""))
+    mock_api.tool_calls = [
+        {"name": "create_task", "input": {"title": "Write docs", "priority": "high"}},
+        {"name": "update_task_status", "input": {"task_id": task.id, "status": "in_progress"}},
+        {"name": "complete_task", "input": {"task_id": task.id}},
+    ]
+    
+    reply = asyncio.run(agent.chat("Start and finish the deploy, then add docs", session_id="s"))
+    
+    assert reply == "Hello"
+    assert agent.storage.tasks[task.id].status == TaskStatus.COMPLETED
+    assert [t.title for t in agent.storage.tasks.values()] == ["Deploy", "Write docs"]
+    tool_results = mock_api.requests[1]["messages"][-1]["content"]
+    assert [block["tool_use_id"] for block in tool_results] == ["toolu_mock_0", "toolu_mock_1", "toolu_mock_2"]
+    assert not any(block.get("is_error") for block in tool_results)
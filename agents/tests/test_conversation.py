@@ -0,0 +1,75 @@
+"""Tests for token-budgeted chat sessions"""
+
+from __future__ import annotations
+
+from agents.planner.conversation import ConversationStore
+
+def exchange(store: ConversationStore, session, n: int, tokens: int = 10) -> None:
+    store.append(session, store.message("user", "u" * 4 * tokens), store.message("assistant", f"reply {n}".ljust(4 * tokens)))
+
+def test_sessions_are_trimmed_to_the_token_budget():
+    store = ConversationStore(token_budget=45)
+    session = store.get("s")
+    for n in range(5):
+        exchange(store, session, n)
+    
+    assert [m.role for m in session.messages] == ["user", "assistant", "user", "assistant"]
+    assert session.messages[-1].content.startswith("reply 4")
+    assert session.total_tokens == sum(m.tokens for m in session.messages) == 40
+
+def test_the_latest_exchange_is_kept_even_over_budget():
+    store = ConversationStore(token_budget=10)
+    session = store.get("s")
+    exchange(store, session, 0)
+    exchange(store, session, 1, tokens=50)
+    
+    assert len(session.messages) == 2
+    assert session.messages[-1].content.startswith("reply 1")
+    assert session.total_tokens == 100
+
+def test_history_always_starts_with_a_user_turn():
+    store = ConversationStore(token_budget=25)
+    session = store.get("s")
+    # A tool-style run of assistant turns between user turns
+    store.append(session, store.message("user", "u" * 40), store.message("assistant", "a" * 40), store.message("assistant", "b" * 40))
+    exchange(store, session, 1)
+    
+    assert session.messages[0].role == "user"
+    assert len(session.messages) == 2
+
+def test_dropped_turns_are_folded_into_the_summary():
+    calls = []
+    
+    def summarize(summary: str, dropped: list) -> str:
+        calls.append([m.content[:7] for m in dropped])
+        return (summary + " " + ",".join(m.role for m in dropped)).strip()
+    
+    store = ConversationStore(token_budget=25, summarizer=summarize)
+    session = store.get("s")
+    for n in range(3):
+        exchange(store, session, n)
+    
+    assert calls == [["uuuuuuu", "reply 0"], ["uuuuuuu", "reply 1"]]
+    assert session.summary == "user,assistant user,assistant"
+
+def test_summary_reaches_the_system_prompt(agent):
+    session = agent.conversations.get("s")
+    assert len(agent._chat_system_prompt(session)) == 1
+    session.summary = "Talked about deploys"
+    assert agent._chat_system_prompt(session)[-1]["text"].endswith("Talked about deploys")
+
+def test_idle_and_least_recently_used_sessions_are_evicted():
+    store = ConversationStore(max_sessions=2, ttl=60)
+    
+    first = store.get("a")
+    store.get("b")
+    assert store.get("a") is first  # a is now the most recently used
+    third = store.get("c")
+    assert len(store) == 2
+    assert store.get("a") is first  # b was evicted
+    
+    for session in (first, third):
+        session.last_used -= 61
+    store.get("d")
+    assert len(store) == 1
+    assert store.get("a") is not first
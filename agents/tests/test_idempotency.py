@@ -0,0 +1,174 @@
+"""Tests for idempotent webhook deliveries"""
+
+from __future__ import annotations
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agents.webhooks import webhook_handler
+from agents.webhooks.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, CachedResponse, IdempotencyCache
+
+def test_retried_delivery_is_replayed(client):
+    calls = []
+    
+    async def callback(payload: dict) -> int:
+        calls.append(payload)
+        return len(calls)
+    
+    webhook_handler.register_callback('task.status', callback)
+    headers = {IDEMPOTENCY_HEADER: "delivery-1"}
+    first = client.post('/webhooks/task/status', json={'status': 'done'}, headers=headers)
+    retry = client.post('/webhooks/task/status', json={'status': 'done'}, headers=headers)
+    other = client.post('/webhooks/task/status', json={'status': 'done'}, headers={IDEMPOTENCY_HEADER: "delivery-2"})
+    
+    assert len(calls) == 2
+    assert REPLAYED_HEADER not in first.headers
+    assert retry.headers[REPLAYED_HEADER] == 'true'
+    assert retry.get_data() == first.get_data()
+    assert retry.status_code == first.status_code == 200
+    assert other.get_json()['result'] == 2
+    assert webhook_handler.idempotency_cache.stats()['replays'] == 1
+
+def test_identical_task_create_payloads_create_one_task(client, agent):
+    webhook_handler.register_callback('task.create', lambda payload: agent.process_webhook('task.create', payload))
+    
+    body = {'title': "Deploy", 'description': "Ship it", 'priority': 'high'}
+    first = client.post('/webhooks/task/create', json=body)
+    again = client.post('/webhooks/task/create', json=dict(reversed(body.items())))
+    different = client.post('/webhooks/task/create', json={**body, 'priority': 'low'})
+    
+    assert first.status_code == again.status_code == 201
+    assert again.headers[REPLAYED_HEADER] == 'true'
+    assert REPLAYED_HEADER not in different.headers
+    assert len(agent.storage.tasks) == 2
+
+def test_errors_are_not_cached(client):
+    calls = []
+    
+    async def flaky(payload: dict) -> str:
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("try again")
+        return "ok"
+    
+    webhook_handler.register_callback('task.complete', flaky)
+    headers = {IDEMPOTENCY_HEADER: "retry-me"}
+    assert client.post('/webhooks/task/complete', json={}, headers=headers).status_code == 500
+    retry = client.post('/webhooks/task/complete', json={}, headers=headers)
+    assert retry.get_json()['result'] == "ok"
+    assert REPLAYED_HEADER not in retry.headers
+
+def test_concurrent_duplicates_wait_for_the_first_delivery(client):
+    calls = []
+    
+    async def slow(payload: dict) -> int:
+        calls.append(payload)
+        await asyncio.sleep(0.2)
+        return len(calls)
+    
+    webhook_handler.register_callback('task.error', slow)
+    
+    def deliver(_: int):
+        response = client.post('/webhooks/task/error', json={}, headers={IDEMPOTENCY_HEADER: "same"})
+        return response.get_json()['result'], response.headers.get(REPLAYED_HEADER)
+    
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(deliver, range(4)))
+    
+    assert len(calls) == 1
+    assert [result for result, _ in responses] == [1, 1, 1, 1]
+    assert sorted(replayed or '' for _, replayed in responses) == ['', 'true', 'true', 'true']
+    assert webhook_handler.idempotency_cache.stats()['coalesced'] >= 1
+
+def test_cache_expires_and_evicts():
+    cache = IdempotencyCache(ttl=0.05, max_entries=2)
+    response = CachedResponse(b"{}", 200, ())
+    for key in ("a", "b", "c"):
+        assert cache.begin(key) is None
+        cache.finish(key, response, store=True)
+    
+    assert cache.begin("a") is None  # evicted, runs again
+    cache.finish("a", None, store=False)
+    assert cache.begin("c") == response
+    time.sleep(0.1)
+    assert cache.begin("c") is None  # expired
+
+def test_payload_key_ignores_key_order_and_header_wins():
+    key = IdempotencyCache.key
+    assert key('task.create', None, {'a': 1, 'b': 2}) == key('task.create', None, {'b': 2, 'a': 1})
+    assert key('task.create', None, {'a': 1}) != key('task.status', None, {'a': 1})
+    assert key('task.create', "abc", {'a': 1}) == key('task.create', "abc", {'a': 2})
+    assert key('task.status', None, None) is None
+
+def test_repeated_status_batches_apply_again(client, agent):
+    webhook_handler.register_bulk_callback('batch.status', lambda items: agent.process_batch_webhook('status', items))
+    task = asyncio.run(agent.create_task("Deploy", ""))
+    
+    def batch(status: str):
+        return client.post('/webhooks/batch/process', json={
+            'operation': 'status',
+            'tasks': [{'task_id': task.id, 'status': status}]
+        })
+    
+    batch('in_progress')
+    batch('pending')
+    again = batch('in_progress')
+    
+    assert REPLAYED_HEADER not in again.headers
+    assert agent.storage.tasks[task.id].status.value == 'in_progress'
+
+def test_create_batches_are_deduplicated_by_payload(client, agent):
+    webhook_handler.register_bulk_callback('batch.create', lambda items: agent.process_batch_webhook('create', items))
+    body = {'operation': 'create', 'tasks': [{'title': "Deploy"}]}
+    client.post('/webhooks/batch/process', json=body)
+    again = client.post('/webhooks/batch/process', json=body)
+    
+    assert again.headers[REPLAYED_HEADER] == 'true'
+    assert len(agent.storage.tasks) == 1
+
+def test_only_create_events_are_deduplicated_without_a_key(client, agent):
+    applied = []
+    
+    async def update_status(payload: dict) -> dict:
+        applied.append('task.status')
+        return await agent.process_webhook('task.status', payload)
+    
+    async def update_statuses(items: list[dict]) -> list[dict]:
+        applied.append('batch.status')
+        return await agent.process_batch_webhook('status', items)
+    
+    webhook_handler.register_callback('task.status', update_status)
+    webhook_handler.register_bulk_callback('batch.status', update_statuses)
+    webhook_handler.register_callback('task.create', lambda payload: agent.process_webhook('task.create', payload))
+    task = asyncio.run(agent.create_task("Deploy", ""))
+    
+    status = {'task_id': task.id, 'status': 'in_progress'}
+    batch = {'operation': 'status', 'tasks': [status]}
+    for _ in range(2):
+        assert REPLAYED_HEADER not in client.post('/webhooks/task/status', json=status).headers
+        assert REPLAYED_HEADER not in client.post('/webhooks/batch/process', json=batch).headers
+    assert applied == ['task.status', 'batch.status'] * 2
+    
+    # A recurring task with the same body is one task within the TTL...
+    standup = {'title': "Daily standup", 'description': "15 minutes"}
+    client.post('/webhooks/task/create', json=standup)
+    assert client.post('/webhooks/task/create', json=standup).headers[REPLAYED_HEADER] == 'true'
+    assert len(agent.storage.tasks) == 2
+    # ...unless each occurrence carries its own key
+    client.post('/webhooks/task/create', json=standup, headers={IDEMPOTENCY_HEADER: "standup-2"})
+    assert len(agent.storage.tasks) == 3
+
+def test_payload_keys_can_expire_sooner():
+    cache = IdempotencyCache(ttl=60, payload_ttl=0.05)
+    response = CachedResponse(b"{}", 200, ())
+    header_key = cache.key('task.create', "abc", None)
+    payload_key = cache.key('task.create', None, {'title': "Standup"})
+    for key in (header_key, payload_key):
+        assert cache.begin(key) is None
+        cache.finish(key, response, store=True)
+    
+    time.sleep(0.1)
+    assert cache.begin(header_key) == response
+    assert cache.begin(payload_key) is None
@@ -0,0 +1,79 @@
+"""Tests for the task ID generators"""
+
+from __future__ import annotations
+from datetime import datetime, timezone
+
+import pytest
+
+from agents.planner import ids
+from agents.planner.ids import SnowflakeGenerator, UlidGenerator, stable_id
+
+class Clock:
+    """Stand-in for ids._now_ms that only moves when told to"""
+    
+    def __init__(self, ms: int):
+        self.ms = ms
+    
+    def __call__(self) -> int:
+        return self.ms
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock(1_760_000_000_000)
+    monkeypatch.setattr(ids, "_now_ms", clock)
+    return clock
+
+@pytest.mark.parametrize("generator", [UlidGenerator(), SnowflakeGenerator(node_id=5)], ids=["ulid", "snowflake"])
+def test_ids_sort_in_generation_order_despite_clock_skew(clock, generator):
+    generated = []
+    for step in (0, 0, 1, -50, -1, 0, 60, 0):  # same millisecond, then the clock moves back and forward
+        clock.ms += step
+        generated.append(generator.new_id())
+    
+    assert generated == sorted(generated)
+    assert len(set(generated)) == len(generated)
+    assert len({len(id_) for id_ in generated}) == 1
+    # While the clock is behind, IDs stay on the last timestamp seen
+    stamps = [generator.timestamp(id_) for id_ in generated]
+    assert stamps[3] == stamps[4] == stamps[5] == stamps[2]
+    assert stamps[-1] == datetime.fromtimestamp(clock.ms / 1000, tz=timezone.utc)
+
+@pytest.mark.parametrize("generator", [UlidGenerator(), SnowflakeGenerator()], ids=["ulid", "snowflake"])
+def test_bound_splits_ids_by_time(clock, generator):
+    before = generator.new_id("plan")
+    clock.ms += 5
+    after = generator.new_id("plan")
+    cutoff = datetime.fromtimestamp(clock.ms / 1000, tz=timezone.utc)
+    
+    assert before < generator.bound(cutoff, "plan") <= after
+    assert generator.timestamp(after) == cutoff
+
+def test_snowflake_borrows_the_next_millisecond_when_the_sequence_runs_out(clock):
+    generator = SnowflakeGenerator(node_id=1)
+    generated = [generator.new_id() for _ in range((1 << SnowflakeGenerator.SEQUENCE_BITS) + 1)]
+    
+    assert generated == sorted(generated)
+    assert generator.timestamp(generated[-1]).timestamp() * 1000 == clock.ms + 1
+
+def test_ulid_moves_to_the_next_millisecond_when_the_random_part_overflows(clock):
+    generator = UlidGenerator()
+    first = generator.new_id()
+    generator._last_rand = (1 << 80) - 1
+    second = generator.new_id()
+    
+    assert first < second
+    assert generator.timestamp(second).timestamp() * 1000 == clock.ms + 1
+
+def test_snowflake_node_ids():
+    assert SnowflakeGenerator(node_id=3).node_id == 3
+    with pytest.raises(ValueError):
+        SnowflakeGenerator(node_id=1 << SnowflakeGenerator.NODE_BITS)
+
+def test_snowflake_node_id_defaults_to_the_environment(monkeypatch):
+    monkeypatch.setenv("TASK_NODE_ID", "7")
+    assert SnowflakeGenerator().node_id == 7
+
+def test_stable_ids_are_deterministic():
+    assert stable_id("task", "repo:Fix login") == stable_id("task", "repo:Fix login")
+    assert stable_id("task", "repo:Fix login") != stable_id("task", "repo:Add tests")
+    assert stable_id("task", "x").startswith("task-")
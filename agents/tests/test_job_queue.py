@@ -0,0 +1,187 @@
+"""Tests for the webhook job queue"""
+
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from agents.webhooks import webhook_handler
+from agents.webhooks.job_queue import JobQueue, JobStatus, QueueFull
+
+def wait_for(queue: JobQueue, job_id: str, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job is not None and job.done:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"{job_id} did not finish")
+
+def test_jobs_run_by_priority_lane_then_fifo():
+    order = []
+    
+    async def record(payload: dict) -> str:
+        order.append(payload['name'])
+        return payload['name']
+    
+    queue = JobQueue({'task.create': record}, workers=1)
+    jobs = [
+        queue.submit('task.create', {'name': name, 'priority': priority})
+        for name, priority in [("low", 'low'), ("medium-1", None), ("critical", 'critical'), ("medium-2", 'medium'), ("bogus", 'urgent')]
+    ]
+    queue.start()
+    try:
+        for job in jobs:
+            wait_for(queue, job.id)
+    finally:
+        queue.close()
+    
+    assert order == ["critical", "medium-1", "medium-2", "bogus", "low"]
+    assert queue.get(jobs[0].id).result == "low"
+
+def test_failed_jobs_and_missing_callbacks():
+    async def fail(payload: dict) -> None:
+        raise ValueError("broken")
+    
+    queue = JobQueue({'task.error': fail})
+    queue.start()
+    try:
+        failed = wait_for(queue, queue.submit('task.error', {}).id)
+        missing = wait_for(queue, queue.submit('task.other', {}).id)
+    finally:
+        queue.close()
+    
+    assert (failed.status, failed.error) == (JobStatus.FAILED, "broken")
+    assert missing.status == JobStatus.FAILED
+    assert "No callback" in missing.error
+
+def test_submit_raises_when_full():
+    queue = JobQueue({}, max_pending=2)
+    queue.submit('task.create', {})
+    queue.submit('task.create', {})
+    with pytest.raises(QueueFull):
+        queue.submit('task.create', {})
+    assert queue.stats()['pending'] == 2
+
+def test_concurrent_submits_stay_within_max_pending():
+    queue = JobQueue({}, max_pending=50)
+    
+    def submit_many(_: int) -> int:
+        accepted = 0
+        for _ in range(40):
+            try:
+                queue.submit('task.create', {})
+                accepted += 1
+            except QueueFull:
+                pass
+        return accepted
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        accepted = sum(pool.map(submit_many, range(8)))
+    assert accepted == len(queue) == 50
+
+def test_workers_journal_off_the_event_loop(tmp_path):
+    journaled = []
+    
+    async def record(payload: dict) -> None:
+        return None
+    
+    queue = JobQueue({'task.create': record}, path=tmp_path / "jobs.db")
+    journal = queue._journal
+    
+    def tracking_journal(job):
+        journaled.append((job.status, threading.current_thread().name))
+        journal(job)
+    
+    queue._journal = tracking_journal
+    queue.start()
+    try:
+        wait_for(queue, queue.submit('task.create', {}).id)
+    finally:
+        queue.close()
+    
+    assert [status for status, _ in journaled] == [JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.SUCCEEDED]
+    assert all(name.startswith("job-journal") for _, name in journaled[1:])
+
+def test_unfinished_jobs_are_recovered_from_the_journal(tmp_path):
+    path = tmp_path / "jobs.db"
+    ran = []
+    
+    async def record(payload: dict) -> int:
+        ran.append(payload['n'])
+        return payload['n']
+    
+    first = JobQueue({'task.create': record}, path=path)
+    queued = [first.submit('task.create', {'n': n}) for n in range(3)]
+    # Interrupted mid-run on the last start
+    running = first.submit('task.create', {'n': 3})
+    running.status = JobStatus.RUNNING
+    running.attempts = 1
+    first._journal(running)
+    first.close()
+    
+    second = JobQueue({'task.create': record}, path=path)
+    assert len(second) == 4
+    second.start()
+    try:
+        results = [wait_for(second, job.id) for job in [*queued, running]]
+    finally:
+        second.close()
+    
+    assert sorted(ran) == [0, 1, 2, 3]
+    assert [job.result for job in results] == [0, 1, 2, 3]
+    assert results[-1].attempts == 2
+    
+    # Finished jobs are still visible after another restart, and not run again
+    third = JobQueue({'task.create': record}, path=path)
+    assert len(third) == 0
+    assert third.get(queued[0].id).status == JobStatus.SUCCEEDED
+    third.close()
+
+def test_jobs_interrupted_too_often_are_failed(tmp_path):
+    path = tmp_path / "jobs.db"
+    queue = JobQueue({}, path=path)
+    job = queue.submit('task.create', {})
+    job.status = JobStatus.RUNNING
+    job.attempts = 3
+    queue._journal(job)
+    queue.close()
+    
+    recovered = JobQueue({}, path=path)
+    assert len(recovered) == 0
+    assert recovered.get(job.id).status == JobStatus.FAILED
+    recovered.close()
+
+def test_webhooks_answer_202_then_429_when_full(client):
+    release = asyncio.Event()
+    
+    async def slow(payload: dict) -> dict:
+        await release.wait()
+        return {'n': payload['n']}
+    
+    webhook_handler.register_callback('task.status', slow)
+    queue = JobQueue(webhook_handler.webhook_callbacks, workers=1, max_pending=1)
+    webhook_handler.enable_job_queue(queue)
+    try:
+        first = client.post('/webhooks/task/status', json={'n': 1})
+        assert first.status_code == 202
+        # Wait for the worker to take the first job, so one more fits
+        while len(queue):
+            time.sleep(0.01)
+        assert client.post('/webhooks/task/status', json={'n': 2}).status_code == 202
+        
+        full = client.post('/webhooks/task/status', json={'n': 3})
+        assert full.status_code == 429
+        assert full.headers['Retry-After'] == str(webhook_handler.JOB_RETRY_AFTER)
+        
+        status = client.get(first.headers['Location']).get_json()
+        assert status['status'] == 'running'
+        webhook_handler._event_loop().call_soon_threadsafe(release.set)
+        job = wait_for(queue, first.get_json()['job_id'])
+        assert job.result == {'n': 1}
+        assert client.get('/webhooks/jobs/missing').status_code == 404
+    finally:
+        queue.close()
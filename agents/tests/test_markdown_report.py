@@ -0,0 +1,66 @@
+"""Tests for streamed markdown reports"""
+
+from __future__ import annotations
+import asyncio
+
+from agents.planner import planner_agent
+from agents.webhooks import webhook_handler
+
+def without_title(report: str) -> str:
+    """Report minus its title, which carries the generation time"""
+    return report.split("\n\n", 1)[1]
+
+async def mixed_tasks(agent) -> None:
+    for n in range(5):
+        await agent.create_task(f"Pending {n}", "", tags=["backend"])
+    started = await agent.create_task("Started", "", estimated_hours=2)
+    await agent.update_task_status(started.id, "in_progress")
+    done = await agent.create_task("Done", "")
+    await agent.complete_task(done.id, actual_hours=1)
+    broken = await agent.create_task("Broken", "")
+    await agent.mark_task_error(broken.id, "boom")
+
+def test_streamed_report_matches_the_built_one(agent):
+    async def scenario():
+        await mixed_tasks(agent)
+        chunks = [chunk async for chunk in agent.iter_markdown_report()]
+        return chunks, await agent.generate_markdown_report()
+    
+    chunks, built = asyncio.run(scenario())
+    assert without_title("".join(chunks)) == without_title(built)
+    assert chunks[-1].startswith("## Summary")
+    assert "- Total Tasks: 8\n" in chunks[-1]
+    headers = [chunk for chunk in chunks if chunk.startswith("### ")]
+    assert headers == ["### In Progress (1)\n\n", "### Pending (5)\n\n", "### Completed (1)\n\n", "### Failed (1)\n\n"]
+
+def test_large_sections_are_yielded_in_chunks(agent, monkeypatch):
+    monkeypatch.setattr(planner_agent, "REPORT_CHUNK_TASKS", 2)
+    ticks = 0
+    
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+    
+    async def scenario():
+        await mixed_tasks(agent)
+        background = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        start = ticks
+        chunks = [chunk async for chunk in agent.iter_markdown_report()]
+        background.cancel()
+        return chunks, ticks - start
+    
+    chunks, ticks_during = asyncio.run(scenario())
+    pending = chunks[chunks.index("### Pending (5)\n\n") + 1:chunks.index("### Completed (1)\n\n")]
+    assert [chunk.count("- **") for chunk in pending] == [2, 2, 1]
+    assert ticks_during >= 2  # other coroutines ran between full chunks
+
+def test_report_route_streams_the_report(client, agent):
+    asyncio.run(mixed_tasks(agent))
+    webhook_handler.register_stream_callback('report.generate', lambda payload: agent.iter_markdown_report(payload.get('plan_id')))
+    response = client.post('/webhooks/report/generate', json={'stream': True})
+    
+    assert response.is_streamed
+    assert without_title(response.get_data(as_text=True)) == without_title(asyncio.run(agent.generate_markdown_report()))
@@ -0,0 +1,91 @@
+"""Tests for the incremental report cache"""
+
+from __future__ import annotations
+import asyncio
+
+from agents.planner.planner_agent import TaskPlannerAgent, TaskStatus
+from agents.planner.sqlite_storage import SqliteTaskStorage
+
+ANALYSIS = {'tasks': [{'title': "Fix login"}, {'title': "Add tests"}, {'title': "Update docs"}]}
+REPO = "https://example.com/repo"
+
+def test_task_mutations_patch_only_affected_sections(agent):
+    async def scenario():
+        plan = await agent.plan_from_analysis(ANALYSIS, REPO)
+        first = await agent.generate_markdown_report(plan.id)
+        again = await agent.generate_markdown_report(plan.id)
+        await agent.update_task_status(plan.tasks[0].id, 'in_progress')
+        patched = await agent.generate_markdown_report(plan.id)
+        return agent, first, again, patched
+    
+    agent, first, again, patched = asyncio.run(scenario())
+    assert "### In Progress" not in first
+    assert again == first
+    assert "### In Progress (1)" in patched
+    assert "### Pending (2)" in patched
+    assert agent.report_cache.stats()['hits'] >= 1
+    assert agent.report_cache.stats()['patches'] == 1
+
+def test_plan_reports_follow_mutations_after_reopening_storage(tmp_path):
+    path = tmp_path / "tasks.db"
+    
+    async def create():
+        async with SqliteTaskStorage(path) as storage:
+            plan = await TaskPlannerAgent(storage=storage, client=object()).plan_from_analysis(ANALYSIS, REPO)
+        return plan.id, plan.tasks[0].id
+    
+    async def reopen(plan_id: str, task_id: str):
+        async with SqliteTaskStorage(path) as storage:
+            agent = TaskPlannerAgent(storage=storage, client=object())
+            before = await agent.generate_markdown_report(plan_id)
+            await agent.update_task_status(task_id, 'in_progress')
+            after = await agent.generate_markdown_report(plan_id)
+            stored = await storage.get_task(task_id)
+        return before, after, stored
+    
+    plan_id, task_id = asyncio.run(create())
+    before, after, stored = asyncio.run(reopen(plan_id, task_id))
+    assert stored.status == TaskStatus.IN_PROGRESS
+    assert "### In Progress" not in before
+    assert "### In Progress (1)" in after
+
+class MutatingStorage(SqliteTaskStorage):
+    """Saves `mutation` (a task copy) while a plan is being loaded, once"""
+    
+    mutation = None
+    
+    async def get_plan(self, plan_id: str):
+        plan = await super().get_plan(plan_id)
+        if self.mutation is not None:
+            task, self.mutation = self.mutation, None
+            await self.save_task(task)
+        return plan
+
+def test_mutations_during_the_load_are_not_lost(tmp_path):
+    async def moved(storage: MutatingStorage, task_id: str, status: TaskStatus):
+        task = await storage.get_task(task_id)
+        task.status = status
+        return task
+    
+    async def scenario():
+        async with MutatingStorage(tmp_path / "tasks.db") as storage:
+            agent = TaskPlannerAgent(storage=storage, client=object())
+            plan = await agent.plan_from_analysis(ANALYSIS, REPO)
+            first, second, third = (task.id for task in plan.tasks)
+            
+            # A new entry
+            storage.mutation = await moved(storage, first, TaskStatus.IN_PROGRESS)
+            await agent.generate_markdown_report(plan.id)
+            after_new = await agent.generate_markdown_report(plan.id)
+            
+            # A patched entry
+            await agent.update_task_status(second, 'failed')
+            storage.mutation = await moved(storage, third, TaskStatus.COMPLETED)
+            await agent.generate_markdown_report(plan.id)
+            after_patch = await agent.generate_markdown_report(plan.id)
+            return after_new, after_patch
+    
+    after_new, after_patch = asyncio.run(scenario())
+    assert "### In Progress (1)" in after_new
+    assert "### Failed (1)" in after_patch
+    assert "### Completed (1)" in after_patch
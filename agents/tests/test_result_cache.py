@@ -0,0 +1,40 @@
+"""Tests for the content-hash result cache"""
+
+from __future__ import annotations
+
+from agents.cursor.cache import ResultCache
+from agents.cursor.rules import CursorRulesEngine
+
+def test_overwrites_do_not_grow_the_cache(tmp_path):
+    cache = ResultCache(tmp_path / "cache.db", max_entries=3)
+    for _ in range(5):
+        cache.put("same", [1])
+    assert cache.stats()["entries"] == 1
+    assert cache.evictions == 0
+    
+    for key in ("a", "b", "c"):
+        cache.put(key, [key])
+    assert cache.stats()["entries"] == 3
+    assert cache.get("same") is None  # least recently used, evicted
+    assert cache.get("c") == ["c"]
+    cache.close()
+    
+    assert ResultCache(tmp_path / "cache.db").stats()["entries"] == 3
+
+def test_worker_lookups_reach_the_parent_stats(tmp_path):
+    paths = []
+    for n in range(6):
+        path = tmp_path / f"file{n}.py"
+        path.write_text(f"print({n})  # TODO\n")
+        paths.append(path)
+    
+    cache = ResultCache(tmp_path / "cache.db")
+    engine = CursorRulesEngine(cache=cache)
+    first = list(engine.check_paths(paths, workers=2))
+    second = list(engine.check_paths(paths, workers=2))
+    cache.close()
+    
+    assert not any(result["cached"] for result in first)
+    assert all(result["cached"] for result in second)
+    assert [result["violations"] for result in second] == [result["violations"] for result in first]
+    assert (cache.hits, cache.misses) == (6, 6)
@@ -0,0 +1,125 @@
+"""Tests for the rule engine"""
+
+from __future__ import annotations
+
+import pytest
+
+from agents.cursor.rules import CursorRulesEngine, LineIndex, Rule
+
+CODE = '''import os
+
+def Load(path):
+    print(path)
+    x = "a" * 100 + "b" * 100 + "c" * 100 + "d" * 100 + "e" * 100 + "f" * 100 + "g" * 100 + "h" * 100
+    return os.path.join(path, path)
+
+def save():
+    return None
+'''
+
+def rule(name: str, condition: str, **fields) -> Rule:
+    return Rule(name=name, description=name, condition=condition, action="report", **fields)
+
+def test_single_pass_scan_matches_the_per_rule_scan():
+    engine = CursorRulesEngine()
+    extra = [
+        rule("prefix_of_print", r"pri"),  # matches at the same position as no_print_debug
+        rule("named_group", r"(?P<fn>os)\.path"),
+        rule("backreference", r"(path), \1"),
+        rule("ignore_case", r"(?i)RETURN NONE"),
+        rule("absent", r"lambda"),
+        rule("disabled", r"import", enabled=False),
+    ]
+    for r in extra:
+        engine.add_rule(r)
+    
+    matched = engine.scan(CODE)
+    assert engine.scan(CODE, single_pass=True) == matched
+    assert matched == {
+        "snake_case_functions", "docstring_required", "max_line_length", "no_print_debug",
+        "prefix_of_print", "named_group", "backreference", "ignore_case"
+    }
+    assert engine.check_code(CODE, single_pass=True) == engine.check_code(CODE)
+
+def test_combined_patterns_are_compiled_once_per_rule_set():
+    engine = CursorRulesEngine()
+    for _ in range(3):
+        engine.scan(CODE, single_pass=True)
+    # One alternation per distinct set of remaining rules
+    assert len(engine._combined) == len(engine.rules)
+    engine.add_rule(rule("absent", r"lambda"))
+    assert engine._combined == {}
+
+def test_invalid_patterns_are_rejected_when_added():
+    engine = CursorRulesEngine()
+    with pytest.raises(ValueError, match="broken"):
+        engine.add_rule(rule("broken", r"print("))
+    assert "broken" not in engine.rules
+
+def test_edited_conditions_are_recompiled():
+    engine = CursorRulesEngine.from_rules([rule("keyword", r"lambda")])
+    assert engine.scan(CODE) == set()
+    engine.rules["keyword"].condition = r"return"
+    assert engine.scan(CODE) == {"keyword"}
+    assert engine.scan(CODE, single_pass=True) == {"keyword"}
+
+def test_line_index_positions():
+    text = "ab\ncd\n\nlast"
+    index = LineIndex(text)
+    assert index.starts == [0, 3, 6, 7]
+    assert [index.position(offset) for offset in (0, 1, 2, 3, 6, 7, len(text))] == [
+        (1, 1), (1, 2), (1, 3), (2, 1), (3, 1), (4, 1), (4, 5)
+    ]
+
+def test_line_index_matches_a_rescan_from_the_start():
+    index = LineIndex(CODE)
+    for offset in range(len(CODE) + 1):
+        before = CODE[:offset]
+        assert index.position(offset) == (before.count("\n") + 1, offset - (before.rfind("\n") + 1) + 1)
+
+def test_locations_report_spans_and_cap_matches_per_rule():
+    engine = CursorRulesEngine.from_rules([rule("path", r"path", priority=1), rule("multiline", r"print\(path\)\n\s+x", priority=2)])
+    violations = engine.check_code_locations(CODE, max_per_rule=3)
+    
+    assert [v["rule"] for v in violations] == ["multiline", "path", "path", "path"]
+    assert {key: violations[0][key] for key in ("line", "column", "end_line", "end_column")} == {
+        "line": 4, "column": 5, "end_line": 5, "end_column": 6
+    }
+    assert [(v["line"], v["column"]) for v in violations[1:]] == [(3, 10), (4, 11), (6, 15)]
+    assert len(engine.check_code_locations(CODE, max_per_rule=None)) == 1 + 5
+
+def make_tree(root) -> list:
+    files = []
+    for n in range(12):
+        path = root / "pkg" / f"mod{n:02}.py"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(CODE if n % 2 else "def ok():\n    return 1\n")
+        files.append(path)
+    for skipped in (root / ".venv" / "lib.py", root / "pkg" / "__pycache__" / "mod.py", root / "notes.txt"):
+        skipped.parent.mkdir(exist_ok=True)
+        skipped.write_text(CODE)
+    return files
+
+def test_process_pool_results_match_a_serial_run_in_input_order(tmp_path):
+    files = make_tree(tmp_path)
+    paths = [*reversed(files), tmp_path / "missing.py"]
+    engine = CursorRulesEngine()
+    engine.add_rule(rule("user_rule", r"join"))  # rules reach the workers
+    
+    pooled = list(engine.check_paths(paths, workers=3, chunksize=2))
+    serial = list(engine.check_paths(paths, workers=1))
+    
+    assert pooled == serial
+    assert [result["path"] for result in pooled] == [str(path) for path in paths]
+    assert "user_rule" in {v["rule"] for v in pooled[0]["violations"]}
+    assert pooled[-1]["error"] is not None
+
+def test_large_files_are_skipped(tmp_path):
+    files = make_tree(tmp_path)
+    results = list(CursorRulesEngine().check_paths(files, workers=2, max_file_size=100, locations=True))
+    assert [result["skipped"] for result in results] == ["too_large" if n % 2 else None for n in range(12)]
+
+def test_check_tree_prunes_excluded_directories(tmp_path):
+    files = make_tree(tmp_path)
+    results = list(CursorRulesEngine().check_tree(tmp_path, workers=2))
+    assert [result["path"] for result in results] == [str(path) for path in files]
@@ -0,0 +1,159 @@
+"""Tests for the dependency scheduler"""
+
+from __future__ import annotations
+import asyncio
+
+import pytest
+
+from agents.planner.planner_agent import Task, TaskPlannerAgent, TaskStatus, TaskStorage
+from agents.planner.sqlite_storage import SqliteTaskStorage
+
+async def statuses(agent: TaskPlannerAgent, *tasks: Task) -> list[str]:
+    await agent.scheduler.flush()
+    return [task.status.value for task in await agent.storage.get_tasks([task.id for task in tasks])]
+
+async def diamond(agent: TaskPlannerAgent) -> tuple[Task, Task, Task, Task]:
+    """a -> (b, c) -> d"""
+    a = await agent.create_task("a", "", priority="medium", estimated_hours=2)
+    b = await agent.create_task("b", "", priority="critical", estimated_hours=3, dependencies=[a.id])
+    c = await agent.create_task("c", "", priority="low", estimated_hours=1, dependencies=[a.id])
+    d = await agent.create_task("d", "", priority="high", estimated_hours=1, dependencies=[b.id, c.id])
+    return a, b, c, d
+
+def test_dependents_are_blocked_until_prerequisites_complete(agent):
+    async def scenario():
+        a, b, c, d = await diamond(agent)
+        assert await statuses(agent, a, b, c, d) == ['pending', 'blocked', 'blocked', 'blocked']
+        assert [t.title for t in await agent.get_ready_tasks()] == ["a"]
+        
+        await agent.complete_task(a.id)
+        assert await statuses(agent, a, b, c, d) == ['completed', 'pending', 'pending', 'blocked']
+        assert [t.title for t in await agent.get_ready_tasks()] == ["b", "c"]
+        assert [t.title for t in await agent.get_ready_tasks(limit=1)] == ["b"]
+        
+        # Blocked by hand stays blocked
+        await agent.update_task_status(c.id, "blocked")
+        await agent.complete_task(b.id)
+        assert await statuses(agent, a, b, c, d) == ['completed', 'completed', 'blocked', 'blocked']
+        
+        await agent.complete_task(c.id)
+        assert await statuses(agent, d) == ['pending']
+        
+        # Reopening a prerequisite blocks its dependents again
+        await agent.update_task_status(c.id, "in_progress")
+        assert await statuses(agent, d) == ['blocked']
+        assert agent.scheduler.blocked_by(d.id) == [c.id]
+    
+    asyncio.run(scenario())
+
+def test_cycles_are_rejected(agent):
+    async def scenario():
+        a, b, c, d = await diamond(agent)
+        with pytest.raises(ValueError):
+            await agent.add_dependencies(a.id, [d.id])
+        with pytest.raises(ValueError):
+            await agent.add_dependencies(a.id, [a.id])
+        assert a.dependencies == []
+        
+        # Saved directly, the edge closing the cycle is ignored
+        a.dependencies.append(d.id)
+        await agent.storage.save_task(a)
+        await agent.scheduler.flush()
+        assert agent.scheduler.rejected(a.id) == [d.id]
+        assert [t.title for t in await agent.get_ready_tasks()] == ["a"]
+        
+        assert (await agent.add_dependencies(c.id, [b.id])).dependencies == [a.id, b.id]
+    
+    asyncio.run(scenario())
+
+def test_critical_path_and_slack(agent):
+    async def scenario():
+        tasks = await diamond(agent)
+        return tasks, await agent.analyze_schedule()
+    
+    (a, b, c, d), analysis = asyncio.run(scenario())
+    assert analysis.order.index(a.id) < analysis.order.index(b.id) < analysis.order.index(d.id)
+    assert analysis.order.index(c.id) < analysis.order.index(d.id)
+    assert analysis.critical_path == [a.id, b.id, d.id]
+    assert analysis.total_hours == 6
+    assert analysis.slack == {a.id: 0, b.id: 0, c.id: 2, d.id: 0}
+    assert analysis.earliest_start[d.id] == 5
+
+def test_existing_tasks_are_loaded(tmp_path):
+    async def scenario():
+        async with SqliteTaskStorage(tmp_path / "tasks.db") as storage:
+            done = Task(id="done", title="Done", description="", status=TaskStatus.COMPLETED)
+            todo = Task(id="todo", title="Todo", description="")
+            waiting = Task(id="waiting", title="Waiting", description="", dependencies=["done", "todo"])
+            await storage.save_tasks([done, todo, waiting])
+            
+            agent = TaskPlannerAgent(storage, client=object())
+            ready = [t.id for t in await agent.get_ready_tasks()]
+            blocked = await statuses(agent, waiting)
+            await agent.complete_task("todo")
+            return ready, blocked, await statuses(agent, waiting)
+    
+    ready, blocked, unblocked = asyncio.run(scenario())
+    assert ready == ["todo"]
+    assert blocked == ['blocked']
+    assert unblocked == ['pending']
+
+def test_scheduler_follows_deletes():
+    async def scenario():
+        agent = TaskPlannerAgent(TaskStorage(), client=object())
+        a, b, c, d = await diamond(agent)
+        await agent.complete_task(a.id)
+        await agent.storage.delete_task(b.id)
+        await agent.scheduler.flush()
+        return b, d, agent.scheduler.blocked_by(d.id), len(agent.scheduler)
+    
+    b, d, blocked_by, size = asyncio.run(scenario())
+    assert b.id in blocked_by
+    assert size == 3
+
+def test_scheduler_outlives_the_event_loops_using_it(tmp_path):
+    storage = SqliteTaskStorage(tmp_path / "tasks.db")
+    agent = TaskPlannerAgent(storage, client=object())
+    
+    # Each call on its own loop; the first loop's background load is cancelled when it closes
+    first = asyncio.run(agent.create_task("First", ""))
+    second = asyncio.run(agent.create_task("Second", "", dependencies=[first.id]))
+    ready = asyncio.run(agent.get_ready_tasks())
+    blocked = asyncio.run(storage.get_task(second.id))
+    asyncio.run(agent.complete_task(first.id))
+    unblocked = asyncio.run(agent.get_ready_tasks())
+    asyncio.run(storage.close())
+    
+    assert [t.id for t in ready] == [first.id]
+    assert blocked.status == TaskStatus.BLOCKED
+    assert [t.id for t in unblocked] == [second.id]
+
+class RacingStorage(SqliteTaskStorage):
+    """Lands a save by someone else just before the first write touching `task_id`"""
+    
+    task_id: str | None = None
+    
+    async def _enqueue(self, *ops: tuple) -> None:
+        if self.task_id is not None and any(op[1][0] == self.task_id for op in ops):
+            task = await self.get_task(self.task_id)
+            self.task_id = None
+            task.estimated_hours = 8
+            await self.save_task(task)
+        await super()._enqueue(*ops)
+
+def test_automatic_transitions_keep_concurrent_saves(tmp_path):
+    async def scenario():
+        async with RacingStorage(tmp_path / "tasks.db") as storage:
+            agent = TaskPlannerAgent(storage, client=object())
+            first = await agent.create_task("First", "")
+            second = await agent.create_task("Second", "", dependencies=[first.id])
+            await agent.scheduler.flush()
+            
+            storage.task_id = second.id
+            await agent.complete_task(first.id)
+            await agent.scheduler.flush()
+            return await storage.get_task(second.id)
+    
+    second = asyncio.run(scenario())
+    assert second.estimated_hours == 8
+    assert second.status == TaskStatus.PENDING
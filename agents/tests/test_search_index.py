@@ -0,0 +1,87 @@
+"""Tests for the glob/trigram task search index"""
+
+from __future__ import annotations
+import asyncio
+import fnmatch
+import itertools
+
+import pytest
+
+from agents.planner.planner_agent import Task, TaskPlannerAgent, TaskStatus
+from agents.planner.search_index import TaskSearchIndex, glob_literals
+from agents.planner.sqlite_storage import SqliteTaskStorage
+
+WORDS = ["fix", "login", "log-in", "bug", "prefix", "v1.2", "Debug", "logging", "api", "fixture"]
+
+def corpus() -> list[Task]:
+    tasks = []
+    for n, (a, b, c) in enumerate(itertools.permutations(WORDS, 3)):
+        if n % 7:
+            continue
+        status = list(TaskStatus)[n % len(TaskStatus)]
+        tasks.append(Task(id=f"t{n}", title=f"{a} {b}", description=f"{c} and {a}{b}", status=status))
+    return tasks
+
+@pytest.mark.parametrize("pattern, literals", [
+    ("*fix*login?", ["fix", "login"]),
+    ("[!a]bug[xy]*", ["bug"]),
+    ("a[]]b", ["a", "b"]),
+    ("open[bracket", ["open[bracket"]),
+    ("*", []),
+])
+def test_glob_literals(pattern, literals):
+    assert glob_literals(pattern) == literals
+
+def test_matches_agree_with_fnmatch():
+    tasks = corpus()
+    index = TaskSearchIndex()
+    for task in tasks:
+        index.add(task)
+    
+    patterns = ["*fix*", "fix*", "*log-in*", "*v1.2*", "*[bd]ug*", "?ix *", "*LOGIN*", "*fixture and*", "*", "*zzz*", "debug*api"]
+    for pattern in patterns:
+        for status in (None, TaskStatus.PENDING):
+            expected = {
+                task.id for task in tasks
+                if (status is None or task.status == status)
+                and (fnmatch.fnmatchcase(task.title.lower(), pattern.lower())
+                     or fnmatch.fnmatchcase(task.description.lower(), pattern.lower()))
+            }
+            assert set(index.match(pattern, status)) == expected, pattern
+
+def test_updates_and_deletes_are_reindexed():
+    index = TaskSearchIndex()
+    task = Task(id="t1", title="Fix login", description="")
+    index.on_mutation('task.saved', task)
+    assert set(index.match("*login*")) == {"t1"}
+    
+    task.title = "Fix signup"
+    index.on_mutation('task.saved', task)
+    assert index.match("*login*") == {}
+    assert set(index.search("signup")) == {"t1"}
+    
+    index.on_mutation('task.deleted', "t1")
+    assert index.match("*") == {}
+    assert len(index) == 0
+    assert index._tokens == {} and index._trigrams == {}
+
+def test_title_matches_rank_first(agent):
+    async def scenario():
+        await agent.create_task("Write docs", "Explain the login flow")
+        await agent.create_task("Login page", "Build it")
+        await agent.create_task("Fix the login login bug", "")
+        return await agent.list_tasks_by_pattern("*login*")
+    
+    ranked = asyncio.run(scenario())
+    assert [task.title for task in ranked] == ["Fix the login login bug", "Login page", "Write docs"]
+
+def test_tasks_stored_before_the_agent_are_found(tmp_path):
+    async def scenario():
+        async with SqliteTaskStorage(tmp_path / "tasks.db") as storage:
+            await storage.save_tasks([Task(id="a", title="Fix login", description=""), Task(id="b", title="Docs", description="")])
+            agent = TaskPlannerAgent(storage, client=object())
+            return await agent.list_tasks_by_pattern("*login*"), await agent.search_tasks("docs")
+    
+    matched, searched = asyncio.run(scenario())
+    assert [task.id for task in matched] == ["a"]
+    assert [task.id for task in searched] == ["b"]
@@ -0,0 +1,89 @@
+"""Tests for semantic search, with the local HashingEmbedder standing in for a model"""
+
+from __future__ import annotations
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from agents.planner.embeddings import HashingEmbedder
+from agents.planner.planner_agent import TaskPlannerAgent
+from agents.planner.semantic_search import SemanticIndex, VectorStore
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self, dimension: int = 256):
+        super().__init__(dimension)
+        self.embedded: list[str] = []
+    
+    async def embed(self, texts, input_type="document"):
+        if input_type == "document":
+            self.embedded.extend(texts)
+        return await super().embed(texts, input_type)
+
+def make_agent(embedder: HashingEmbedder, path=None, storage=None) -> TaskPlannerAgent:
+    index = SemanticIndex(embedder, VectorStore(embedder.dimension, path=path))
+    return TaskPlannerAgent(storage, client=object(), semantic_index=index)
+
+def test_search_ranks_closest_tasks_first():
+    async def scenario():
+        agent = make_agent(HashingEmbedder(dimension=256))
+        await agent.create_task("Fix login authentication", "Users cannot sign in with OAuth tokens")
+        await agent.create_task("Update invoice layout", "Move the totals column on PDF invoices")
+        await agent.create_task("Refresh expired tokens", "Authentication tokens are not refreshed")
+        return await agent.semantic_search("authentication token bug", limit=2)
+    
+    hits = asyncio.run(scenario())
+    assert {task.title for task, _ in hits} == {"Refresh expired tokens", "Fix login authentication"}
+    assert hits[0][1] >= hits[1][1]
+
+def test_tasks_are_embedded_again_only_when_their_text_changes():
+    embedder = CountingEmbedder()
+    
+    async def scenario():
+        agent = make_agent(embedder)
+        task = await agent.create_task("Write docs", "Document the API")
+        await agent.semantic_search("docs")
+        
+        await agent.update_task_status(task.id, "in_progress")
+        await agent.semantic_search("docs")
+        first = list(embedder.embedded)
+        
+        task.description = "Document the REST API"
+        await agent.storage.save_task(task)
+        await agent.semantic_search("docs")
+        return first, list(embedder.embedded)
+    
+    first, after_edit = asyncio.run(scenario())
+    assert first == ["Write docs\nDocument the API"]
+    assert after_edit == first + ["Write docs\nDocument the REST API"]
+
+def test_vectors_persist_across_restarts(tmp_path):
+    path = tmp_path / "vectors.npy"
+    
+    async def first_run():
+        agent = make_agent(HashingEmbedder(dimension=64), path)
+        task = await agent.create_task("Tune database indexes", "")
+        await agent.semantic_index.close()
+        return agent.storage, task
+    
+    async def second_run(storage):
+        embedder = CountingEmbedder(dimension=64)
+        agent = make_agent(embedder, path, storage)
+        hits = await agent.semantic_search("database")
+        return hits, embedder.embedded
+    
+    storage, task = asyncio.run(first_run())
+    hits, embedded = asyncio.run(second_run(storage))
+    assert [t.id for t, _ in hits] == [task.id]
+    assert embedded == []
+
+def test_planner_imports_without_numpy():
+    code = (
+        "import sys; sys.modules['numpy'] = None\n"
+        "import agents.planner.planner_agent\n"
+        "assert 'agents.planner.semantic_search' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
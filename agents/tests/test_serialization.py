@@ -0,0 +1,96 @@
+"""Tests for the generated task serializers"""
+
+from __future__ import annotations
+import copy
+import dataclasses
+from enum import Enum
+
+import pytest
+
+from agents.planner import serialization
+from agents.planner.planner_agent import Task, TaskPlan, TaskPriority, TaskStatus
+
+def reference_dict(obj) -> dict:
+    """What the generated encoders must produce: asdict with enums as values"""
+    def convert(value):
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, dict):
+            return {key: convert(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [convert(item) for item in value]
+        return value
+    return convert(dataclasses.asdict(obj))
+
+def make_task() -> Task:
+    leaf = Task(id="leaf", title="Leaf", description="", status=TaskStatus.BLOCKED, tags=["x"])
+    child = Task(id="child", title="Child", description="", priority=TaskPriority.LOW, subtasks=[leaf])
+    return Task(
+        id="root",
+        title="Root",
+        description="Ship it",
+        status=TaskStatus.IN_PROGRESS,
+        priority=TaskPriority.CRITICAL,
+        due_date="2026-11-01",
+        tags=["backend", "release"],
+        subtasks=[child],
+        dependencies=["other"],
+        estimated_hours=3.5,
+        metadata={"source": {"repo": "r", "lines": [1, 2]}}
+    )
+
+FORMATS = [
+    "json",
+    pytest.param("orjson", marks=pytest.mark.skipif(serialization.orjson is None, reason="orjson not installed")),
+    pytest.param("msgpack", marks=pytest.mark.skipif(serialization.msgpack is None, reason="msgpack not installed")),
+]
+
+def test_to_dict_matches_asdict_and_shares_no_containers():
+    task = make_task()
+    data = task.to_dict()
+    assert data == reference_dict(task)
+    
+    data["tags"].append("changed")
+    data["metadata"]["source"]["lines"].append(3)
+    data["subtasks"][0]["subtasks"][0]["tags"].clear()
+    assert task.tags == ["backend", "release"]
+    assert task.metadata["source"]["lines"] == [1, 2]
+    assert task.subtasks[0].subtasks[0].tags == ["x"]
+
+def test_from_dict_round_trips_without_modifying_its_input():
+    task = make_task()
+    data = task.to_dict()
+    before = copy.deepcopy(data)
+    
+    restored = Task.from_dict(data)
+    assert restored == task
+    assert data == before
+    assert restored.subtasks[0].subtasks[0].status is TaskStatus.BLOCKED
+    assert Task.from_dict({"id": "t", "title": "T", "description": ""}).status is TaskStatus.PENDING
+
+@pytest.mark.parametrize("format", FORMATS)
+def test_dumps_and_loads_round_trip(format):
+    task = make_task()
+    plan = TaskPlan(id="plan", name="Plan", description="", tasks=[task], owner="me")
+    
+    assert serialization.loads(serialization.dumps(task, format), Task, format) == task
+    assert serialization.loads(serialization.dumps(plan, format), TaskPlan, format) == plan
+    assert serialization.loads(serialization.dumps([task, task], format), Task, format) == [task, task]
+    # Without a class, the parsed value is the to_dict() form
+    assert serialization.loads(serialization.dumps(task, format), format=format) == task.to_dict()
+
+def test_exclude_and_generated_encoder_reuse():
+    plan = TaskPlan(id="plan", name="Plan", description="", tasks=[make_task()])
+    data = serialization.to_dict(plan, exclude=("tasks",))
+    assert "tasks" not in data
+    assert data["status"] == "pending"
+    assert serialization._encoder(TaskPlan, ("tasks",)) is serialization._encoder(TaskPlan, ("tasks",))
+    assert serialization._decoder(Task) is serialization._decoder(Task)
+
+def test_bad_input_is_rejected():
+    with pytest.raises(ValueError):
+        serialization.dumps(make_task(), "yaml")
+    with pytest.raises(ValueError):
+        serialization.loads(b"{}", format="yaml")
+    with pytest.raises(TypeError):
+        serialization.to_dict(object())
@@ -0,0 +1,61 @@
+"""Tests for the lazy skill registry"""
+
+from __future__ import annotations
+import asyncio
+from importlib.metadata import EntryPoint
+
+from agents.cursor import registry as registry_module
+from agents.cursor.registry import ENTRY_POINT_GROUP, SkillRegistry
+from agents.cursor.skills import CursorSkill
+
+class EchoSkill(CursorSkill):
+    name = "echo"
+    description = "Echo the code length"
+    
+    async def execute(self, code: str, context: dict) -> dict:
+        return {"length": len(code)}
+
+def fake_entry_points(calls: list):
+    def entry_points(group: str):
+        calls.append(group)
+        return [EntryPoint(name="echo", value=f"{__name__}:EchoSkill", group=group)]
+    return entry_points
+
+def test_entry_points_are_scanned_on_first_lookup(monkeypatch):
+    calls = []
+    monkeypatch.setattr(registry_module, "entry_points", fake_entry_points(calls))
+    
+    registry = SkillRegistry()
+    assert calls == []
+    
+    assert isinstance(registry.get("echo"), EchoSkill)
+    assert "echo" in registry.names()
+    assert calls == [ENTRY_POINT_GROUP]
+
+def test_explicit_registration_wins_over_entry_points(monkeypatch):
+    monkeypatch.setattr(registry_module, "entry_points", fake_entry_points([]))
+    
+    class OtherEcho(EchoSkill):
+        pass
+    
+    registry = SkillRegistry()
+    registry.register("echo", OtherEcho)
+    assert type(registry.get("echo")) is OtherEcho
+
+def test_execute_many_yields_in_file_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry_module, "entry_points", fake_entry_points([]))
+    files = []
+    for i in range(12):
+        path = tmp_path / f"f{i}.py"
+        path.write_text("x = 1\n" * (i + 1))
+        files.append(path)
+    files.append(tmp_path / "missing.py")
+    
+    async def collect():
+        registry = SkillRegistry()
+        return [result async for result in registry.execute_many(files, ["echo", "refactor"], concurrency=3)]
+    
+    results = asyncio.run(collect())
+    assert [r["path"] for r in results] == [str(path) for path in files]
+    assert [r["results"]["echo"]["length"] for r in results[:-1]] == [6 * (i + 1) for i in range(12)]
+    assert results[-1]["error"] and results[-1]["results"] == {}
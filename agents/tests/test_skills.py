@@ -0,0 +1,51 @@
+"""Tests for the shared-parse skill pipeline"""
+
+from __future__ import annotations
+import asyncio
+
+from agents.cursor import skills
+
+CODE = '''
+def load(path):
+    """Load a file"""
+    for line in open(path):
+        if line:
+            value = line.strip()
+    return value
+
+def save(records, destination_directory, overwrite_existing, compression_level):
+    try:
+        pass
+    except:
+        pass
+
+def _helper(a, b, c, d, e, f):
+    return a
+'''
+
+def test_pipeline_parses_once_and_covers_every_function(monkeypatch):
+    calls = []
+    summarize = skills.summarize
+    monkeypatch.setattr(skills, "summarize", lambda code: calls.append(code) or summarize(code))
+    
+    results = asyncio.run(skills.SkillPipeline().run(CODE))
+    
+    assert len(calls) == 1
+    assert set(results) == {"refactor", "document", "test"}
+    assert sorted(results["document"]["docstrings"]) == ["_helper", "save"]
+    assert [case["name"] for case in results["test"]["test_cases"]] == ["test_load", "test_save"]
+    assert results["refactor"]["patterns_found"] == ["nested_loops", "error_handling", "long_parameters"]
+
+def test_long_parameters_keeps_the_parameter_text_length_rule():
+    refactor = skills.RefactorSkill()
+    many_short = "def f(a, b, c, d, e, f, g):\n    return a\n"
+    one_long = "def f(configuration_for_the_remote_service_with_defaults=None):\n    return 1\n"
+    
+    assert "long_parameters" not in asyncio.run(refactor.execute(many_short, {}))["patterns_found"]
+    assert "long_parameters" in asyncio.run(refactor.execute(one_long, {}))["patterns_found"]
+
+def test_unparsable_code_falls_back_to_text_heuristics():
+    results = asyncio.run(skills.SkillPipeline().run("def broken(:\n    for x in y: if x"))
+    
+    assert results["refactor"]["patterns_found"] == ["nested_loops"]
+    assert [case["name"] for case in results["test"]["test_cases"]] == ["test_broken"]
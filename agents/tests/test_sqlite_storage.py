@@ -0,0 +1,97 @@
+"""Tests for SqliteTaskStorage"""
+
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.planner.planner_agent import Task, TaskPlan, TaskPriority, TaskStatus, TaskStorage
+from agents.planner.sqlite_storage import SqliteTaskStorage
+
+def make_task(task_id: str, **fields) -> Task:
+    return Task(id=task_id, title=f"Title {task_id}", description="", **fields)
+
+def test_round_trip_and_reopen(tmp_path):
+    path = tmp_path / "tasks.db"
+    
+    async def write():
+        async with SqliteTaskStorage(path) as storage:
+            task = make_task("t1", tags=["backend"], priority=TaskPriority.HIGH)
+            plan = TaskPlan(id="p1", name="Plan", description="", tasks=[task])
+            await storage.save_task(task)
+            await storage.save_plan(plan)
+    
+    async def read():
+        async with SqliteTaskStorage(path) as storage:
+            task = await storage.get_task("t1")
+            plan = await storage.get_plan("p1")
+            return task, plan, await storage.list_tasks(tag="backend")
+    
+    asyncio.run(write())
+    task, plan, tagged = asyncio.run(read())
+    assert task.priority is TaskPriority.HIGH
+    assert [t.id for t in plan.tasks] == ["t1"]
+    assert [t.id for t in tagged] == ["t1"]
+
+def test_writers_on_different_event_loops(tmp_path):
+    storage = SqliteTaskStorage(tmp_path / "tasks.db")
+    
+    def writer(n: int) -> int:
+        async def save_all():
+            for i in range(25):
+                await storage.save_task(make_task(f"w{n}-{i}"))
+            return len(await storage.list_tasks())
+        return asyncio.run(asyncio.wait_for(save_all(), timeout=30))
+    
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        list(pool.map(writer, range(20)))
+    
+    async def check():
+        tasks = await storage.list_tasks()
+        await storage.close()
+        return tasks
+    
+    assert len(asyncio.run(check())) == 20 * 25
+
+def test_migrate_from_memory_storage(tmp_path):
+    async def scenario():
+        source = TaskStorage()
+        tasks = [make_task(f"m{i}", status=TaskStatus.COMPLETED) for i in range(10)]
+        await source.save_tasks(tasks)
+        await source.save_plan(TaskPlan(id="plan", name="Plan", description="", tasks=tasks[:3]))
+        
+        async with SqliteTaskStorage(tmp_path / "tasks.db") as storage:
+            assert await storage.migrate_from(source) == 10
+            completed = await storage.list_tasks(status=TaskStatus.COMPLETED)
+            plan = await storage.get_plan("plan")
+        return completed, plan
+    
+    completed, plan = asyncio.run(scenario())
+    assert len(completed) == 10
+    assert [t.id for t in plan.tasks] == ["m0", "m1", "m2"]
+
+def test_save_plan_notifies_like_memory_storage(tmp_path):
+    async def events(storage) -> list[tuple[str, str]]:
+        seen = []
+        storage.add_listener(lambda event, payload: seen.append((event, getattr(payload, "id", payload))))
+        tasks = [make_task("a"), make_task("b")]
+        await storage.save_tasks(tasks)
+        tasks[0].status = TaskStatus.IN_PROGRESS
+        await storage.save_plan(TaskPlan(id="p", name="Plan", description="", tasks=tasks))
+        await storage.delete_task("b")
+        return seen
+    
+    async def sqlite_events():
+        async with SqliteTaskStorage(tmp_path / "tasks.db") as storage:
+            seen = await events(storage)
+            in_progress = await storage.list_tasks(status=TaskStatus.IN_PROGRESS)
+        return seen, in_progress
+    
+    memory = TaskStorage()
+    expected = asyncio.run(events(memory))
+    seen, in_progress = asyncio.run(sqlite_events())
+    assert seen == expected == [
+        ("task.saved", "a"), ("task.saved", "b"),
+        ("task.saved", "a"), ("task.saved", "b"), ("plan.saved", "p"),
+        ("task.deleted", "b"),
+    ]
+    assert [t.id for t in in_progress] == [t.id for t in asyncio.run(memory.list_tasks(status=TaskStatus.IN_PROGRESS))] == ["a"]
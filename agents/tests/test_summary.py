@@ -0,0 +1,39 @@
+"""Tests for the shared structural code summary"""
+
+from __future__ import annotations
+
+from agents.cursor.summary import summarize
+
+CODE = '''
+for a in range(3):
+    print(a)
+else:
+    for b in range(3):
+        while b:
+            if b:
+                b -= 1
+
+while True:
+    def inner():
+        if True:
+            pass
+    break
+'''
+
+def test_loops_with_nesting_look_only_at_the_loop_body():
+    summary = summarize(CODE)
+    assert summary.loops == [2, 5, 6, 10]
+    # The first loop's else clause is not part of its body
+    assert summary.loops_with_nesting == [5, 6, 10]
+
+def test_except_star_blocks_are_counted():
+    summary = summarize("try:\n    pass\nexcept* ValueError:\n    pass\n")
+    assert summary.try_blocks == [1]
+    assert summary.bare_excepts == []
+
+def test_deeply_nested_loops():
+    depth = 90
+    code = "".join("    " * level + f"for i{level} in x:\n" for level in range(depth)) + "    " * depth + "pass\n"
+    summary = summarize(code)
+    assert summary.loops == list(range(1, depth + 1))
+    assert summary.loops_with_nesting == list(range(1, depth))
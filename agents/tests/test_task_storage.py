@@ -0,0 +1,77 @@
+"""Tests for the in-memory TaskStorage and its secondary indexes"""
+
+from __future__ import annotations
+import asyncio
+import threading
+
+from agents.planner.planner_agent import Task, TaskPriority, TaskStatus, TaskStorage
+
+def make_task(i: int, **fields) -> Task:
+    return Task(id=f"task-{i:05d}", title=f"Task {i}", description="", created_at=f"2026-01-01T00:00:{i % 60:02d}", **fields)
+
+def test_filtered_listing_follows_status_changes():
+    async def scenario():
+        storage = TaskStorage()
+        task = make_task(1, tags=["backend"], assigned_to="ana")
+        await storage.save_task(task)
+        assert await storage.list_tasks(status=TaskStatus.PENDING) == [task]
+        
+        task.status = TaskStatus.IN_PROGRESS
+        task.tags = ["frontend"]
+        await storage.save_task(task)
+        assert await storage.list_tasks(status=TaskStatus.PENDING) == []
+        assert await storage.list_tasks(status=TaskStatus.IN_PROGRESS, tag="frontend", assigned_to="ana") == [task]
+        assert await storage.list_tasks(tag="backend") == []
+        
+        assert await storage.delete_task(task.id)
+        assert await storage.list_tasks() == []
+        assert await storage.list_tasks_in_range() == []
+        assert not await storage.delete_task(task.id)
+    
+    asyncio.run(scenario())
+
+def test_listing_orders_by_priority_rank_then_creation():
+    async def scenario():
+        storage = TaskStorage()
+        low = make_task(1, priority=TaskPriority.LOW)
+        critical = make_task(2, priority=TaskPriority.CRITICAL)
+        medium_old = make_task(3, priority=TaskPriority.MEDIUM)
+        medium_new = make_task(4, priority=TaskPriority.MEDIUM)
+        await storage.save_tasks([low, medium_new, critical, medium_old])
+        
+        assert await storage.list_tasks() == [critical, medium_new, medium_old, low]
+        assert await storage.list_tasks(priority=TaskPriority.MEDIUM) == [medium_new, medium_old]
+    
+    asyncio.run(scenario())
+
+def test_concurrent_saves_from_several_threads_keep_indexes_consistent():
+    storage = TaskStorage()
+    errors = []
+    
+    def writer(offset: int) -> None:
+        async def save_all():
+            for i in range(offset, offset + 300):
+                task = make_task(i)
+                await storage.save_task(task)
+                task.status = TaskStatus.COMPLETED
+                await storage.save_task(task)
+                if i % 3 == 0:
+                    await storage.delete_task(task.id)
+        try:
+            asyncio.run(save_all())
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+    
+    threads = [threading.Thread(target=writer, args=(n * 1000,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    expected = sorted(task_id for task_id in storage.tasks)
+    assert len(expected) == 4 * 200
+    assert [t.id for t in asyncio.run(storage.list_tasks_in_range())] == expected
+    assert sorted(t.id for t in asyncio.run(storage.list_tasks())) == expected
+    assert sorted(t.id for t in asyncio.run(storage.list_tasks(status=TaskStatus.COMPLETED))) == expected
+    assert asyncio.run(storage.list_tasks(status=TaskStatus.PENDING)) == []
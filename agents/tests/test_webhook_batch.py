@@ -0,0 +1,113 @@
+"""Tests for concurrent webhook batches"""
+
+from __future__ import annotations
+import asyncio
+import json
+import time
+
+from agents.webhooks import webhook_handler
+
+def test_iter_batch_bounds_concurrency_and_keeps_input_order():
+    active = peak = 0
+    
+    async def callback(item: dict) -> int:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        # Later items finish first
+        await asyncio.sleep(0.001 * (20 - item['n']))
+        active -= 1
+        return item['n']
+    
+    async def scenario():
+        items = [{'n': n} for n in range(20)]
+        return [result async for result in webhook_handler.iter_batch(callback, items, concurrency=4)]
+    
+    results = asyncio.run(scenario())
+    assert peak == 4
+    assert [r['index'] for r in results] == list(range(20))
+    assert [r['result'] for r in results] == list(range(20))
+
+def test_iter_batch_isolates_failures_and_timeouts():
+    async def callback(item: dict) -> str:
+        if item['kind'] == 'fail':
+            raise ValueError("bad item")
+        if item['kind'] == 'slow':
+            await asyncio.sleep(10)
+        return "ok"
+    
+    async def scenario():
+        items = [{'kind': 'ok'}, {'kind': 'fail'}, {'kind': 'slow'}, {'kind': 'ok'}]
+        return [result async for result in webhook_handler.iter_batch(callback, items, timeout=0.05)]
+    
+    start = time.perf_counter()
+    results = asyncio.run(scenario())
+    assert time.perf_counter() - start < 5
+    assert [r['status'] for r in results] == ['success', 'error', 'error', 'success']
+    assert results[1]['error'] == "bad item"
+    assert "Timed out" in results[2]['error']
+
+def test_batch_route_runs_items_concurrently(client):
+    async def callback(item: dict) -> int:
+        await asyncio.sleep(0.05)
+        return item['n']
+    
+    webhook_handler.register_callback('batch.create', callback)
+    start = time.perf_counter()
+    response = client.post('/webhooks/batch/process', json={
+        'operation': 'create',
+        'concurrency': 20,
+        'tasks': [{'n': n} for n in range(20)]
+    })
+    elapsed = time.perf_counter() - start
+    
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body['processed'], body['failed']) == (20, 0)
+    assert [r['result'] for r in body['results']] == list(range(20))
+    assert elapsed < 20 * 0.05
+
+def test_batch_route_streams_ndjson_in_input_order(client):
+    async def callback(item: dict) -> int:
+        await asyncio.sleep(0.001 * (10 - item['n']))
+        if item['n'] == 3:
+            raise ValueError("three")
+        return item['n']
+    
+    webhook_handler.register_callback('batch.create', callback)
+    response = client.post(
+        '/webhooks/batch/process',
+        json={'operation': 'create', 'tasks': [{'n': n} for n in range(10)]},
+        headers={'Accept': 'application/x-ndjson'}
+    )
+    
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['index'] for line in lines[:-1]] == list(range(10))
+    assert lines[3] == {'index': 3, 'status': 'error', 'error': "three"}
+    assert (lines[-1]['processed'], lines[-1]['failed']) == (10, 1)
+
+def test_bulk_callback_takes_precedence(client, agent):
+    async def per_item(item: dict) -> None:
+        raise AssertionError("per-item callback should not run")
+    
+    webhook_handler.register_callback('batch.create', per_item)
+    webhook_handler.register_bulk_callback('batch.create', lambda items: agent.process_batch_webhook('create', items))
+    response = client.post('/webhooks/batch/process', json={
+        'operation': 'create',
+        'tasks': [{'title': "One"}, {'description': "no title"}, {'title': "Two"}]
+    })
+    
+    body = response.get_json()
+    assert [r['status'] for r in body['results']] == ['success', 'error', 'success']
+    assert body['failed'] == 1
+    assert len(agent.storage.tasks) == 2
+
+def test_batch_route_rejects_bad_parameters(client):
+    async def callback(item: dict) -> None:
+        return None
+    
+    webhook_handler.register_callback('batch.create', callback)
+    assert client.post('/webhooks/batch/process', json={'operation': 'delete'}).status_code == 400
+    response = client.post('/webhooks/batch/process', json={'operation': 'create', 'concurrency': "many"})
+    assert response.status_code == 400
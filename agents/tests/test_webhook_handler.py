@@ -0,0 +1,103 @@
+"""Tests for the webhook dispatcher and its event loop"""
+
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.webhooks import webhook_handler
+from agents.webhooks.job_queue import JobQueue
+
+def test_server_threads_share_one_event_loop(client):
+    loops = set()
+    threads = set()
+    lock = asyncio.Lock()  # bound to the first loop that uses it
+    
+    async def callback(payload: dict) -> dict:
+        async with lock:
+            loops.add(asyncio.get_running_loop())
+            threads.add(threading.get_ident())
+            await asyncio.sleep(0.001)
+        return {'n': payload['n']}
+    
+    webhook_handler.register_callback('task.status', callback)
+    
+    def post(n: int) -> int:
+        response = client.post('/webhooks/task/status', json={'n': n})
+        assert response.get_json()['result'] == {'n': n}
+        return threading.get_ident()
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        callers = set(pool.map(post, range(64)))
+    
+    assert len(callers) > 1
+    assert loops == {webhook_handler._event_loop()}
+    assert len(threads) == 1 and not threads & callers
+
+def test_register_replaces_and_add_fans_out(client):
+    async def first(payload: dict) -> str:
+        return "first"
+    
+    async def second(payload: dict) -> str:
+        return "second"
+    
+    async def failing(payload: dict) -> str:
+        raise ValueError("boom")
+    
+    webhook_handler.register_callback('task.error', first)
+    webhook_handler.register_callback('task.error', second)
+    assert client.post('/webhooks/task/error', json={'n': 1}).get_json()['result'] == "second"
+    
+    webhook_handler.add_callback('task.error', failing)
+    webhook_handler.add_callback('task.error', first)
+    result = client.post('/webhooks/task/error', json={'n': 2}).get_json()['result']
+    assert result == ["second", {'error': "boom"}, "first"]
+    
+    webhook_handler.register_callback('task.error', first)
+    assert client.post('/webhooks/task/error', json={'n': 3}).get_json()['result'] == "first"
+
+def test_streams_run_on_the_event_loop(client):
+    async def chunks(payload: dict):
+        for word in ("a", "b", "c"):
+            assert asyncio.get_running_loop() is webhook_handler._event_loop()
+            yield word
+    
+    webhook_handler.register_stream_callback('report.generate', chunks)
+    response = client.post('/webhooks/report/generate', json={'stream': True})
+    assert response.get_data(as_text=True) == "abc"
+
+def test_job_queue_workers_share_the_event_loop(client):
+    loops = []
+    
+    async def callback(payload: dict) -> dict:
+        loops.append(asyncio.get_running_loop())
+        return {'ok': True}
+    
+    webhook_handler.register_callback('task.complete', callback)
+    queue = JobQueue(webhook_handler.webhook_callbacks, workers=2)
+    webhook_handler.enable_job_queue(queue)
+    try:
+        response = client.post('/webhooks/task/complete', json={'task_id': "t1"})
+        assert response.status_code == 202
+        job_id = response.get_json()['job_id']
+        
+        for _ in range(200):
+            job = client.get(f'/webhooks/jobs/{job_id}').get_json()
+            if job['status'] == 'succeeded':
+                break
+            time.sleep(0.01)
+        assert job['status'] == 'succeeded'
+        assert loops == [webhook_handler._event_loop()]
+    finally:
+        queue.close()
+
+def test_process_webhook_returns_task_dicts(client, agent):
+    webhook_handler.register_callback('task.create', lambda payload: agent.process_webhook('task.create', payload))
+    created = asyncio.run(agent.process_webhook('task.create', {'title': "Deploy"}))
+    missing = asyncio.run(agent.process_webhook('task.complete', {'task_id': "missing"}))
+    response = client.post('/webhooks/task/create', json={'title': "Ship"})
+    
+    assert created['task'] == agent.storage.tasks[created['task']['id']].to_dict()
+    assert missing == {'status': 'completed', 'task': None}
+    assert response.get_json()['result']['task']['title'] == "Ship"
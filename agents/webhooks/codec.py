@@ -0,0 +1,27 @@
+"""
+Webhook JSON codec
+orjson when installed, else the standard library; dataclasses are encoded in place, without to_dict copies
+"""
+
+from __future__ import annotations
+import json
+from typing import Any
+
+from agents.planner.serialization import fields_view
+
+try:
+    import orjson
+except ImportError:  # optional: faster parsing and encoding
+    orjson = None
+
+def dumps(obj: Any) -> bytes:
+    """JSON bytes; dataclasses (e.g. Task) become objects and enums their values"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=fields_view, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=fields_view, separators=(",", ":")).encode()
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON; raises ValueError when malformed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,114 @@
+"""
+Webhook idempotency
+Replays retried deliveries from a TTL cache of responses and coalesces concurrent duplicates
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Cache defaults
+IDEMPOTENCY_TTL = 3600.0
+IDEMPOTENCY_MAX_ENTRIES = 10_000
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """Response of the first delivery, replayed for duplicates"""
+    body: bytes
+    status: int
+    headers: tuple[tuple[str, str], ...]
+
+class IdempotencyCache:
+    """LRU cache of webhook responses by idempotency key, with TTL expiry
+    
+    Thread-safe: Flask runs requests on several threads, so in-flight
+    deliveries are tracked with concurrent futures that a duplicate's
+    request thread can wait on.
+    """
+    
+    def __init__(
+        self,
+        ttl: float = IDEMPOTENCY_TTL,
+        max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+        payload_ttl: float | None = None
+    ):
+        self.ttl = ttl
+        self.payload_ttl = ttl if payload_ttl is None else payload_ttl  # for keys hashed from payloads
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.replays = 0
+        self.coalesced = 0
+    
+    @staticmethod
+    def key(event_type: str, header_key: str | None, payload: dict | None) -> str | None:
+        """Cache key from the idempotency header, else from a hash of the payload
+        
+        payload=None means the event is only deduplicated by header.
+        """
+        if header_key:
+            return f"{event_type}:key:{header_key}"
+        if payload is None:
+            return None
+        data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return f"{event_type}:sha:{hashlib.blake2b(data.encode(), digest_size=16).hexdigest()}"
+    
+    def begin(self, key: str) -> CachedResponse | Future | None:
+        """Cached response, the in-flight delivery's future, or None to run it here
+        
+        A caller that gets None must call finish(key, ...) when done.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                ttl = self.payload_ttl if key.partition(":")[2].startswith("sha:") else self.ttl
+                if time.monotonic() - entry[0] <= ttl:
+                    self._entries.move_to_end(key)
+                    self.replays += 1
+                    return entry[1]
+                del self._entries[key]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            self._inflight[key] = Future()
+            return None
+    
+    def finish(self, key: str, response: CachedResponse | None, store: bool) -> None:
+        """Resolve waiting duplicates with the response, and keep it if store
+        
+        response=None tells waiting duplicates to run themselves.
+        """
+        with self._lock:
+            future = self._inflight.pop(key, None)
+            if store and response is not None:
+                self._entries[key] = (time.monotonic(), response)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        if future is not None:
+            future.set_result(response)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "replays": self.replays,
+            "coalesced": self.coalesced
+        }
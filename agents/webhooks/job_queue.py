@@ -0,0 +1,364 @@
+"""
+Webhook job queue
+Queued webhook events drained by a pool of asyncio workers, with optional SQLite durability
+"""
+
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Mapping
+
+from agents.planner.planner_agent import PRIORITY_RANK, TaskPriority
+from agents.webhooks import codec
+
+logger = logging.getLogger(__name__)
+
+# Queue defaults
+JOB_QUEUE_WORKERS = 4
+JOB_QUEUE_MAX_PENDING = 1000
+JOB_RESULT_TTL = 3600.0
+JOB_MAX_ATTEMPTS = 3  # runs of a job interrupted by restarts before it is failed
+JOB_PRUNE_INTERVAL = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    event_type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, finished_at);
+"""
+
+class JobStatus(str, Enum):
+    """Job status types"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_pending jobs are waiting"""
+
+@dataclass
+class Job:
+    """Queued webhook event"""
+    id: str
+    event_type: str
+    payload: dict
+    priority: TaskPriority = TaskPriority.MEDIUM
+    status: JobStatus = JobStatus.QUEUED
+    attempts: int = 0
+    result: Any = None
+    error: str | None = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: str | None = None
+    finished_at: str | None = None
+    
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+    
+    def to_dict(self) -> dict:
+        """Status view of the job (without the payload)"""
+        return {
+            'id': self.id,
+            'event_type': self.event_type,
+            'priority': self.priority.value,
+            'status': self.status.value,
+            'attempts': self.attempts,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+class JobQueue:
+    """Priority queue of webhook jobs, drained by asyncio workers on a background loop
+    
+    Jobs are taken by TaskPriority lane (critical first), FIFO within a lane.
+    callbacks maps event types to async callbacks (e.g. webhook_callbacks) and
+    is looked up when a job runs. With a path, jobs are journaled to SQLite
+    before submit returns; on start, jobs that were queued or running when
+    the process stopped are queued again.
+    """
+    
+    def __init__(
+        self,
+        callbacks: Mapping[str, Callable[[dict], Any]],
+        path: str | Path | None = None,
+        workers: int = JOB_QUEUE_WORKERS,
+        max_pending: int = JOB_QUEUE_MAX_PENDING,
+        result_ttl: float = JOB_RESULT_TTL
+    ):
+        self.callbacks = callbacks
+        self.path = str(path) if path else None
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        
+        self._jobs: dict[str, Job] = {}
+        self._heap: list[tuple[int, int, str]] = []  # (-priority rank, sequence, job ID)
+        self._sequence = itertools.count()
+        self._lock = threading.RLock()  # also serializes the journal connection
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._available: asyncio.Semaphore | None = None
+        self._thread: threading.Thread | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._started = threading.Event()
+        self._last_prune = time.monotonic()
+        
+        self._conn = None
+        self._executor: ThreadPoolExecutor | None = None
+        if self.path:
+            # Workers journal on this thread, off the event loop
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-journal")
+            self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._recover()
+    
+    def __len__(self) -> int:
+        """Number of jobs waiting to run"""
+        return len(self._heap)
+    
+    # -- journal --
+    
+    def _execute(self, sql: str, params: tuple = ()) -> list[tuple]:
+        if self._conn is None:
+            return []
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+    
+    def _journal(self, job: Job) -> None:
+        """Write a job's current state"""
+        self._execute(
+            "INSERT OR REPLACE INTO jobs "
+            "(id, event_type, payload, priority, status, attempts, result, error, created_at, started_at, finished_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                job.id,
+                job.event_type,
+                codec.dumps(job.payload).decode(),
+                job.priority.value,
+                job.status.value,
+                job.attempts,
+                codec.dumps(job.result).decode() if job.result is not None else None,
+                job.error,
+                job.created_at,
+                job.started_at,
+                job.finished_at
+            )
+        )
+    
+    async def _journal_async(self, job: Job) -> None:
+        """Write a job's current state from a worker, without blocking its loop"""
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._journal, job)
+    
+    @staticmethod
+    def _job_from_row(row: tuple) -> Job:
+        return Job(
+            id=row[0],
+            event_type=row[1],
+            payload=codec.loads(row[2]),
+            priority=TaskPriority(row[3]),
+            status=JobStatus(row[4]),
+            attempts=row[5],
+            result=codec.loads(row[6]) if row[6] is not None else None,
+            error=row[7],
+            created_at=row[8],
+            started_at=row[9],
+            finished_at=row[10]
+        )
+    
+    def _recover(self) -> None:
+        """Queue the journal's unfinished jobs again"""
+        rows = self._execute(
+            "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+            (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+        )
+        for row in rows:
+            job = self._job_from_row(row)
+            if job.status == JobStatus.RUNNING and job.attempts >= JOB_MAX_ATTEMPTS:
+                job.status = JobStatus.FAILED
+                job.error = f"Interrupted {job.attempts} times"
+                job.finished_at = datetime.now().isoformat()
+                self._journal(job)
+                continue
+            job.status = JobStatus.QUEUED
+            self._push(job)
+        if rows:
+            logger.info(f"Recovered {len(self._heap)} queued jobs from {self.path}")
+    
+    # -- queue --
+    
+    @staticmethod
+    def _lane(payload: dict) -> TaskPriority:
+        try:
+            return TaskPriority(payload.get('priority') or TaskPriority.MEDIUM)
+        except ValueError:
+            return TaskPriority.MEDIUM
+    
+    def _push(self, job: Job) -> asyncio.AbstractEventLoop | None:
+        """Add a job to its lane; returns the worker loop to wake, if running"""
+        with self._lock:
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (-PRIORITY_RANK[job.priority], next(self._sequence), job.id))
+            return self._loop
+    
+    def submit(self, event_type: str, payload: dict) -> Job:
+        """Queue an event; raises QueueFull when max_pending jobs are waiting"""
+        job = Job(id=f"job-{uuid.uuid4().hex}", event_type=event_type, payload=payload, priority=self._lane(payload))
+        # Checked and pushed under one lock, so concurrent submits cannot overshoot
+        with self._lock:
+            if len(self._heap) >= self.max_pending:
+                raise QueueFull(f"Job queue is full ({self.max_pending} pending)")
+            self._journal(job)
+            loop = self._push(job)
+        if loop is not None:
+            loop.call_soon_threadsafe(self._available.release)
+        return job
+    
+    def get(self, job_id: str) -> Job | None:
+        """Job by ID, including finished ones until their result expires"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return self._job_from_row(rows[0]) if rows else None
+    
+    def stats(self) -> dict:
+        counts = {status.value: 0 for status in JobStatus}
+        for job in list(self._jobs.values()):
+            counts[job.status.value] += 1
+        return {'pending': len(self._heap), 'max_pending': self.max_pending, 'workers': self.workers, **counts}
+    
+    # -- workers --
+    
+    def start(self, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        """Start the workers on a loop running in another thread, or on a thread of their own"""
+        if self._thread is not None or self._loop is not None:
+            return
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._start_workers(), loop).result()
+            return
+        self._thread = threading.Thread(target=self._run_loop, name="webhook-jobs", daemon=True)
+        self._thread.start()
+        self._started.wait()
+    
+    async def _start_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Jobs pushed before this point are counted here, later ones release
+            self._available = asyncio.Semaphore(len(self._heap))
+            self._loop = loop
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def _stop_workers(self) -> None:
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+    
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(self._start_workers())
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(self._stop_workers())
+            loop.close()
+    
+    async def _worker(self) -> None:
+        while True:
+            await self._available.acquire()
+            with self._lock:
+                if not self._heap:
+                    continue
+                job = self._jobs[heapq.heappop(self._heap)[2]]
+            await self._run_job(job)
+            await self._prune()
+    
+    async def _run_job(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = datetime.now().isoformat()
+        await self._journal_async(job)
+        
+        callback = self.callbacks.get(job.event_type)
+        try:
+            if callback is None:
+                raise LookupError(f"No callback registered for {job.event_type}")
+            # Snapshot: results may hold live objects (e.g. Tasks) that change later
+            job.result = codec.loads(codec.dumps(await callback(job.payload)))
+            job.status = JobStatus.SUCCEEDED
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.event_type}) failed: {e}")
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        job.finished_at = datetime.now().isoformat()
+        await self._journal_async(job)
+    
+    async def _prune(self) -> None:
+        """Forget finished jobs older than result_ttl"""
+        now = time.monotonic()
+        if now - self._last_prune < JOB_PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        
+        cutoff = (datetime.now() - timedelta(seconds=self.result_ttl)).isoformat()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.done and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                self._execute,
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (JobStatus.SUCCEEDED.value, JobStatus.FAILED.value, cutoff)
+            )
+    
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the workers; jobs still queued stay in the journal for the next start"""
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+        elif self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._stop_workers(), self._loop).result(timeout)
+        with self._lock:
+            self._loop = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
@@ -4,163 +4,449 @@ Integrates with Task Planner Agent
 """
 
 from __future__ import annotations
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, url_for
+from concurrent.futures import Future
+from dataclasses import dataclass
 from datetime import datetime
+import asyncio
 import logging
-import json
-from typing import Any
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator
+
+from agents.webhooks import codec
+from agents.webhooks.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, CachedResponse, IdempotencyCache
+from agents.webhooks.job_queue import JobQueue, QueueFull
 
 logger = logging.getLogger(__name__)
 
 webhook_bp = Blueprint('webhooks', __name__, url_prefix='/webhooks')
 
-# Storage for callbacks
-webhook_callbacks: dict[str, Any] = {}
+# Dispatch table: event type -> handler (the callback, or a fan-out over several)
+webhook_callbacks: dict[str, Callable[[dict], Awaitable[Any]]] = {}
+webhook_bulk_callbacks: dict[str, Any] = {}
+webhook_stream_callbacks: dict[str, Any] = {}
+_registered_callbacks: dict[str, list[Callable[[dict], Awaitable[Any]]]] = {}
+
+# Optional job queue: when enabled, callback webhooks answer 202 and run on its workers
+job_queue: JobQueue | None = None
+JOB_RETRY_AFTER = 5  # seconds, sent with 429 when the queue is full
+
+# Replays retried deliveries (see _idempotent); None disables it
+idempotency_cache: IdempotencyCache | None = IdempotencyCache()
+
+# Batch processing defaults
+BATCH_CONCURRENCY = 32
+BATCH_MAX_CONCURRENCY = 256
+BATCH_ITEM_TIMEOUT = 30.0
+
+def _fan_out(callbacks: tuple[Callable[[dict], Awaitable[Any]], ...]) -> Callable[[dict], Awaitable[list]]:
+    """Handler running several callbacks concurrently
+    
+    Results come back in registration order, with {'error': ...} for failed
+    callbacks; it raises only if all of them fail.
+    """
+    async def handler(payload: dict) -> list:
+        results = await asyncio.gather(*(callback(payload) for callback in callbacks), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if len(errors) == len(results):
+            raise errors[0]
+        for error in errors:
+            logger.error(f"Webhook callback failed: {error}")
+        return [{'error': str(result)} if isinstance(result, Exception) else result for result in results]
+    return handler
 
 def register_callback(event_type: str, callback):
-    """Register webhook callback"""
+    """Register webhook callback, replacing any registered for the event"""
+    _registered_callbacks[event_type] = [callback]
     webhook_callbacks[event_type] = callback
     logger.info(f"Registered callback for {event_type}")
 
-@webhook_bp.route('/task/create', methods=['POST'])
-async def webhook_task_create():
-    """Handle task.create webhook"""
+def add_callback(event_type: str, callback):
+    """Add a webhook callback next to those already registered for the event
+    
+    Callbacks of the same event all run, and the result becomes a list in
+    registration order (see _fan_out).
+    """
+    callbacks = _registered_callbacks.setdefault(event_type, [])
+    callbacks.append(callback)
+    webhook_callbacks[event_type] = callback if len(callbacks) == 1 else _fan_out(tuple(callbacks))
+    logger.info(f"Added callback for {event_type} ({len(callbacks)} registered)")
+
+def unregister_callbacks(event_type: str) -> None:
+    """Remove all callbacks of an event"""
+    _registered_callbacks.pop(event_type, None)
+    webhook_callbacks.pop(event_type, None)
+
+def register_bulk_callback(event_type: str, callback):
+    """Register batch callback that takes the whole item list
+    
+    The callback returns one result dict per item, in input order (see
+    TaskPlannerAgent.process_batch_webhook). It takes precedence over a
+    per-item callback for the same batch event.
+    """
+    webhook_bulk_callbacks[event_type] = callback
+    logger.info(f"Registered bulk callback for {event_type}")
+
+def register_stream_callback(event_type: str, callback):
+    """Register streaming callback returning an async iterator of text chunks
+    
+    Used when the request asks for a streamed response ("stream": true),
+    e.g. TaskPlannerAgent.iter_markdown_report for report.generate or
+    TaskPlannerAgent.chat_stream for chat.
+    """
+    webhook_stream_callbacks[event_type] = callback
+    logger.info(f"Registered stream callback for {event_type}")
+
+def enable_job_queue(queue: JobQueue) -> None:
+    """Queue webhook events on a JobQueue instead of running them in the request
+    
+    The queue's workers are started on the webhook event loop, next to the
+    callbacks run inline. Streamed responses and batches still run inline.
+    """
+    global job_queue
+    queue.start(_event_loop())
+    job_queue = queue
+    logger.info(f"Webhook job queue enabled ({queue.workers} workers, {queue.max_pending} max pending)")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """The event loop webhook coroutines run on, started on a background thread on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="webhook-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+async def _await(awaitable: Awaitable) -> Any:
+    return await awaitable
+
+def _run(coro: Awaitable) -> Any:
+    """Run a coroutine on the webhook event loop and wait for its result
+    
+    Views are sync. Every server thread hands its coroutines to one
+    long-lived loop, rather than Flask's new loop per async view, so
+    callbacks share loop-bound state such as clients and locks.
+    """
+    loop = _event_loop()
     try:
-        payload = request.json or {}
-        
-        callback = webhook_callbacks.get('task.create')
-        if callback:
-            result = await callback(payload)
-            return jsonify({
-                'status': 'success',
-                'result': result,
-                'timestamp': datetime.now().isoformat()
-            }), 201
-        
-        return jsonify({'error': 'No callback registered'}), 400
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("Cannot wait for a webhook coroutine from the webhook event loop")
+    if not asyncio.iscoroutine(coro):
+        coro = _await(coro)
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+def _iter_sync(chunks: AsyncIterator) -> Iterator:
+    """Drive an async iterator from Flask's sync response iterator"""
+    try:
+        while True:
+            try:
+                yield _run(chunks.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        _run(chunks.aclose())
+
+def _json_response(body: Any, status: int = 200, headers: dict | None = None) -> Response:
+    """JSON response encoded in one pass (see codec.dumps)"""
+    return Response(codec.dumps(body), status=status, headers=headers, mimetype='application/json')
+
+def _payload() -> Any:
+    """Parsed JSON body, {} when empty; raises ValueError when malformed"""
+    data = request.get_data(cache=True)
+    return codec.loads(data) if data else {}
+
+def _idempotent(event_type: str, payload: dict | None, serve: Callable[[], Response]) -> Response:
+    """Serve a delivery once per Idempotency-Key header (or payload, when given)
     
-    except Exception as e:
-        logger.error(f"Webhook error: {e}")
-        return jsonify({'error': str(e)}), 500
+    Successful non-streamed responses are replayed until the cache TTL
+    expires, and a duplicate arriving while the first delivery runs waits
+    for its response.
+    """
+    cache = idempotency_cache
+    key = cache and cache.key(event_type, request.headers.get(IDEMPOTENCY_HEADER), payload)
+    if not key:
+        return serve()
+    
+    cached = cache.begin(key)
+    if isinstance(cached, Future):
+        cached = cached.result()
+        if cached is None:
+            return serve()  # first delivery streamed, nothing to share
+    if cached is not None:
+        replay = Response(cached.body, status=cached.status, headers=list(cached.headers))
+        replay.headers[REPLAYED_HEADER] = 'true'
+        return replay
+    
+    try:
+        response = serve()
+    except BaseException:
+        cache.finish(key, None, store=False)
+        raise
+    if response.is_streamed:
+        cache.finish(key, None, store=False)
+        return response
+    snapshot = CachedResponse(response.get_data(), response.status_code, tuple(response.headers.items()))
+    cache.finish(key, snapshot, store=200 <= response.status_code < 300)
+    return response
 
-@webhook_bp.route('/task/complete', methods=['POST'])
-async def webhook_task_complete():
-    """Handle task.complete webhook"""
+def _queued_response(event_type: str, payload: dict) -> Response:
+    """202 with the job ID, or 429 when the queue is full"""
     try:
-        payload = request.json or {}
-        
-        callback = webhook_callbacks.get('task.complete')
-        if callback:
-            result = await callback(payload)
-            return jsonify({
-                'status': 'success',
-                'result': result,
-                'timestamp': datetime.now().isoformat()
-            }), 200
-        
-        return jsonify({'error': 'No callback registered'}), 400
+        job = job_queue.submit(event_type, payload)
+    except QueueFull as e:
+        return _json_response({'error': str(e)}, 429, {'Retry-After': str(JOB_RETRY_AFTER)})
     
-    except Exception as e:
-        logger.error(f"Webhook error: {e}")
-        return jsonify({'error': str(e)}), 500
+    status_url = url_for('webhooks.webhook_job_status', job_id=job.id)
+    return _json_response({
+        'status': 'accepted',
+        'job_id': job.id,
+        'status_url': status_url,
+        'timestamp': datetime.now().isoformat()
+    }, 202, {'Location': status_url})
+
+def _stream_sse(chunks: AsyncIterator[str]) -> Iterator[bytes]:
+    """Serialize text chunks as server-sent events, ending with a done event"""
+    for chunk in _iter_sync(chunks):
+        yield b"data: " + codec.dumps({'delta': chunk}) + b"\n\n"
+    yield b"event: done\ndata: {}\n\n"
+
+def _markdown_stream_response(chunks: AsyncIterator[str]) -> Response:
+    return Response(_iter_sync(chunks), mimetype='text/markdown')
+
+def _sse_response(chunks: AsyncIterator[str]) -> Response:
+    return Response(
+        _stream_sse(chunks),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
-@webhook_bp.route('/task/error', methods=['POST'])
-async def webhook_task_error():
-    """Handle task.error webhook"""
+@dataclass(frozen=True)
+class WebhookRoute:
+    """Callback webhook served by the generic dispatcher"""
+    event_type: str
+    success_status: int = 200
+    required: tuple[str, ...] = ()
+    hash_payload: bool = False  # identical payloads count as one delivery
+    stream: Callable[[AsyncIterator[str]], Response] | None = None  # response for the stream callback
+    stream_accept: str | None = None  # Accept value that also asks for a stream
+    
+    @property
+    def endpoint(self) -> str:
+        return f"webhook_{self.event_type.replace('.', '_')}"
+
+WEBHOOK_ROUTES: dict[str, WebhookRoute] = {
+    '/task/create': WebhookRoute('task.create', success_status=201, hash_payload=True),
+    '/task/complete': WebhookRoute('task.complete'),
+    '/task/error': WebhookRoute('task.error'),
+    '/task/status': WebhookRoute('task.status'),
+    '/report/generate': WebhookRoute('report.generate', stream=_markdown_stream_response),
+    '/chat': WebhookRoute(
+        'chat',
+        required=('message',),
+        stream=_sse_response,
+        stream_accept='text/event-stream'
+    ),
+}
+
+def _handle(route: WebhookRoute, payload: dict) -> Response:
+    """Stream, queue or run the callback of a route"""
+    event_type = route.event_type
     try:
-        payload = request.json or {}
+        for name in route.required:
+            if not payload.get(name):
+                return _json_response({'error': f'{name} is required'}, 400)
+        
+        if route.stream is not None:
+            stream_callback = webhook_stream_callbacks.get(event_type)
+            stream = payload.get('stream') or (
+                route.stream_accept is not None and route.stream_accept in request.headers.get('Accept', '')
+            )
+            if stream and stream_callback:
+                return route.stream(stream_callback(payload))
         
-        callback = webhook_callbacks.get('task.error')
-        if callback:
-            result = await callback(payload)
-            return jsonify({
-                'status': 'success',
-                'result': result,
-                'timestamp': datetime.now().isoformat()
-            }), 200
+        callback = webhook_callbacks.get(event_type)
+        if callback is None:
+            return _json_response({'error': 'No callback registered'}, 400)
+        if job_queue is not None:
+            return _queued_response(event_type, payload)
         
-        return jsonify({'error': 'No callback registered'}), 400
+        result = _run(callback(payload))
+        return _json_response({
+            'status': 'success',
+            'result': result,
+            'timestamp': datetime.now().isoformat()
+        }, route.success_status)
     
     except Exception as e:
-        logger.error(f"Webhook error: {e}")
-        return jsonify({'error': str(e)}), 500
+        logger.error(f"Webhook error ({event_type}): {e}")
+        return _json_response({'error': str(e)}, 500)
 
-@webhook_bp.route('/task/status', methods=['POST'])
-async def webhook_task_status():
-    """Handle task.status webhook"""
+def _dispatch(route: WebhookRoute) -> Response:
+    """Serve a callback webhook: parse, deduplicate, then handle"""
     try:
-        payload = request.json or {}
-        
-        callback = webhook_callbacks.get('task.status')
-        if callback:
-            result = await callback(payload)
-            return jsonify({
-                'status': 'success',
-                'result': result,
-                'timestamp': datetime.now().isoformat()
-            }), 200
-        
-        return jsonify({'error': 'No callback registered'}), 400
+        payload = _payload()
+    except ValueError as e:
+        return _json_response({'error': f'Invalid JSON: {e}'}, 400)
+    if not isinstance(payload, dict):
+        return _json_response({'error': 'Expected a JSON object'}, 400)
+    return _idempotent(route.event_type, payload if route.hash_payload else None, lambda: _handle(route, payload))
+
+def _route_view(route: WebhookRoute) -> Callable[[], Response]:
+    def view() -> Response:
+        return _dispatch(route)
+    view.__name__ = route.endpoint
+    view.__doc__ = f"Handle {route.event_type} webhook"
+    return view
+
+for _path, _route in WEBHOOK_ROUTES.items():
+    webhook_bp.add_url_rule(_path, _route.endpoint, _route_view(_route), methods=['POST'])
+
+async def _process_batch_item(
+    callback,
+    index: int,
+    task_data: dict,
+    semaphore: asyncio.Semaphore,
+    timeout: float | None
+) -> dict:
+    """Run callback for one batch item, isolating its failure"""
+    async with semaphore:
+        try:
+            result = await asyncio.wait_for(callback(task_data), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Batch item {index} timed out after {timeout}s")
+            return {'index': index, 'status': 'error', 'error': f'Timed out after {timeout}s'}
+        except Exception as e:
+            logger.error(f"Batch item {index} failed: {e}")
+            return {'index': index, 'status': 'error', 'error': str(e)}
     
-    except Exception as e:
-        logger.error(f"Webhook error: {e}")
-        return jsonify({'error': str(e)}), 500
+    return {'index': index, 'status': 'success', 'result': result}
 
-@webhook_bp.route('/report/generate', methods=['POST'])
-async def webhook_report_generate():
-    """Handle report.generate webhook"""
+async def iter_batch(
+    callback,
+    items: list[dict],
+    concurrency: int = BATCH_CONCURRENCY,
+    timeout: float | None = BATCH_ITEM_TIMEOUT
+) -> AsyncIterator[dict]:
+    """Run callback over items with bounded parallelism, yielding results in input order"""
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = [
+        asyncio.ensure_future(_process_batch_item(callback, idx, item, semaphore, timeout))
+        for idx, item in enumerate(items)
+    ]
     try:
-        payload = request.json or {}
-        
-        callback = webhook_callbacks.get('report.generate')
-        if callback:
-            result = await callback(payload)
-            return jsonify({
-                'status': 'success',
-                'result': result,
-                'timestamp': datetime.now().isoformat()
-            }), 200
-        
-        return jsonify({'error': 'No callback registered'}), 400
+        for future in pending:
+            yield await future
+    finally:
+        for future in pending:
+            future.cancel()
+
+async def iter_bulk(callback, items: list[dict]) -> AsyncIterator[dict]:
+    """Run a bulk callback once over all items, yielding its per-item results"""
+    results = await callback(items)
+    for idx, result in enumerate(results):
+        yield {'index': idx, **result}
+
+def _stream_ndjson(results: AsyncIterator[dict]) -> Iterator[bytes]:
+    """Serialize a batch result stream as NDJSON lines plus a summary line"""
+    processed = failed = 0
+    for item in _iter_sync(results):
+        processed += 1
+        if item['status'] == 'error':
+            failed += 1
+        yield codec.dumps(item) + b"\n"
     
-    except Exception as e:
-        logger.error(f"Webhook error: {e}")
-        return jsonify({'error': str(e)}), 500
+    yield codec.dumps({
+        'status': 'success',
+        'processed': processed,
+        'failed': failed,
+        'timestamp': datetime.now().isoformat()
+    }) + b"\n"
 
-@webhook_bp.route('/batch/process', methods=['POST'])
-async def webhook_batch_process():
-    """Handle batch task processing"""
+async def _collect(results: AsyncIterator[dict]) -> list[dict]:
+    return [item async for item in results]
+
+def _batch_process(payload: dict) -> Response:
     try:
-        payload = request.json or {}
         tasks = payload.get('tasks', [])
         operation = payload.get('operation', 'create')
         
+        bulk_callback = webhook_bulk_callbacks.get(f'batch.{operation}')
         callback = webhook_callbacks.get(f'batch.{operation}')
-        if callback:
-            results = []
-            for task_data in tasks:
-                result = await callback(task_data)
-                results.append(result)
-            
-            return jsonify({
-                'status': 'success',
-                'processed': len(results),
-                'results': results,
-                'timestamp': datetime.now().isoformat()
-            }), 200
+        if not bulk_callback and not callback:
+            return _json_response({'error': f'No callback for batch.{operation}'}, 400)
+        
+        try:
+            concurrency = int(payload.get('concurrency', BATCH_CONCURRENCY))
+            timeout = payload.get('timeout', BATCH_ITEM_TIMEOUT)
+            timeout = float(timeout) if timeout is not None else None
+        except (TypeError, ValueError):
+            return _json_response({'error': 'concurrency and timeout must be numeric'}, 400)
+        concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
         
-        return jsonify({'error': f'No callback for batch.{operation}'}), 400
+        if bulk_callback:
+            results = iter_bulk(bulk_callback, tasks)
+        else:
+            results = iter_batch(callback, tasks, concurrency, timeout)
+        
+        stream = payload.get('stream') or 'application/x-ndjson' in request.headers.get('Accept', '')
+        if stream:
+            return Response(_stream_ndjson(results), mimetype='application/x-ndjson')
+        
+        collected = _run(_collect(results))
+        return _json_response({
+            'status': 'success',
+            'processed': len(collected),
+            'failed': sum(1 for item in collected if item['status'] == 'error'),
+            'results': collected,
+            'timestamp': datetime.now().isoformat()
+        })
     
     except Exception as e:
         logger.error(f"Batch webhook error: {e}")
-        return jsonify({'error': str(e)}), 500
+        return _json_response({'error': str(e)}, 500)
+
+@webhook_bp.route('/batch/process', methods=['POST'])
+def webhook_batch_process():
+    """Handle batch task processing"""
+    try:
+        payload = _payload()
+    except ValueError as e:
+        return _json_response({'error': f'Invalid JSON: {e}'}, 400)
+    if not isinstance(payload, dict):
+        return _json_response({'error': 'Expected a JSON object'}, 400)
+    # Only create batches are deduplicated by payload; a repeated status
+    # or complete batch may be meant to apply again
+    hashed = payload if payload.get('operation', 'create') == 'create' else None
+    return _idempotent('batch.process', hashed, lambda: _batch_process(payload))
+
+@webhook_bp.route('/jobs/<job_id>', methods=['GET'])
+def webhook_job_status(job_id: str):
+    """Status (and result, once finished) of a queued webhook job"""
+    job = job_queue.get(job_id) if job_queue is not None else None
+    if job is None:
+        return _json_response({'error': f'Job not found: {job_id}'}, 404)
+    return _json_response(job.to_dict())
 
 @webhook_bp.route('/health', methods=['GET'])
 def webhook_health():
     """Health check"""
-    return jsonify({
+    health = {
         'status': 'healthy',
-        'webhooks': list(webhook_callbacks.keys()),
+        'webhooks': sorted(
+            webhook_callbacks.keys() | webhook_bulk_callbacks.keys() | webhook_stream_callbacks.keys()
+        ),
         'timestamp': datetime.now().isoformat()
-    }), 200
-
+    }
+    if job_queue is not None:
+        health['jobs'] = job_queue.stats()
+    if idempotency_cache is not None:
+        health['idempotency'] = idempotency_cache.stats()
+    return _json_response(health)